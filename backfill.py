@@ -0,0 +1,306 @@
+"""Backfill the local candle store from Bybit's paginated ``get_kline``.
+
+``get_kline`` returns at most 1000 bars per request, newest first, for a
+``start``/``end`` window. ``backfill`` splits the missing time ranges of every
+``(symbol, interval)`` into such pages, oldest first, and fetches them on a
+bounded thread pool. Pages arrive in any order but are written in time order:
+a range after the stored tail is fetched oldest first and appended page by
+page as soon as its older pages are in. A range before the tail (history
+older than the store or a hole inside it) costs a file rewrite per write, so
+it is fetched newest first and written in batches of ``PREPEND_PAGES``
+pages, each batch adjoining what is already stored.
+
+Because progress is written as it arrives (at most one batch is lost) and
+the missing ranges are recomputed from the store on every run, an
+interrupted backfill simply resumes where it stopped. The same scan finds holes inside the stored range
+and refills them. Windows the exchange answered without bars (before the
+listing date, real gaps in the exchange's history) are recorded next to the
+candle file in ``<symbol>_<interval>.empty.json`` and not requested again.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bot import BybitTradingBot, _interval_seconds
+from candle_series import CandleSeries
+from candle_store import CandleStore
+
+__all__ = ["PAGE_LIMIT", "PREPEND_PAGES", "find_gaps", "known_empty", "missing_ranges", "backfill"]
+
+logger = logging.getLogger(__name__)
+
+PAGE_LIMIT = 1000
+# pages per write of a range before the stored tail: bounds both the number
+# of file rewrites and the progress an interruption can lose
+PREPEND_PAGES = 20
+
+Range = Tuple[int, int]
+
+
+def find_gaps(timestamps: Iterable[int], interval_ms: int) -> List[Range]:
+    """Return inclusive ``(start, end)`` ranges of bars missing between ``timestamps``."""
+
+    gaps: List[Range] = []
+    prev: Optional[int] = None
+    for ts in timestamps:
+        if prev is not None and ts - prev > interval_ms:
+            gaps.append((prev + interval_ms, ts - interval_ms))
+        prev = ts
+    return gaps
+
+
+def _empty_path(store: CandleStore, symbol: str, interval: int | str) -> Path:
+    return store.path(symbol, interval).with_suffix(".empty.json")
+
+
+def known_empty(store: CandleStore, symbol: str, interval: int | str) -> List[Range]:
+    """Return ranges the exchange is known to have no bars for."""
+
+    path = _empty_path(store, symbol, interval)
+    if not path.exists():
+        return []
+    with path.open("r", encoding="utf-8") as f:
+        return [(int(start), int(end)) for start, end in json.load(f)]
+
+
+def _record_empty(
+    store: CandleStore, symbol: str, interval: int | str, ranges: Iterable[Range]
+) -> None:
+    interval_ms = _interval_seconds(interval) * 1000
+    merged: List[List[int]] = []
+    for start, end in sorted([*known_empty(store, symbol, interval), *ranges]):
+        if merged and start <= merged[-1][1] + interval_ms:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    path = _empty_path(store, symbol, interval)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(merged, f)
+    tmp.replace(path)
+
+
+def _subtract(ranges: Iterable[Range], holes: List[Range], interval_ms: int) -> List[Range]:
+    """Return ``ranges`` with every ``holes`` range cut out."""
+
+    out: List[Range] = []
+    for start, end in ranges:
+        for hole_start, hole_end in holes:
+            if hole_end < start or hole_start > end:
+                continue
+            if hole_start > start:
+                out.append((start, hole_start - interval_ms))
+            start = hole_end + interval_ms
+            if start > end:
+                break
+        if start <= end:
+            out.append((start, end))
+    return out
+
+
+def missing_ranges(
+    store: CandleStore, symbol: str, interval: int | str, start_ms: int, end_ms: int
+) -> List[Range]:
+    """Return ranges within ``[start_ms, end_ms]`` not yet held by ``store``.
+
+    Ranges recorded as empty by an earlier ``backfill`` are left out.
+    """
+
+    interval_ms = _interval_seconds(interval) * 1000
+    start_ms = start_ms // interval_ms * interval_ms
+    data = store.read(symbol, interval, start_ms, end_ms)
+    if not len(data):
+        ranges = [(start_ms, end_ms)]
+    else:
+        ts = data["ts"]
+        ranges = []
+        if int(ts[0]) > start_ms:
+            ranges.append((start_ms, int(ts[0]) - interval_ms))
+        ranges.extend(find_gaps(ts.tolist(), interval_ms))
+        if int(ts[-1]) + interval_ms <= end_ms:
+            ranges.append((int(ts[-1]) + interval_ms, end_ms))
+    return _subtract(ranges, known_empty(store, symbol, interval), interval_ms)
+
+
+def _pages(ranges: Iterable[Range], interval_ms: int, limit: int) -> List[Range]:
+    """Split ``ranges`` into request windows of at most ``limit`` bars, oldest first."""
+
+    pages: List[Range] = []
+    for start, end in ranges:
+        page_start = start
+        while page_start <= end:
+            page_end = min(end, page_start + (limit - 1) * interval_ms)
+            pages.append((page_start, page_end))
+            page_start = page_end + interval_ms
+    return sorted(pages)
+
+
+def _fetch_page(session, symbol: str, interval: int | str, page: Range, limit: int) -> list:
+    result = session.get_kline(
+        category="linear",
+        symbol=symbol,
+        interval=interval,
+        start=page[0],
+        end=page[1],
+        limit=limit,
+    )
+    return result.get("result", {}).get("list", [])
+
+
+class _RangeWriter:
+    """Writes the pages of one missing range to the store in time order.
+
+    A tail range is written oldest page first, one page at a time. A range
+    before the stored tail is written newest page first in batches of
+    ``batch`` pages, so every batch extends the stored data backwards.
+    """
+
+    def __init__(
+        self,
+        store: CandleStore,
+        symbol: str,
+        interval: int | str,
+        pages: List[Range],
+        prepend: bool,
+        batch: int = PREPEND_PAGES,
+    ):
+        self.store = store
+        self.symbol = symbol
+        self.interval = interval
+        self.interval_ms = _interval_seconds(interval) * 1000
+        self.pages = pages
+        self.prepend = prepend
+        self.batch = batch if prepend else 1
+        # page indices in the order they are written
+        self.order = list(range(len(pages)))
+        if prepend:
+            self.order.reverse()
+        self.ready: Dict[int, Optional[CandleSeries]] = {}
+        self.buffered: List[CandleSeries] = []
+        self.next = 0
+        self.added = 0
+        self.empty: List[Range] = []
+
+    def done(self, index: int, rows: Optional[list]) -> None:
+        """Take the rows of page ``index`` (``None`` if it failed) and write what is in order."""
+
+        candles = None
+        if rows is not None:
+            start, end = self.pages[index]
+            candles = CandleSeries.from_bybit([r for r in rows if start <= int(r[0]) <= end])
+            bounds = [start - self.interval_ms, *map(int, candles.ts), end + self.interval_ms]
+            self.empty.extend(find_gaps(bounds, self.interval_ms))
+        self.ready[index] = candles
+        while self.next < len(self.order) and self.order[self.next] in self.ready:
+            candles = self.ready.pop(self.order[self.next])
+            self.next += 1
+            if candles is not None and len(candles):
+                self.buffered.append(candles)
+            if self.next % self.batch == 0 or self.next == len(self.order):
+                self._flush()
+
+    def _flush(self) -> None:
+        if self.buffered:
+            parts = reversed(self.buffered) if self.prepend else self.buffered
+            candles = CandleSeries.concat(parts)
+            self.buffered = []
+            self.added += self.store.append(self.symbol, self.interval, candles)
+
+
+def backfill(
+    session,
+    store: CandleStore,
+    start_ms: int,
+    end_ms: Optional[int] = None,
+    symbols: Iterable[str] = BybitTradingBot.ALLOWED_SYMBOLS,
+    intervals: Iterable[int | str] = (5, 240),
+    max_workers: int = 4,
+    limit: int = PAGE_LIMIT,
+) -> dict:
+    """Fill ``store`` for every symbol and interval from ``start_ms`` to ``end_ms``.
+
+    Only closed bars are requested; ``end_ms`` defaults to now. Returns the
+    number of bars added per ``(symbol, interval)``. Failed pages are logged
+    and left as gaps for the next run. Windows without bars that are older
+    than the newest stored bar are recorded as known empty.
+    """
+
+    now_ms = int(time.time() * 1000) if end_ms is None else end_ms
+    writers: List[_RangeWriter] = []
+    jobs = []
+    for symbol in symbols:
+        for interval in intervals:
+            interval_ms = _interval_seconds(interval) * 1000
+            # the newest bar is still forming; stop at the last closed one
+            last_closed = (now_ms // interval_ms - 1) * interval_ms
+            last = store.last_ts(symbol, interval)
+            for start, end in missing_ranges(store, symbol, interval, start_ms, last_closed):
+                pages = _pages([(start, end)], interval_ms, limit)
+                writer = _RangeWriter(store, symbol, interval, pages, last is not None and end < last)
+                writers.append(writer)
+                # submitted in write order, so pages mostly complete in order
+                jobs.extend((writer, index, pages[index]) for index in writer.order)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(_fetch_page, session, w.symbol, w.interval, page, limit): (w, index, page)
+            for w, index, page in jobs
+        }
+        for future in as_completed(futures):
+            writer, index, page = futures[future]
+            try:
+                rows = future.result()
+            except Exception as exc:
+                logger.error("%s: backfill page %s failed: %s", writer.symbol, page, exc)
+                rows = None
+            writer.done(index, rows)
+    added: Dict[Tuple[str, int | str], int] = {}
+    empty: Dict[Tuple[str, int | str], List[Range]] = {}
+    for writer in writers:
+        key = (writer.symbol, writer.interval)
+        if writer.added:
+            added[key] = added.get(key, 0) + writer.added
+        empty.setdefault(key, []).extend(writer.empty)
+    for (symbol, interval), ranges in empty.items():
+        # a missing bar newer than everything stored may simply not be published yet
+        last = store.last_ts(symbol, interval)
+        ranges = [r for r in ranges if last is not None and r[1] < last]
+        if ranges:
+            _record_empty(store, symbol, interval, ranges)
+            logger.info("%s: %d empty ranges of %s recorded", symbol, len(ranges), interval)
+    for (symbol, interval), count in sorted(added.items()):
+        logger.info("%s: backfilled %d bars of %s", symbol, count, interval)
+    return added
+
+
+if __name__ == "__main__":  # pragma: no cover - network entry point
+    import argparse
+    from datetime import datetime, timezone
+
+    from pybit.unified_trading import HTTP
+
+    from config import BybitConfig
+
+    parser = argparse.ArgumentParser(description="Backfill local kline history")
+    parser.add_argument("start", help="Start date in YYYY-MM-DD")
+    parser.add_argument("--cache", default="cache", help="Candle store directory")
+    parser.add_argument("--intervals", nargs="*", default=["5", "240"])
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    cfg = BybitConfig.from_env()
+    start = datetime.strptime(args.start, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    backfill(
+        HTTP(testnet=cfg.testnet, demo=cfg.demo),
+        CandleStore(args.cache),
+        int(start.timestamp() * 1000),
+        intervals=[int(i) if i.isdigit() else i for i in args.intervals],
+        max_workers=args.workers,
+    )
@@ -0,0 +1,532 @@
+"""Offline event-driven backtester for ``BybitTradingBot``.
+
+The real ``trade_strategy``/``trade_half_year``/``place_order`` code runs
+against ``SimulatedSession``, a stand-in for the pybit ``HTTP`` session that
+serves ``get_kline``/``get_tickers``/``get_instruments_info`` from recorded
+candles and fills market orders at the last close. Every order keeps its own
+SL/TP (the bot trades with ``tpslMode=Partial``) and is closed when a later
+bar touches one of the levels; when both are touched within one bar the stop
+is assumed to trigger first.
+
+History is a mapping ``{(symbol, interval): candles}`` with chronological
+``[ts_ms, open, high, low, close, volume]`` rows: lists from JSON files or
+``CandleSeries`` columns copied straight out of a ``CandleStore`` memmap.
+Higher intervals can be built from 5-minute data with ``resample``.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from bot import BybitTradingBot, KlineSnapshot, default_strategies
+from candle_series import CandleSeries
+from candle_store import CandleStore
+
+__all__ = [
+    "SimulatedMarket",
+    "SimulatedSession",
+    "resample",
+    "load_history",
+    "load_store_history",
+    "run_backtest",
+]
+
+logger = logging.getLogger(__name__)
+
+History = Dict[Tuple[str, int], Sequence[Sequence[float]]]
+
+DEFAULT_INSTRUMENT = {
+    "lotSizeFilter": {"qtyStep": "0.001", "minOrderQty": "0.001"},
+    "priceFilter": {"tickSize": "0.01"},
+}
+
+
+def _ok(result: dict) -> dict:
+    return {"retCode": 0, "retMsg": "OK", "result": result, "retExtInfo": {}}
+
+
+class _Series:
+    """Candles of one (symbol, interval) indexed for O(limit) kline requests."""
+
+    def __init__(self, candles: Sequence[Sequence[float]], interval: int):
+        self.interval_ms = interval * 60_000
+        if not isinstance(candles, CandleSeries):
+            candles = CandleSeries.from_rows(candles)
+        self.candles = candles
+        self.starts = candles.ts
+
+    def closed_count(self, now_ms: int) -> int:
+        """Number of bars whose close time is not after ``now_ms``."""
+        return int(np.searchsorted(self.starts, now_ms - self.interval_ms, side="right"))
+
+    def window(self, now_ms: int, limit: int) -> CandleSeries:
+        """The newest ``limit`` closed bars as a view, oldest first."""
+        end = self.closed_count(now_ms)
+        return self.candles[max(0, end - limit) : end]
+
+    def latest(self, now_ms: int, limit: int) -> List[List[float]]:
+        rows = self.window(now_ms, limit).tolist()
+        rows.reverse()
+        return rows
+
+
+class SimulatedMarket:
+    """``MarketStream`` stand-in serving ``SimulatedSession`` candles as views.
+
+    Attached as ``bot.market`` it lets ``_get_candles`` and ``_last_price``
+    skip the ``get_kline``/``get_tickers`` round trip (rows built, then
+    parsed back) that dominates a replay.
+    """
+
+    def __init__(self, session: "SimulatedSession"):
+        self.session = session
+
+    def candles(self, symbol: str, interval: int | str, limit: int) -> Optional[CandleSeries]:
+        # unlike a live stream a short window is final: REST has no more bars
+        series = self.session._series.get((symbol, int(interval)))
+        return series.window(self.session.now, limit) if series is not None else None
+
+    def last_price(self, symbol: str) -> Optional[float]:
+        bar = self.session.bars.get(symbol)
+        return bar[4] if bar is not None else None
+
+
+class SimulatedSession:
+    """Minimal pybit ``HTTP`` replacement replaying ``history``.
+
+    ``advance(now_ms)`` moves the clock; only bars closed at ``now_ms`` are
+    visible, so strategies never see the future.
+    """
+
+    def __init__(
+        self,
+        history: History,
+        base_interval: int = 5,
+        instruments: Optional[Dict[str, dict]] = None,
+        fee_rate: float = 0.00055,
+        start_cash: float = 10000.0,
+    ):
+        self.base_interval = base_interval
+        self.fee_rate = fee_rate
+        self.start_cash = start_cash
+        self.instruments = instruments or {}
+        self._series = {
+            key: _Series(candles, key[1]) for key, candles in history.items()
+        }
+        self.now = 0
+        self.realized = 0.0
+        self.leverage: Dict[str, int] = {}
+        self.positions: List[dict] = []
+        self.orders: List[dict] = []
+        self.executions: List[dict] = []
+        self.bars: Dict[str, List[float]] = {}
+
+    # -- clock and fills -------------------------------------------------
+
+    def advance(self, now_ms: int) -> None:
+        """Move to ``now_ms`` and trigger SL/TP on the bars that just closed."""
+        self.now = now_ms
+        self.bars = {}
+        for (symbol, interval), series in self._series.items():
+            if interval != self.base_interval:
+                continue
+            bars = series.window(now_ms, 1)
+            if len(bars):
+                self.bars[symbol] = bars[-1]
+        still_open = []
+        for pos in self.positions:
+            bar = self.bars.get(pos["symbol"])
+            if bar is None or bar[0] <= pos["opened_bar"]:
+                still_open.append(pos)
+                continue
+            exit_price = self._trigger(pos, bar[2], bar[3])
+            if exit_price is None:
+                still_open.append(pos)
+            else:
+                self._close(pos, exit_price, "sl" if exit_price == pos["stop"] else "tp")
+        self.positions = still_open
+
+    @staticmethod
+    def _trigger(pos: dict, high: float, low: float) -> Optional[float]:
+        if pos["side"] == "Buy":
+            if low <= pos["stop"]:
+                return pos["stop"]
+            if high >= pos["take"]:
+                return pos["take"]
+        else:
+            if high >= pos["stop"]:
+                return pos["stop"]
+            if low <= pos["take"]:
+                return pos["take"]
+        return None
+
+    def _close(self, pos: dict, price: float, reason: str) -> None:
+        direction = 1 if pos["side"] == "Buy" else -1
+        pnl = (price - pos["entry"]) * pos["qty"] * direction
+        fee = price * pos["qty"] * self.fee_rate
+        self.realized += pnl - fee
+        self.executions.append(
+            {
+                "symbol": pos["symbol"],
+                "side": "Sell" if direction == 1 else "Buy",
+                "execPrice": price,
+                "execQty": pos["qty"],
+                "execTime": self.now,
+                "closedPnl": pnl - fee,
+                "reason": reason,
+            }
+        )
+
+    def unrealized(self) -> float:
+        total = 0.0
+        for pos in self.positions:
+            bar = self.bars.get(pos["symbol"])
+            if bar is not None:
+                direction = 1 if pos["side"] == "Buy" else -1
+                total += (bar[4] - pos["entry"]) * pos["qty"] * direction
+        return total
+
+    def equity(self) -> float:
+        return self.start_cash + self.realized + self.unrealized()
+
+    # -- pybit API subset --------------------------------------------------
+
+    def get_kline(self, category: str = "linear", symbol: str = "", interval=5, limit: int = 200, **_) -> dict:
+        series = self._series.get((symbol, int(interval)))
+        rows = series.latest(self.now, limit) if series is not None else []
+        return _ok({"category": category, "symbol": symbol, "list": rows})
+
+    def get_tickers(self, category: str = "linear", symbol: str = "", **_) -> dict:
+        if not symbol:
+            items = [{"symbol": s, "lastPrice": str(bar[4])} for s, bar in self.bars.items()]
+            return _ok({"category": category, "list": items})
+        bar = self.bars.get(symbol)
+        items = [{"symbol": symbol, "lastPrice": str(bar[4])}] if bar else [{}]
+        return _ok({"category": category, "list": items})
+
+    def get_instruments_info(self, category: str = "linear", symbol: str = "", **_) -> dict:
+        info = dict(self.instruments.get(symbol, DEFAULT_INSTRUMENT), symbol=symbol)
+        return _ok({"category": category, "list": [info]})
+
+    def set_leverage(self, symbol: str = "", buyLeverage: str = "1", **_) -> dict:
+        if self.leverage.get(symbol) == int(buyLeverage):
+            raise Exception("leverage not modified (ErrCode: 110043)")
+        self.leverage[symbol] = int(buyLeverage)
+        return _ok({})
+
+    def place_order(self, symbol: str = "", side: str = "Buy", qty: str = "0", reduceOnly: bool = False, **kwargs) -> dict:
+        bar = self.bars.get(symbol)
+        if bar is None:
+            raise ValueError(f"No price data for {symbol}")
+        price = bar[4]
+        order_id = f"sim-{len(self.orders) + 1}"
+        order = {
+            "orderId": order_id,
+            "symbol": symbol,
+            "side": side,
+            "price": price,
+            "qty": float(qty),
+            "time": self.now,
+            "reduceOnly": bool(reduceOnly),
+            "orderLinkId": kwargs.get("orderLinkId", ""),
+            "stopLoss": float(kwargs["stopLoss"]) if kwargs.get("stopLoss") else None,
+            "takeProfit": float(kwargs["takeProfit"]) if kwargs.get("takeProfit") else None,
+        }
+        self.orders.append(order)
+        if reduceOnly:
+            remaining = order["qty"]
+            for pos in [p for p in self.positions if p["symbol"] == symbol and p["side"] != side]:
+                if remaining <= 0:
+                    break
+                self.positions.remove(pos)
+                self._close(pos, price, "close")
+                remaining -= pos["qty"]
+        else:
+            self.realized -= price * order["qty"] * self.fee_rate
+            self.positions.append(
+                {
+                    "symbol": symbol,
+                    "side": side,
+                    "qty": order["qty"],
+                    "entry": price,
+                    "stop": order["stopLoss"],
+                    "take": order["takeProfit"],
+                    "opened_bar": bar[0],
+                }
+            )
+        return _ok({"orderId": order_id, "orderLinkId": kwargs.get("orderLinkId", "")})
+
+    def place_batch_order(self, category: str = "linear", request: Sequence[dict] = (), **_) -> dict:
+        orders, statuses = [], []
+        for params in request:
+            try:
+                orders.append(self.place_order(**params)["result"])
+                statuses.append({"code": 0, "msg": "OK"})
+            except ValueError as exc:
+                orders.append({"orderId": "", "orderLinkId": params.get("orderLinkId", "")})
+                statuses.append({"code": 10001, "msg": str(exc)})
+        return {"retCode": 0, "retMsg": "OK", "result": {"list": orders}, "retExtInfo": {"list": statuses}}
+
+    def set_trading_stop(self, symbol: str = "", stopLoss: str = "", takeProfit: str = "", **_) -> dict:
+        for pos in self.positions:
+            if pos["symbol"] == symbol:
+                if stopLoss:
+                    pos["stop"] = float(stopLoss)
+                if takeProfit:
+                    pos["take"] = float(takeProfit)
+        return _ok({})
+
+    def get_positions(self, category: str = "linear", symbol: str = "", **_) -> dict:
+        items = [
+            {
+                "symbol": p["symbol"],
+                "side": p["side"],
+                "size": str(p["qty"]),
+                "avgPrice": str(p["entry"]),
+                "leverage": str(self.leverage.get(p["symbol"], 1)),
+                "stopLoss": str(p["stop"] or ""),
+                "takeProfit": str(p["take"] or ""),
+            }
+            for p in self.positions
+            if not symbol or p["symbol"] == symbol
+        ]
+        return _ok({"category": category, "list": items, "nextPageCursor": ""})
+
+    def get_open_orders(self, category: str = "linear", symbol: str = "", **_) -> dict:
+        # orders fill the moment they are placed, so none is ever working
+        return _ok({"category": category, "list": [], "nextPageCursor": ""})
+
+    def get_order_history(
+        self, category: str = "linear", symbol: str = "", orderLinkId: str = "", limit: int = 50, **_
+    ) -> dict:
+        items = [
+            {
+                "orderId": o["orderId"],
+                "orderLinkId": o["orderLinkId"],
+                "symbol": o["symbol"],
+                "side": o["side"],
+                "orderType": "Market",
+                "qty": str(o["qty"]),
+                "cumExecQty": str(o["qty"]),
+                "avgPrice": str(o["price"]),
+                "orderStatus": "Filled",
+                "reduceOnly": o["reduceOnly"],
+                "createdTime": str(o["time"]),
+            }
+            for o in reversed(self.orders)
+            if (not symbol or o["symbol"] == symbol) and (not orderLinkId or o["orderLinkId"] == orderLinkId)
+        ]
+        return _ok({"category": category, "list": items[:limit], "nextPageCursor": ""})
+
+    def get_executions(self, symbol: str = "", limit: int = 50, **_) -> dict:
+        items = [e for e in self.executions if not symbol or e["symbol"] == symbol]
+        return _ok({"list": list(reversed(items))[:limit]})
+
+    def get_wallet_balance(self, **_) -> dict:
+        return _ok({"list": [{"totalEquity": str(self.equity())}]})
+
+
+def resample(candles: Sequence[Sequence[float]], interval: int) -> Sequence[List[float]]:
+    """Aggregate chronological candles into ``interval``-minute bars.
+
+    A ``CandleSeries`` is aggregated column-wise and stays a ``CandleSeries``.
+    """
+
+    length = interval * 60_000
+    if isinstance(candles, CandleSeries):
+        return _resample_series(candles, length)
+    out: List[List[float]] = []
+    for ts, o, h, lo, c, v in (c[:6] for c in candles):
+        start = int(ts) // length * length
+        if out and out[-1][0] == start:
+            bar = out[-1]
+            bar[2] = max(bar[2], h)
+            bar[3] = min(bar[3], lo)
+            bar[4] = c
+            bar[5] += v
+        else:
+            out.append([start, o, h, lo, c, v])
+    return out
+
+
+def _resample_series(series: CandleSeries, length: int) -> CandleSeries:
+    if not len(series):
+        return series
+    buckets = series.ts // length * length
+    first = np.flatnonzero(np.append(True, buckets[1:] != buckets[:-1]))
+    last = np.append(first[1:], len(series)) - 1
+    return CandleSeries(
+        np.vstack(
+            [
+                buckets[first],
+                series.open[first],
+                np.maximum.reduceat(series.high, first),
+                np.minimum.reduceat(series.low, first),
+                series.close[last],
+                np.add.reduceat(series.volume, first),
+            ]
+        )
+    )
+
+
+def load_history(
+    directory: str | Path,
+    symbols: Iterable[str] = BybitTradingBot.ALLOWED_SYMBOLS,
+    intervals: Iterable[int] = (5, 240),
+    base_interval: int = 5,
+) -> History:
+    """Load ``<symbol>_<interval>.json`` files written by ``cache_candles``.
+
+    Missing higher intervals are resampled from the ``base_interval`` file.
+    """
+
+    path = Path(directory)
+    history: History = {}
+    for symbol in symbols:
+        base_file = path / f"{symbol}_{base_interval}.json"
+        if not base_file.exists():
+            continue
+        with base_file.open("r", encoding="utf-8") as f:
+            base = [list(map(float, c[:6])) for c in json.load(f)]
+        for interval in intervals:
+            file_path = path / f"{symbol}_{interval}.json"
+            if interval == base_interval:
+                history[(symbol, interval)] = base
+            elif file_path.exists():
+                with file_path.open("r", encoding="utf-8") as f:
+                    history[(symbol, interval)] = [list(map(float, c[:6])) for c in json.load(f)]
+            else:
+                history[(symbol, interval)] = resample(base, interval)
+    return history
+
+
+def load_store_history(
+    store: CandleStore,
+    symbols: Iterable[str] = BybitTradingBot.ALLOWED_SYMBOLS,
+    intervals: Iterable[int] = (5, 240),
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    base_interval: int = 5,
+) -> History:
+    """Load history for ``start <= ts <= end`` from a ``CandleStore``.
+
+    Candles are ``CandleSeries`` copied column-wise from the memmap. Intervals
+    missing from the store are resampled from ``base_interval``.
+    """
+
+    history: History = {}
+    for symbol in symbols:
+        base = store.series(symbol, base_interval, start, end)
+        if not len(base):
+            continue
+        for interval in intervals:
+            if interval == base_interval:
+                history[(symbol, interval)] = base
+                continue
+            series = store.series(symbol, interval, start, end)
+            history[(symbol, interval)] = series if len(series) else resample(base, interval)
+    return history
+
+
+def _max_drawdown(equity: Sequence[float]) -> float:
+    peak = equity[0] if equity else 0.0
+    worst = 0.0
+    for value in equity:
+        peak = max(peak, value)
+        if peak > 0:
+            worst = max(worst, (peak - value) / peak * 100)
+    return worst
+
+
+def run_backtest(
+    history: History,
+    amount: float = 100,
+    leverage: int = 10,
+    start_cash: float = 10000.0,
+    base_interval: int = 5,
+    warmup: int = 50,
+    strategies: Optional[Callable[[BybitTradingBot], List[Callable]]] = None,
+    session_kwargs: Optional[dict] = None,
+) -> dict:
+    """Replay ``history`` through ``BybitTradingBot`` and report results.
+
+    Returns ``pnl``, ``max_drawdown`` (percent), ``orders`` and ``executions``
+    in the same spirit as ``stress_tests.run_crash_scenario``. Strategies read
+    candles and prices through ``SimulatedMarket``. A ``ValueError`` from a
+    strategy (e.g. a rejected order) does not stop the replay; such errors,
+    and the failures a ``StrategyRunner`` catches itself (its ``errors``),
+    are counted in ``strategy_errors`` and reported in one warning. The
+    ``"bot"`` and ``"strategies"`` loggers are muted below ERROR and
+    CRITICAL respectively while the replay runs.
+    """
+
+    session = SimulatedSession(
+        history, base_interval=base_interval, start_cash=start_cash, **(session_kwargs or {})
+    )
+    bot = BybitTradingBot(session, market=SimulatedMarket(session))
+    # Expire cached klines on simulated bar closes rather than wall time
+    bot.klines = KlineSnapshot(clock=lambda: session.now / 1000)
+    symbols = [s for s in bot.ALLOWED_SYMBOLS if (s, base_interval) in history]
+    funcs = (strategies or (lambda b: default_strategies(b, amount, leverage)))(bot)
+    step = base_interval * 60_000
+    starts = [session._series[(s, base_interval)].starts[warmup - 1 :] for s in symbols]
+    timeline = (np.unique(np.concatenate(starts)).astype(np.int64) + step).tolist() if starts else []
+    equity: List[float] = [start_cash]
+    errors = 0
+    # per-call logging would dominate the replay; failures are counted below
+    muted = {"bot": logging.ERROR, "strategies": logging.CRITICAL}
+    levels = {name: logging.getLogger(name).level for name in muted}
+    for name, level in muted.items():
+        logging.getLogger(name).setLevel(level)
+    try:
+        with bot.kline_snapshot():
+            for now in timeline:
+                session.advance(now)
+                for symbol in symbols:
+                    if symbol not in session.bars:
+                        continue
+                    for func in funcs:
+                        try:
+                            func(symbol)
+                        except ValueError as exc:
+                            errors += 1
+                            logger.debug("%s: strategy failed at %d: %s", symbol, now, exc)
+                equity.append(session.equity())
+    finally:
+        for name, level in levels.items():
+            logging.getLogger(name).setLevel(level)
+    errors += sum(getattr(func, "errors", 0) for func in funcs)
+    if errors:
+        logger.warning("%d strategy calls failed during the backtest", errors)
+    return {
+        "pnl": equity[-1] - start_cash,
+        "max_drawdown": _max_drawdown(equity),
+        "orders": session.orders,
+        "executions": session.executions,
+        "open_positions": session.positions,
+        "kline_hits": bot.klines.hits,
+        "kline_misses": bot.klines.misses,
+        "strategy_errors": errors,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Replay recorded klines through the bot")
+    parser.add_argument("directory", help="Directory with <symbol>_<interval>.json or .bin candle files")
+    parser.add_argument("--symbols", nargs="*", default=BybitTradingBot.ALLOWED_SYMBOLS)
+    args = parser.parse_args()
+
+    history = load_store_history(CandleStore(args.directory), args.symbols)
+    res = run_backtest(history or load_history(args.directory, args.symbols))
+    print(f"P&L: {res['pnl']:.2f}")
+    print(f"Max drawdown: {res['max_drawdown']:.2f}%")
+    print(f"Orders: {len(res['orders'])}")
+    for o in res["orders"]:
+        print(o)
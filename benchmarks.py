@@ -0,0 +1,236 @@
+"""Performance baselines for the strategy, indicator and order hot paths.
+
+Every case is timed with ``timeit`` on synthetic candles of several sizes:
+the ``functions.py`` strategies and ``_atr_from_candles``, the four 5-minute
+strategies on plain candles and on one shared ``IndicatorContext``, parsing
+a ``get_kline`` response to lists and to a ``CandleSeries`` (with the bytes
+each result retains), ``BybitTradingBot._format_qty``/``_format_price``, one ``trade_strategy``
+call against an in-memory session and a full ``polling_cycle`` — the body of
+``main``'s loop — over all symbols. Results are written as JSON; comparing
+with a previous file flags cases that got slower than ``threshold``::
+
+    python benchmarks.py --out bench.json
+    python benchmarks.py --out new.json --compare bench.json --threshold 0.2
+"""
+
+from __future__ import annotations
+
+import json
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Sequence
+
+import functions
+from bot import BybitTradingBot, default_strategies, polling_cycle
+from candle_series import CandleSeries
+from candle_store import CandleStore
+
+__all__ = ["synthetic_candles", "measure", "retained_bytes", "run_suite", "compare"]
+
+SIZES = (50, 200, 1000)
+STRATEGIES = ("sma_crossover", "breakout", "mean_reversion", "rsi_strategy")
+
+
+def synthetic_candles(n: int, seed: int = 0, start: float = 100.0, step_ms: int = 300_000) -> List[List[float]]:
+    """Random-walk ``[ts, open, high, low, close, volume]`` candles."""
+
+    rng = random.Random(seed)
+    price = start
+    candles = []
+    for i in range(n):
+        open_ = price
+        price *= 1 + rng.gauss(0, 0.004)
+        high = max(open_, price) * (1 + abs(rng.gauss(0, 0.001)))
+        low = min(open_, price) * (1 - abs(rng.gauss(0, 0.001)))
+        candles.append([float(i * step_ms), open_, high, low, price, rng.uniform(1, 10)])
+    return candles
+
+
+class BenchSession:
+    """In-memory stand-in for pybit ``HTTP`` with just enough endpoints."""
+
+    def __init__(self, candles: Dict[int, List[List[float]]]):
+        self._rows = {
+            interval: [[str(x) for x in c] for c in reversed(rows)] for interval, rows in candles.items()
+        }
+        self._price = str(candles[5][-1][4])
+
+    def get_kline(self, interval=5, limit: int = 200, **_) -> dict:
+        return {"result": {"list": self._rows[int(interval)][:limit]}}
+
+    def get_tickers(self, **_) -> dict:
+        return {"result": {"list": [{"lastPrice": self._price}]}}
+
+    def get_instruments_info(self, symbol: str = "", **_) -> dict:
+        return {
+            "result": {
+                "list": [
+                    {
+                        "symbol": symbol,
+                        "lotSizeFilter": {"qtyStep": "0.001", "minOrderQty": "0.001"},
+                        "priceFilter": {"tickSize": "0.01"},
+                    }
+                ]
+            }
+        }
+
+    def set_leverage(self, **_) -> dict:
+        return {"retCode": 0}
+
+    def place_order(self, **_) -> dict:
+        return {"retCode": 0, "result": {"orderId": "bench"}}
+
+
+def measure(func: Callable[[], object], repeat: int = 5, min_time: float = 0.05) -> dict:
+    """Time ``func`` and return per-call seconds (best/median) and loop size."""
+
+    timer = timeit.Timer(func)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time / 10:
+            break
+        number *= 4
+    number = max(1, int(number * min_time / elapsed))
+    runs = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return {"best": min(runs), "median": statistics.median(runs), "number": number}
+
+
+def retained_bytes(func: Callable[[], object]) -> int:
+    """Bytes still allocated for the object ``func`` returns."""
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = func()
+        size = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del result
+    return size
+
+
+def _kline_rows(candles: List[List[float]]) -> List[List[str]]:
+    """``candles`` as a ``get_kline`` list: newest first, strings, with turnover."""
+
+    return [[str(x) for x in c] + [str(c[4] * c[5])] for c in reversed(candles)]
+
+
+def _bot(size: int) -> BybitTradingBot:
+    candles = {5: synthetic_candles(max(size, 50), seed=1), 240: synthetic_candles(max(size, 200), seed=2)}
+    return BybitTradingBot(BenchSession(candles))
+
+
+def run_suite(sizes: Sequence[int] = SIZES, repeat: int = 5, min_time: float = 0.05) -> dict:
+    """Run every case and return ``{"meta": ..., "results": {name: timing}}``."""
+
+    results: Dict[str, dict] = {}
+
+    def case(name: str, func: Callable[[], object]) -> None:
+        results[name] = measure(func, repeat, min_time)
+
+    for size in sizes:
+        candles = synthetic_candles(size)
+        for name in STRATEGIES:
+            strategy = getattr(functions, name)
+            case(f"{name}[{size}]", lambda s=strategy: s(candles))
+        case(f"_atr_from_candles[{size}]", lambda: functions._atr_from_candles(candles))
+        rows = _kline_rows(candles)
+        parsers = {
+            "parse_lists": lambda: [list(map(float, c[:6])) for c in reversed(rows)],
+            "parse_series": lambda: CandleSeries.from_bybit(rows),
+        }
+        for name, parse in parsers.items():
+            case(f"{name}[{size}]", parse)
+            results[f"{name}[{size}]"]["bytes"] = retained_bytes(parse)
+        funcs = [getattr(functions, name) for name in STRATEGIES]
+        case(f"strategies_plain[{size}]", lambda: [f(candles) for f in funcs])
+        # a fresh context per call: the cost of one bar for all four
+        case(
+            f"strategies_shared[{size}]",
+            lambda: [f(c) for c in [functions.IndicatorContext(candles)] for f in funcs],
+        )
+        if size >= 200:
+            case(f"half_year_strategy[{size}]", lambda: functions.half_year_strategy(candles))
+
+    bot = _bot(50)
+    bot.instruments.get("BTCUSDT")
+    case("_format_qty", lambda: bot._format_qty("BTCUSDT", 0.0123456))
+    case("_format_price", lambda: bot._format_price("BTCUSDT", 67123.456789))
+    case(
+        "trade_strategy",
+        lambda: bot.trade_strategy("BTCUSDT", 100, 10, functions.sma_crossover),
+    )
+
+    cycle_bot = _bot(200)
+    strategies = default_strategies(cycle_bot)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = CandleStore(tmp)
+        case("polling_cycle", lambda: polling_cycle(cycle_bot, strategies, store, max_workers=1))
+
+    return {
+        "meta": {
+            "time": time.time(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "sizes": list(sizes),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.2) -> List[dict]:
+    """Return cases whose best time grew by more than ``threshold`` (0.2 = 20 %)."""
+
+    regressions = []
+    for name, now in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before or before["best"] <= 0:
+            continue
+        ratio = now["best"] / before["best"]
+        if ratio > 1 + threshold:
+            regressions.append({"name": name, "before": before["best"], "after": now["best"], "ratio": ratio})
+    return sorted(regressions, key=lambda r: r["ratio"], reverse=True)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    import argparse
+    import logging
+
+    parser = argparse.ArgumentParser(description="Benchmark strategy and order hot paths")
+    parser.add_argument("--out", default="bench.json", help="Where to write results")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--sizes", type=int, nargs="*", default=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    bot_logger = logging.getLogger("bot")
+    level = bot_logger.level
+    bot_logger.setLevel(logging.ERROR)
+    try:
+        report = run_suite(args.sizes, args.repeat)
+    finally:
+        bot_logger.setLevel(level)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    for name, timing in report["results"].items():
+        size = f" {timing['bytes']:10d} B" if "bytes" in timing else ""
+        print(f"{name:32s} {timing['best'] * 1e6:12.1f} us{size}")
+    if not args.compare:
+        return 0
+    with open(args.compare, "r", encoding="utf-8") as f:
+        regressions = compare(json.load(f), report, args.threshold)
+    for r in regressions:
+        print(f"REGRESSION {r['name']}: {r['before'] * 1e6:.1f} -> {r['after'] * 1e6:.1f} us (x{r['ratio']:.2f})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,39 +1,234 @@
 from config import BybitConfig
-from pybit.unified_trading import HTTP
+from pybit.unified_trading import HTTP, WebSocket
 import urllib3
+import atexit
+import json
 import logging
+from logging.handlers import (
+    QueueHandler,
+    QueueListener,
+    RotatingFileHandler,
+    TimedRotatingFileHandler,
+)
+import queue
 from pathlib import Path
-from typing import Optional, Callable
-from functools import lru_cache
+from typing import Optional, Callable, Iterable, Iterator, Sequence
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+import threading
 from decimal import Decimal, ROUND_HALF_UP
 import time
+import uuid
 
-from functions import (
-    sma_crossover,
-    breakout,
-    mean_reversion,
-    rsi_strategy,
-    half_year_strategy,
-    apply_sl_tp_bounds,
-)
+import numpy as np
+
+from candle_series import CandleSeries
+from candle_store import CandleStore
+from instruments import InstrumentRegistry
+from market_stream import MarketStream
+from journal import DecisionJournal
+from metrics import InstrumentedSession, MetricsExporter, MetricsRegistry
+from resilience import ResilientSession, error_code, not_executed
+from scheduler import ScheduledSession
+from position_manager import PositionManager
+from state import OPEN_STATUSES, AccountState
+from strategies import REGISTRY, StrategyRunner
+from functions import IndicatorCache, IndicatorContext, half_year_strategy, apply_sl_tp_bounds
 
 
 logger = logging.getLogger(__name__)
 
 
-def setup_logging(log_file: str | Path = "trade_log.txt") -> None:
-    """Configure logging to console and append to a text file."""
+class JsonLinesFormatter(logging.Formatter):
+    """Format event records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {"ts": round(record.created, 3), "event": record.getMessage()}
+        payload.update(getattr(record, "fields", {}))
+        return json.dumps(payload, default=str)
+
+
+events_logger = logging.getLogger("bot.events")
+events_logger.propagate = False
+# silent until ``setup_logging`` is given an ``events_file``
+events_logger.setLevel(logging.CRITICAL + 1)
+
+
+def log_event(event: str, **fields) -> None:
+    """Emit a structured trade/decision event to the JSON lines stream."""
+    if events_logger.isEnabledFor(logging.INFO):
+        events_logger.info(event, extra={"fields": fields})
+
+
+class _QueueHandler(QueueHandler):
+    """``QueueHandler`` that leaves formatting to the listener thread.
+
+    The stock ``prepare`` merges ``args`` and renders tracebacks on the
+    calling thread so records can be pickled; these queues never leave the
+    process, so records are enqueued as they are.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class _QueueListener(QueueListener):
+    """``QueueListener`` whose ``stop`` may be called more than once."""
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            super().stop()
+
+
+def _file_handler(
+    path: Path, max_bytes: int, when: Optional[str], backup_count: int
+) -> logging.Handler:
+    if max_bytes:
+        return RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+        )
+    if when:
+        return TimedRotatingFileHandler(
+            path, when=when, backupCount=backup_count, encoding="utf-8"
+        )
+    return logging.FileHandler(path, mode="a", encoding="utf-8")
+
+
+def setup_logging(
+    log_file: str | Path = "trade_log.txt",
+    async_mode: bool = False,
+    max_bytes: int = 0,
+    when: Optional[str] = None,
+    backup_count: int = 5,
+    events_file: str | Path | None = None,
+) -> list[QueueListener]:
+    """Configure logging to console and append to a text file.
+
+    ``max_bytes`` or ``when`` (e.g. ``"midnight"``) enable rotation. With
+    ``async_mode`` the calling threads only enqueue records and
+    ``QueueListener`` threads do the formatting, message arguments
+    included, and the disk writes; the listeners are returned and stopped
+    at interpreter exit. ``events_file``
+    receives the ``log_event`` stream as JSON lines.
+    """
     log_path = Path(log_file)
     log_path.parent.mkdir(parents=True, exist_ok=True)
+    handlers: list[logging.Handler] = [
+        logging.StreamHandler(),
+        _file_handler(log_path, max_bytes, when, backup_count),
+    ]
+    formatter = logging.Formatter(
+        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    for handler in events_logger.handlers[:]:
+        events_logger.removeHandler(handler)
+        handler.close()
+    event_handlers: list[logging.Handler] = []
+    if events_file is not None:
+        events_path = Path(events_file)
+        events_path.parent.mkdir(parents=True, exist_ok=True)
+        event_handler = _file_handler(events_path, max_bytes, when, backup_count)
+        event_handler.setFormatter(JsonLinesFormatter())
+        event_handlers.append(event_handler)
+    events_logger.setLevel(logging.INFO if event_handlers else logging.CRITICAL + 1)
+
+    if not async_mode:
+        logging.basicConfig(level=logging.INFO, handlers=handlers, force=True)
+        for handler in event_handlers:
+            events_logger.addHandler(handler)
+        return []
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
     logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.StreamHandler(),
-            logging.FileHandler(log_path, mode="a", encoding="utf-8"),
-        ],
-        force=True,
+        level=logging.INFO, handlers=[_QueueHandler(log_queue)], force=True
     )
+    listeners = [_QueueListener(log_queue, *handlers, respect_handler_level=True)]
+    if event_handlers:
+        events_queue: queue.SimpleQueue = queue.SimpleQueue()
+        events_logger.addHandler(_QueueHandler(events_queue))
+        listeners.append(_QueueListener(events_queue, *event_handlers))
+    for listener in listeners:
+        listener.start()
+        atexit.register(listener.stop)
+    return listeners
+
+
+# most candles one ``get_kline`` request returns
+KLINE_LIMIT = 1000
+
+
+def _interval_seconds(interval: int | str) -> int:
+    """Return the bar length in seconds for a Bybit kline ``interval``."""
+    if interval == "D":
+        return 86400
+    if interval == "W":
+        return 7 * 86400
+    if interval == "M":
+        return 30 * 86400
+    return int(interval) * 60
+
+
+class KlineSnapshot:
+    """Cache of parsed candles shared by all signal methods during one cycle.
+
+    Entries are keyed by ``(symbol, interval)`` and keep the longest window
+    fetched so far, so shorter requests are served by slicing. Each entry
+    expires when the current bar closes because the newest candle changes
+    from that point on. ``hits`` and ``misses`` count served and fetched
+    requests across cycles.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self._clock = clock
+        self._entries: dict[tuple[str, int | str], tuple[float, list]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, symbol: str, interval: int | str, limit: int) -> Optional[list]:
+        """Return the newest ``limit`` candles or ``None`` when not cached."""
+        with self._lock:
+            entry = self._entries.get((symbol, interval))
+            if entry is not None:
+                expires, candles = entry
+                if self._clock() < expires and len(candles) >= limit:
+                    self.hits += 1
+                    return candles[-limit:]
+            self.misses += 1
+        return None
+
+    def put(self, symbol: str, interval: int | str, candles: list) -> None:
+        """Store chronological ``candles`` until the current bar closes."""
+        length = _interval_seconds(interval)
+        expires = (self._clock() // length + 1) * length
+        with self._lock:
+            self._entries[(symbol, interval)] = (expires, candles)
+
+    def entries(self) -> list[tuple[str, int | str, list]]:
+        """Return ``(symbol, interval, candles)`` for every cached window."""
+        with self._lock:
+            return [
+                (symbol, interval, candles)
+                for (symbol, interval), (_expires, candles) in self._entries.items()
+            ]
+
+    def clear(self) -> None:
+        """Drop cached candles while keeping hit/miss counters."""
+        with self._lock:
+            self._entries.clear()
+
+
+def _unfilled_and_closed(order: dict) -> bool:
+    """True for an order that is no longer working and never traded."""
+    status = order.get("orderStatus", "New")
+    return status not in OPEN_STATUSES and float(order.get("cumExecQty") or 0) == 0
+
+
+class EntryRejected(ValueError):
+    """An entry was refused because of positions already held."""
 
 
 class BybitTradingBot:
@@ -47,9 +242,87 @@ class BybitTradingBot:
         "DOGEUSDT",
         "BNBUSDT",
     ]
+    # maximum number of orders per ``place_batch_order`` request
+    BATCH_LIMIT = 10
+    # positions held at once when an ``AccountState`` is attached
+    MAX_OPEN_POSITIONS = 3
 
-    def __init__(self, session: HTTP):
+    def __init__(
+        self,
+        session: HTTP,
+        market: Optional[MarketStream] = None,
+        instruments: Optional[InstrumentRegistry] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        journal: Optional[DecisionJournal] = None,
+        state: Optional[AccountState] = None,
+    ):
+        self.metrics = metrics or MetricsRegistry()
+        self.journal = journal
+        self.state = state
+        if not isinstance(session, InstrumentedSession):
+            session = InstrumentedSession(session, self.metrics)
         self.session = session
+        self.market = market
+        self.instruments = instruments or InstrumentRegistry(session)
+        self.klines = KlineSnapshot()
+        self.indicators = IndicatorCache()
+        self._snapshot_active = False
+        self._leverage: dict[str, int] = {}
+        self._leverage_lock = threading.Lock()
+        self.leverage_calls_skipped = 0
+
+    @contextmanager
+    def kline_snapshot(self) -> Iterator[KlineSnapshot]:
+        """Serve every kline request inside the block from one fetch.
+
+        The snapshot is cleared on entry so each trading cycle starts with
+        fresh data; outside the block every call hits the API as before.
+        """
+        self.klines.clear()
+        self._snapshot_active = True
+        try:
+            yield self.klines
+        finally:
+            self._snapshot_active = False
+            self.klines.clear()
+
+    def _get_candles(
+        self, symbol: str, interval: int | str = 5, limit: int = 50
+    ) -> Sequence[Sequence[float]]:
+        """Return up to ``limit`` chronological ``[ts, o, h, l, c, v]`` candles.
+
+        REST responses are parsed into a ``CandleSeries``; streamed candles
+        are plain lists. Both index as rows.
+        """
+        if self.market is not None:
+            streamed = self.market.candles(symbol, interval, limit)
+            if streamed is not None:
+                return streamed
+        if self._snapshot_active:
+            cached = self.klines.get(symbol, interval, limit)
+            if cached is not None:
+                return cached
+        result = self.session.get_kline(
+            category="linear", symbol=symbol, interval=interval, limit=limit
+        )
+        raw = result.get("result", {}).get("list", [])
+        # Bybit returns newest first; from_bybit reverses to chronological order
+        candles = CandleSeries.from_bybit(raw)
+        if self._snapshot_active and candles:
+            self.klines.put(symbol, interval, candles)
+        return candles
+
+    def _context(
+        self, symbol: str, interval: int | str = 5, limit: int = 50
+    ) -> IndicatorContext:
+        """Return the newest ``limit`` candles with memoized indicators.
+
+        Every reader of the same bar shares one context, so closes and ATR
+        are converted and computed once per bar instead of once per call.
+        """
+        return self.indicators.context(
+            symbol, interval, self._get_candles(symbol, interval, limit)
+        )
 
     def _validate(self, symbol: str, amount: float, leverage: int) -> None:
         if symbol not in self.ALLOWED_SYMBOLS:
@@ -64,6 +337,10 @@ class BybitTradingBot:
 
     def _last_price(self, symbol: str) -> float:
         """Return last traded price for ``symbol``."""
+        if self.market is not None:
+            streamed = self.market.last_price(symbol)
+            if streamed is not None:
+                return streamed
         result = self.session.get_tickers(category="linear", symbol=symbol)
         price = (
             result.get("result", {})
@@ -74,45 +351,65 @@ class BybitTradingBot:
             raise ValueError(f"No price data for {symbol}")
         return float(price)
 
-    @lru_cache(maxsize=None)
     def _instrument_info(self, symbol: str) -> dict:
         """Return instrument info used for lot and price steps."""
-        result = self.session.get_instruments_info(
-            category="linear", symbol=symbol
-        )
-        return result.get("result", {}).get("list", [{}])[0]
+        return self.instruments.get(symbol).info
 
     def _lot_step(self, symbol: str) -> tuple[float, float]:
         """Return quantity step and minimum order size for symbol."""
-        info = self._instrument_info(symbol).get("lotSizeFilter", {})
-        step = float(info.get("qtyStep", 1))
-        min_qty = float(info.get("minOrderQty", step))
-        return step, min_qty
+        instrument = self.instruments.get(symbol)
+        return instrument.qty_step, instrument.min_qty
 
     def _price_tick(self, symbol: str) -> float:
         """Return price tick size for ``symbol``."""
-        info = self._instrument_info(symbol).get("priceFilter", {})
-        return float(info.get("tickSize", 0.01))
+        return self.instruments.get(symbol).tick
 
     def _format_qty(self, symbol: str, qty: float) -> float:
         """Round quantity to exchange step size."""
-        step, min_qty = self._lot_step(symbol)
-        d_step = Decimal(str(step))
+        instrument = self.instruments.get(symbol)
+        d_step = instrument.d_qty_step
         d_qty = Decimal(str(qty))
-        d_min = Decimal(str(min_qty))
         adjusted = (d_qty // d_step) * d_step
-        if adjusted < d_min:
-            adjusted = d_min
+        if adjusted < instrument.d_min_qty:
+            adjusted = instrument.d_min_qty
         return float(adjusted)
 
     def _format_price(self, symbol: str, price: float) -> float:
         """Round ``price`` to the instrument's tick size."""
-        tick = Decimal(str(self._price_tick(symbol)))
+        tick = self.instruments.get(symbol).d_tick
         d_price = Decimal(str(price))
         return float((d_price / tick).quantize(Decimal("1"), rounding=ROUND_HALF_UP) * tick)
 
+    def sync_leverage(self) -> dict[str, int]:
+        """Seed the known leverage of every symbol from open USDT positions."""
+        if self.state is not None and self.state.seeded:
+            known = self.state.leverages()
+            with self._leverage_lock:
+                self._leverage.update(known)
+            return known
+        known = {}
+        cursor = ""
+        while True:
+            params = {"category": "linear", "settleCoin": "USDT", "limit": 200}
+            if cursor:
+                params["cursor"] = cursor
+            result = self.session.get_positions(**params).get("result", {})
+            for pos in result.get("list", []):
+                if pos.get("symbol") and pos.get("leverage"):
+                    known[pos["symbol"]] = int(float(pos["leverage"]))
+            cursor = result.get("nextPageCursor", "")
+            if not cursor:
+                break
+        with self._leverage_lock:
+            self._leverage.update(known)
+        return known
+
     def _set_leverage(self, symbol: str, leverage: int) -> None:
-        """Safely set leverage ignoring non-modification errors."""
+        """Set leverage unless it is already known to be ``leverage``."""
+        with self._leverage_lock:
+            if self._leverage.get(symbol) == leverage:
+                self.leverage_calls_skipped += 1
+                return
         try:
             self.session.set_leverage(
                 category="linear",
@@ -122,28 +419,22 @@ class BybitTradingBot:
             )
         except Exception as exc:  # pragma: no cover - network errors
             msg = str(exc)
-            if "110043" in msg or "leverage not modified" in msg.lower():
-                logger.info(f"{symbol}: leverage already set to {leverage}")
+            # pybit errors carry the retCode; other sessions only the message
+            if error_code(exc) == 110043 or "110043" in msg or "leverage not modified" in msg.lower():
+                logger.info("%s: leverage already set to %s", symbol, leverage)
             else:
+                with self._leverage_lock:
+                    self._leverage.pop(symbol, None)
                 raise
+        with self._leverage_lock:
+            self._leverage[symbol] = leverage
 
     def _atr(self, symbol: str, period: int = 14) -> float:
         """Calculate Average True Range for ``symbol`` on 5‑minute candles."""
-        result = self.session.get_kline(
-            category="linear", symbol=symbol, interval=5, limit=period + 1
-        )
-        candles = result.get("result", {}).get("list", [])
+        candles = self._context(symbol, 5, period + 1)
         if len(candles) < period + 1:
             raise ValueError(f"No kline data for {symbol}")
-        # Bybit returns newest first; reverse to chronological order
-        candles = [list(map(float, c[1:5])) for c in reversed(candles)]
-        trs = []
-        for i in range(1, len(candles)):
-            prev_close = candles[i - 1][3]
-            _open, high, low, close = candles[i]
-            tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
-            trs.append(tr)
-        return sum(trs) / period
+        return candles.atr(period)
 
     def _calculate_sl_tp(
         self, symbol: str, side: str, price: float
@@ -165,6 +456,41 @@ class BybitTradingBot:
         stop, take = apply_sl_tp_bounds(price, side, stop, take)
         return stop, take
 
+    def _order_request(
+        self,
+        symbol: str,
+        side: str,
+        amount: float,
+        leverage: int,
+        stop_loss: float,
+        take_profit: float,
+        price: float,
+    ) -> dict:
+        """Check SL/TP against ``price`` and return formatted order parameters."""
+        stop_loss = self._format_price(symbol, stop_loss)
+        take_profit = self._format_price(symbol, take_profit)
+        if side == "Buy" and not (stop_loss < price < take_profit):
+            raise ValueError("Invalid SL/TP levels")
+        if side == "Sell" and not (take_profit < price < stop_loss):
+            raise ValueError("Invalid SL/TP levels")
+        qty = self._format_qty(symbol, amount * leverage / price)
+        logger.info(
+            "%s: place %s qty=%s price=%.2f SL=%.2f TP=%.2f lev=%s",
+            symbol, side, qty, price, stop_loss, take_profit, leverage,
+        )
+        return {
+            "symbol": symbol,
+            "side": side,
+            "orderType": "Market",
+            "qty": str(qty),
+            "timeInForce": "ImmediateOrCancel",
+            "stopLoss": str(stop_loss),
+            "takeProfit": str(take_profit),
+            "tpslMode": "Partial",
+            # lets a retried request be recognised as the same order
+            "orderLinkId": uuid.uuid4().hex,
+        }
+
     def place_order(
         self,
         symbol: str,
@@ -186,28 +512,181 @@ class BybitTradingBot:
             raise ValueError("Stop loss and take profit required")
         self._validate(symbol, amount, leverage)
         price = self._last_price(symbol) if price is None else price
-        stop_loss = self._format_price(symbol, stop_loss)
-        take_profit = self._format_price(symbol, take_profit)
-        if side == "Buy" and not (stop_loss < price < take_profit):
-            raise ValueError("Invalid SL/TP levels")
-        if side == "Sell" and not (take_profit < price < stop_loss):
-            raise ValueError("Invalid SL/TP levels")
-        qty = self._format_qty(symbol, amount * leverage / price)
-        logger.info(
-            f"{symbol}: place {side} qty={qty} price={price:.2f} SL={stop_loss:.2f} TP={take_profit:.2f} lev={leverage}"
+        request = self._order_request(
+            symbol, side, amount, leverage, stop_loss, take_profit, price
         )
         self._set_leverage(symbol, leverage)
-        return self.session.place_order(
-            category="linear",
+        response = self.session.place_order(category="linear", **request)
+        log_event(
+            "order",
             symbol=symbol,
             side=side,
-            orderType="Market",
-            qty=str(qty),
-            timeInForce="ImmediateOrCancel",
-            stopLoss=str(stop_loss),
-            takeProfit=str(take_profit),
-            tpslMode="Partial",
+            qty=request["qty"],
+            price=price,
+            stop_loss=request["stopLoss"],
+            take_profit=request["takeProfit"],
+            leverage=leverage,
+            order_id=response.get("result", {}).get("orderId"),
         )
+        return response
+
+    def _last_prices(self, symbols: Iterable[str]) -> dict[str, float]:
+        """Return last prices of ``symbols`` using one bulk ticker request."""
+        prices: dict[str, float] = {}
+        if self.market is not None:
+            for symbol in symbols:
+                streamed = self.market.last_price(symbol)
+                if streamed is not None:
+                    prices[symbol] = streamed
+        if set(symbols) - set(prices):
+            result = self.session.get_tickers(category="linear")
+            for item in result.get("result", {}).get("list", []):
+                if item.get("symbol") in symbols and item.get("lastPrice") is not None:
+                    prices.setdefault(item["symbol"], float(item["lastPrice"]))
+        return prices
+
+    def place_orders(self, intents: Iterable[dict]) -> list[dict]:
+        """Submit several entries through Bybit's batch order endpoint.
+
+        Each intent holds the ``place_order`` arguments by name (``symbol``,
+        ``side``, ``amount``, ``leverage``, ``stop_loss``, ``take_profit`` and
+        optionally ``price``). Orders are sent in chunks of ``BATCH_LIMIT``.
+        One result per intent is returned in the same order, either
+        ``{"symbol", "ok": True, "orderId", "orderLinkId"}`` or
+        ``{"symbol", "ok": False, "error"}``; a failing intent or chunk does
+        not stop the others. When a chunk fails without proof that it was not
+        executed (e.g. a timeout), its orders are looked up by
+        ``orderLinkId``; those not found keep their entry reservation.
+        """
+        intents = list(intents)
+        results: list[dict] = [{} for _ in intents]
+        missing = [i["symbol"] for i in intents if i.get("price") is None]
+        try:
+            prices = self._last_prices(missing) if missing else {}
+        except Exception as exc:
+            logger.error("Failed to fetch prices for batch: %s", exc)
+            prices = {}
+        pending: list[tuple[int, dict]] = []
+        for index, intent in enumerate(intents):
+            symbol = intent.get("symbol")
+            admitted = False
+            try:
+                if intent.get("stop_loss") is None or intent.get("take_profit") is None:
+                    raise ValueError("Stop loss and take profit required")
+                self._validate(symbol, intent["amount"], intent["leverage"])
+                price = intent.get("price")
+                if price is None:
+                    price = prices.get(symbol)
+                    if price is None:
+                        raise ValueError(f"No price data for {symbol}")
+                self._admit(symbol)
+                admitted = True
+                request = self._order_request(
+                    symbol,
+                    intent["side"],
+                    intent["amount"],
+                    intent["leverage"],
+                    intent["stop_loss"],
+                    intent["take_profit"],
+                    price,
+                )
+                self._set_leverage(symbol, intent["leverage"])
+            except Exception as exc:
+                if admitted:
+                    self._release(symbol)
+                results[index] = {"symbol": symbol, "ok": False, "error": str(exc)}
+                continue
+            pending.append((index, request))
+        for start in range(0, len(pending), self.BATCH_LIMIT):
+            chunk = pending[start : start + self.BATCH_LIMIT]
+            try:
+                response = self.session.place_batch_order(
+                    category="linear", request=[request for _, request in chunk]
+                )
+            except Exception as exc:
+                logger.error("Batch order failed: %s", exc)
+                unknown = not not_executed(exc)
+                for index, request in chunk:
+                    order = self._find_order(request["symbol"], request["orderLinkId"]) if unknown else None
+                    if order is not None and _unfilled_and_closed(order):
+                        # reached the exchange but died without a fill (IOC cancel, rejection)
+                        self._release(request["symbol"])
+                        results[index] = {
+                            "symbol": request["symbol"],
+                            "ok": False,
+                            "error": f"order {order.get('orderStatus')} without a fill",
+                        }
+                    elif order is not None:
+                        results[index] = self._batch_placed(request, order)
+                    elif unknown:
+                        # may still have executed: the reservation waits for
+                        # the private stream or pending_ttl
+                        results[index] = {
+                            "symbol": request["symbol"],
+                            "ok": False,
+                            "error": f"order outcome unknown: {exc}",
+                        }
+                    else:
+                        self._release(request["symbol"])
+                        results[index] = {"symbol": request["symbol"], "ok": False, "error": str(exc)}
+                continue
+            orders = response.get("result", {}).get("list", [])
+            statuses = response.get("retExtInfo", {}).get("list", [])
+            for pos, (index, request) in enumerate(chunk):
+                order = orders[pos] if pos < len(orders) else {}
+                status = statuses[pos] if pos < len(statuses) else {"code": 0}
+                if status.get("code", 0) == 0 and order.get("orderId"):
+                    results[index] = self._batch_placed(request, order)
+                else:
+                    self._release(request["symbol"])
+                    results[index] = {
+                        "symbol": request["symbol"],
+                        "ok": False,
+                        "error": status.get("msg", "order rejected"),
+                    }
+        return results
+
+    def _batch_placed(self, request: dict, order: dict) -> dict:
+        log_event(
+            "order",
+            symbol=request["symbol"],
+            side=request["side"],
+            qty=request["qty"],
+            stop_loss=request["stopLoss"],
+            take_profit=request["takeProfit"],
+            order_id=order["orderId"],
+            batch=True,
+        )
+        return {
+            "symbol": request["symbol"],
+            "ok": True,
+            "orderId": order["orderId"],
+            "orderLinkId": order.get("orderLinkId", request["orderLinkId"]),
+        }
+
+    def _find_order(self, symbol: str, link_id: str) -> Optional[dict]:
+        """Return the order sent with ``link_id``, filled or cancelled ones included."""
+        try:
+            result = self.session.get_order_history(
+                category="linear", symbol=symbol, orderLinkId=link_id
+            )
+        except Exception as exc:
+            logger.warning("%s: lookup of order %s failed: %s", symbol, link_id, exc)
+            return None
+        orders = result.get("result", {}).get("list", [])
+        return orders[0] if orders and orders[0].get("orderId") else None
+
+    def _admit(self, symbol: str) -> None:
+        """Reserve an entry slot on ``symbol`` in the account state, if any."""
+        if self.state is None:
+            return
+        reason = self.state.admit(symbol, self.MAX_OPEN_POSITIONS)
+        if reason is not None:
+            raise EntryRejected(f"{symbol}: {reason}")
+
+    def _release(self, symbol: str) -> None:
+        if self.state is not None:
+            self.state.release(symbol)
 
     def close_position(
         self, symbol: str, side: str, amount: float, leverage: int
@@ -225,39 +704,42 @@ class BybitTradingBot:
             qty=str(qty),
             timeInForce="ImmediateOrCancel",
             reduceOnly=True,
+            orderLinkId=uuid.uuid4().hex,
         )
 
     def log_market_trend(self, symbol: str) -> None:
         """Fetch last 50 five-minute candles and log price direction."""
-        result = self.session.get_kline(
-            category="linear", symbol=symbol, interval=5, limit=50
-        )
-        candles = result.get("result", {}).get("list", [])
+        candles = self._get_candles(symbol, 5, 50)
         if not candles:
-            logger.warning(f"No kline data for {symbol}")
+            logger.warning("No kline data for %s", symbol)
             return
-        closes = [float(c[4]) for c in reversed(candles)]
-        start, end = closes[0], closes[-1]
+        start, end = candles[0][4], candles[-1][4]
         if end > start:
             trend = "actively bought, price increases"
         elif end < start:
             trend = "actively sold, price decreases"
         else:
             trend = "stable, price unchanged"
-        logger.info(
-            f"{symbol}: {trend} (start={start:.2f}, end={end:.2f})"
-        )
+        logger.info("%s: %s (start=%.2f, end=%.2f)", symbol, trend, start, end)
 
-    def ma_crossover_signal(self, symbol: str) -> str:
-        """Return Buy/Sell/Hold using a 5/20 SMA crossover."""
-        result = self.session.get_kline(
-            category="linear", symbol=symbol, interval=5, limit=50
-        )
-        candles = result.get("result", {}).get("list", [])
+    def _window(
+        self, symbol: str, limit: int, candles: Optional[Sequence] = None
+    ) -> IndicatorContext:
+        """Newest ``limit`` 5m candles: a tail of ``candles`` or fetched."""
+        if candles is None:
+            return self._context(symbol, 5, limit)
+        return self.indicators.context(symbol, 5, candles).tail(limit)
+
+    def ma_crossover_signal(self, symbol: str, candles: Optional[Sequence] = None) -> str:
+        """Return Buy/Sell/Hold using a 5/20 SMA crossover.
+
+        ``candles`` (5m, oldest first) are used instead of fetching when given.
+        """
+        candles = self._window(symbol, 50, candles)
         if len(candles) < 20:
-            logger.warning(f"Not enough kline data for {symbol}")
+            logger.warning("Not enough kline data for %s", symbol)
             return "Hold"
-        closes = [float(c[4]) for c in reversed(candles)]
+        closes = candles.closes
         short_sma = sum(closes[-5:]) / 5
         long_sma = sum(closes[-20:]) / 20
         if short_sma > long_sma:
@@ -267,20 +749,19 @@ class BybitTradingBot:
         else:
             signal = "Hold"
         logger.info(
-            f"{symbol}: SMA5={short_sma:.2f} SMA20={long_sma:.2f} -> {signal}"
+            "%s: SMA5=%.2f SMA20=%.2f -> %s", symbol, short_sma, long_sma, signal
         )
         return signal
 
-    def rsi_signal(self, symbol: str, period: int = 14) -> str:
+    def rsi_signal(
+        self, symbol: str, period: int = 14, candles: Optional[Sequence] = None
+    ) -> str:
         """Return Buy/Sell/Hold based on RSI indicator."""
-        result = self.session.get_kline(
-            category="linear", symbol=symbol, interval=5, limit=period + 1
-        )
-        candles = result.get("result", {}).get("list", [])
+        candles = self._window(symbol, period + 1, candles)
         if len(candles) < period + 1:
-            logger.warning(f"Not enough kline data for {symbol}")
+            logger.warning("Not enough kline data for %s", symbol)
             return "Hold"
-        closes = [float(c[4]) for c in reversed(candles)]
+        closes = candles.closes
         gains = [max(closes[i] - closes[i - 1], 0) for i in range(1, len(closes))]
         losses = [max(closes[i - 1] - closes[i], 0) for i in range(1, len(closes))]
         avg_gain = sum(gains) / period
@@ -296,33 +777,132 @@ class BybitTradingBot:
             signal = "Sell"
         else:
             signal = "Hold"
-        logger.info(f"{symbol}: RSI={rsi:.2f} -> {signal}")
+        logger.info("%s: RSI=%.2f -> %s", symbol, rsi, signal)
         return signal
 
-    def combined_signal(self, symbol: str) -> tuple[str, str, str]:
-        """Return unified trade signal alongside MA and RSI signals."""
-        ma = self.ma_crossover_signal(symbol)
-        rsi = self.rsi_signal(symbol)
+    def combined_signal(
+        self, symbol: str, candles: Optional[Sequence] = None
+    ) -> tuple[str, str, str]:
+        """Return unified trade signal alongside MA and RSI signals.
+
+        Both signals read the same 5m ``candles`` when given, otherwise each
+        fetches its own window.
+        """
+        ma = self.ma_crossover_signal(symbol, candles)
+        rsi = self.rsi_signal(symbol, candles=candles)
         signal = ma if ma == rsi and ma != "Hold" else "Hold"
-        logger.info(f"{symbol}: signals MA={ma}, RSI={rsi} -> {signal}")
+        logger.info("%s: signals MA=%s, RSI=%s -> %s", symbol, ma, rsi, signal)
         return signal, ma, rsi
 
+    def _decision(
+        self,
+        symbol: str,
+        strategy: str,
+        interval: int,
+        signal: str,
+        started: float,
+        candles: Sequence[Sequence[float]],
+        **fields,
+    ) -> Optional[dict]:
+        """Start a journal record for a decision, or ``None`` without a journal."""
+        if self.journal is None:
+            return None
+        if isinstance(candles, IndicatorContext):
+            candles = candles.candles
+        return dict(
+            symbol=symbol,
+            strategy=strategy,
+            interval=interval,
+            candles=candles,
+            signal=signal,
+            decision_ms=(time.perf_counter() - started) * 1000,
+            **fields,
+        )
+
+    def _journal(self, decision: Optional[dict], started: float, **fields) -> None:
+        if decision is None:
+            return
+        try:
+            self.journal.record(
+                total_ms=(time.perf_counter() - started) * 1000, **decision, **fields
+            )
+        except Exception as exc:
+            logger.error("%s: failed to journal decision: %s", decision["symbol"], exc)
+
+    def _execute(
+        self,
+        decision: Optional[dict],
+        started: float,
+        symbol: str,
+        side: str,
+        amount: float,
+        leverage: int,
+        stop_loss: float,
+        take_profit: float,
+        price: float,
+    ) -> Optional[dict]:
+        """Place the order for a decision and journal its outcome.
+
+        With an ``AccountState`` attached, entries on a symbol already held
+        or beyond ``MAX_OPEN_POSITIONS`` are skipped and ``None`` returned.
+        A failed order frees its slot only when the error shows it was not
+        executed; after a timeout the slot stays taken until ``pending_ttl``.
+        """
+        try:
+            self._admit(symbol)
+        except EntryRejected as exc:
+            logger.info("entry skipped, %s", exc)
+            self._journal(decision, started, error=str(exc))
+            return None
+        try:
+            response = self.place_order(
+                symbol, side, amount, leverage, stop_loss, take_profit, price
+            )
+        except Exception as exc:
+            if not_executed(exc):
+                self._release(symbol)
+            else:
+                # the order may have reached the exchange: the entry stays
+                # pending until the private stream shows it or it expires
+                logger.warning("%s: order outcome unknown, keeping the entry pending: %s", symbol, exc)
+            self._journal(decision, started, error=str(exc))
+            raise
+        self._journal(decision, started, response=response)
+        return response
+
     def trade_with_signals(
         self, symbol: str, amount: float, leverage: int
     ) -> Optional[dict]:
         """Execute trade only when multiple signals align."""
         self._validate(symbol, amount, leverage)
-        signal, ma, rsi = self.combined_signal(symbol)
+        started = time.perf_counter()
+        # one window for both signals, journaled as the decision's input
+        candles = self._context(symbol, 5, 50)
+        with self.metrics.timer("strategy.combined_signal"):
+            signal, ma, rsi = self.combined_signal(symbol, candles)
+        decision = self._decision(
+            symbol, "combined_signal", 5, signal, started, candles,
+            indicators={"ma": ma, "rsi": rsi},
+        )
+        log_event(
+            "decision", symbol=symbol, strategy="combined_signal",
+            signal=signal, ma=ma, rsi=rsi,
+        )
         if signal == "Hold":
-            logger.info(f"{symbol}: no trade signal (MA={ma}, RSI={rsi})")
+            logger.info("%s: no trade signal (MA=%s, RSI=%s)", symbol, ma, rsi)
+            self._journal(decision, started)
             return None
         price = self._last_price(symbol)
         stop_loss, take_profit = self._calculate_sl_tp(symbol, signal, price)
         logger.info(
-            f"{symbol}: signal={signal} amount={amount} lev={leverage} SL={stop_loss:.2f} TP={take_profit:.2f}"
+            "%s: signal=%s amount=%s lev=%s SL=%.2f TP=%.2f",
+            symbol, signal, amount, leverage, stop_loss, take_profit,
         )
-        return self.place_order(
-            symbol, signal, amount, leverage, stop_loss, take_profit, price
+        if decision is not None:
+            decision.update(price=price, stop_loss=stop_loss, take_profit=take_profit)
+        return self._execute(
+            decision, started, symbol, signal, amount, leverage,
+            stop_loss, take_profit, price,
         )
 
     def trade_with_ma(
@@ -350,33 +930,53 @@ class BybitTradingBot:
         amount: float,
         leverage: int,
         strategy: Callable,
-        interval: int = 5,
+        interval: int | str = 5,
         limit: int = 50,
+        candles: Optional[list] = None,
+        indicators: Optional[dict] = None,
+        name: Optional[str] = None,
     ) -> Optional[dict]:
-        """Generic wrapper executing ``strategy`` using recent candles."""
+        """Generic wrapper executing ``strategy`` using recent candles.
+
+        ``candles`` may be passed when already fetched (see
+        ``strategies.StrategyRunner``); ``indicators`` are precomputed values
+        handed to ``strategy`` as keyword arguments, e.g. ``atr``.
+        """
 
         self._validate(symbol, amount, leverage)
-        result = self.session.get_kline(
-            category="linear", symbol=symbol, interval=interval, limit=limit
-        )
-        candles = result.get("result", {}).get("list", [])
+        started = time.perf_counter()
+        name = name or strategy.__name__
+        if candles is None:
+            candles = self._get_candles(symbol, interval, limit)
         if len(candles) < limit:
-            logger.warning(
-                f"{symbol}: not enough kline data for {strategy.__name__}"
-            )
+            logger.warning("%s: not enough kline data for %s", symbol, name)
             return None
 
-        candles = [list(map(float, c[:6])) for c in reversed(candles)]
+        context = self.indicators.context(symbol, interval, candles)
+        if isinstance(candles, IndicatorContext):
+            candles = candles.candles
         price = candles[-1][4]
 
-        signal, stop, take = strategy(candles)
+        with self.metrics.timer(f"strategy.{name}"):
+            signal, stop, take = strategy(context, **(indicators or {}))
+        decision = self._decision(
+            symbol, name, interval, signal, started, candles,
+            price=price, stop_loss=stop, take_profit=take, indicators=indicators,
+        )
+        log_event(
+            "decision", symbol=symbol, strategy=name,
+            signal=signal, price=price, stop_loss=stop, take_profit=take,
+        )
         if signal == "Hold":
-            logger.info(f"{symbol}: {strategy.__name__} -> no signal")
+            logger.info("%s: %s -> no signal", symbol, name)
+            self._journal(decision, started)
             return None
         logger.info(
-            f"{symbol}: {strategy.__name__} -> {signal} SL={stop:.2f} TP={take:.2f}"
+            "%s: %s -> %s SL=%.2f TP=%.2f", symbol, name, signal, stop, take
+        )
+        return self._execute(
+            decision, started, symbol, signal, amount, leverage, stop, take, price
         )
-        return self.place_order(symbol, signal, amount, leverage, stop, take, price)
 
     def trade_half_year(
         self, symbol: str, amount: float, leverage: int
@@ -384,23 +984,222 @@ class BybitTradingBot:
         """Execute half-year strategy on 4h candles."""
 
         self._validate(symbol, amount, leverage)
-        result = self.session.get_kline(
-            category="linear", symbol=symbol, interval=240, limit=200
-        )
-        candles = result.get("result", {}).get("list", [])
+        started = time.perf_counter()
+        candles = self._get_candles(symbol, 240, 200)
         if len(candles) < 200:
-            logger.warning(f"{symbol}: not enough kline data for half_year_strategy")
+            logger.warning("%s: not enough kline data for half_year_strategy", symbol)
             return None
-        candles = [list(map(float, c[:6])) for c in reversed(candles)]
         price = candles[-1][4]
-        signal, stop, take = half_year_strategy(candles)
+        with self.metrics.timer("strategy.half_year_strategy"):
+            signal, stop, take = half_year_strategy(
+                self.indicators.context(symbol, 240, candles)
+            )
+        decision = self._decision(
+            symbol, "half_year_strategy", 240, signal, started, candles,
+            price=price, stop_loss=stop, take_profit=take,
+        )
+        log_event(
+            "decision", symbol=symbol, strategy="half_year_strategy",
+            signal=signal, price=price, stop_loss=stop, take_profit=take,
+        )
         if signal == "Hold":
-            logger.info(f"{symbol}: half_year_strategy -> no signal")
+            logger.info("%s: half_year_strategy -> no signal", symbol)
+            self._journal(decision, started)
             return None
         logger.info(
-            f"{symbol}: half_year_strategy -> {signal} SL={stop:.2f} TP={take:.2f}"
+            "%s: half_year_strategy -> %s SL=%.2f TP=%.2f", symbol, signal, stop, take
+        )
+        return self._execute(
+            decision, started, symbol, signal, amount, leverage, stop, take, price
         )
-        return self.place_order(symbol, signal, amount, leverage, stop, take, price)
+
+
+def default_strategies(
+    bot: BybitTradingBot,
+    amount: float = 100,
+    leverage: int = 10,
+    names: Optional[Iterable[str]] = None,
+) -> list[Callable]:
+    """Return the per-symbol strategy callables traded by ``main``.
+
+    One ``StrategyRunner`` over the registered strategies (``names`` selects
+    a subset): each interval is fetched and ATR computed once per symbol.
+    """
+    return [StrategyRunner(bot, REGISTRY.specs(names), amount, leverage)]
+
+
+def evaluate_symbol(
+    bot: BybitTradingBot, symbol: str, strategies: list[Callable]
+) -> None:
+    """Log the trend for ``symbol`` and run ``strategies`` one after another.
+
+    Errors are logged per strategy so one failure does not stop the others.
+    """
+    try:
+        bot.log_market_trend(symbol)
+    except Exception as exc:
+        logger.error("%s: trend check failed: %s", symbol, exc)
+    for strat in strategies:
+        try:
+            result = strat(symbol)
+            if result:
+                logger.info("%s: order placed %s", symbol, result)
+        except Exception as exc:
+            logger.error("%s: trade failed: %s", symbol, exc)
+
+
+def run_cycle(
+    bot: BybitTradingBot, strategies: list[Callable], max_workers: int = 4
+) -> None:
+    """Evaluate all allowed symbols concurrently on a bounded thread pool.
+
+    Each symbol runs in a single task so its strategies keep their order,
+    while ``max_workers`` caps how many API requests are in flight at once.
+    With ``max_workers=1`` the cycle is fully sequential.
+    """
+    if max_workers <= 1:
+        for symbol in bot.ALLOWED_SYMBOLS:
+            evaluate_symbol(bot, symbol, strategies)
+        return
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(evaluate_symbol, bot, symbol, strategies)
+            for symbol in bot.ALLOWED_SYMBOLS
+        ]
+        for future in futures:
+            future.result()
+
+
+def warm_candles(
+    bot: BybitTradingBot,
+    store: CandleStore,
+    symbol: str,
+    interval: int,
+    limit: int,
+    now: Optional[float] = None,
+) -> Optional[CandleSeries]:
+    """Return up to ``limit`` candles read from ``store`` and topped up over REST.
+
+    Only the bars after the newest stored one are requested, together with
+    that bar as an overlap check and the forming bar. Returns ``None`` when
+    nothing usable is stored (no bars, a gap in the tail or more missing bars
+    than one request returns); callers then fetch the full window.
+    """
+    tail = CandleSeries.from_records(store.read(symbol, interval)[-limit:])
+    if not len(tail):
+        return None
+    length = _interval_seconds(interval) * 1000
+    ts = tail.ts
+    if ts[-1] - ts[0] != (len(tail) - 1) * length:
+        return None
+    now_ms = (time.time() if now is None else now) * 1000
+    missing = int((now_ms // length * length - ts[-1]) // length)
+    if not 1 <= missing < KLINE_LIMIT:
+        return None
+    result = bot.session.get_kline(
+        category="linear", symbol=symbol, interval=interval, limit=missing + 1
+    )
+    fresh = CandleSeries.from_bybit(result.get("result", {}).get("list", []))
+    if not len(fresh) or fresh.ts[0] > ts[-1]:
+        return None
+    # the exchange's copy of overlapping bars wins
+    older = tail[: int(np.searchsorted(ts, fresh.ts[0]))]
+    return CandleSeries.concat([older, fresh])[-limit:]
+
+
+def polling_cycle(
+    bot: BybitTradingBot,
+    strategies: list[Callable],
+    store: Optional[CandleStore] = None,
+    max_workers: int = 4,
+    intervals: tuple[int, ...] = (5, 240),
+    seed_limit: int = 200,
+) -> KlineSnapshot:
+    """Run one polling cycle of ``main``: trade, persist candles, flush the journal.
+
+    With a ``store`` the snapshot is first seeded with ``warm_candles`` for
+    every symbol and interval, so strategies read stored history and only the
+    newest bars are downloaded. Closed bars fetched during the cycle are
+    appended to ``store``. Returns the cycle's kline snapshot for its hit/miss
+    counters.
+    """
+    with bot.kline_snapshot() as snapshot:
+        if store is not None:
+            for symbol in bot.ALLOWED_SYMBOLS:
+                for interval in intervals:
+                    try:
+                        candles = warm_candles(bot, store, symbol, interval, seed_limit)
+                    except Exception as exc:
+                        logger.error("%s: failed to read stored candles: %s", symbol, exc)
+                        continue
+                    if candles is not None:
+                        snapshot.put(symbol, interval, candles)
+        run_cycle(bot, strategies, max_workers)
+        if store is not None:
+            for symbol, interval, candles in snapshot.entries():
+                try:
+                    # the newest candle is still forming, keep closed bars only
+                    store.append(symbol, interval, candles[:-1])
+                except (OSError, ValueError) as exc:
+                    logger.error("%s: failed to store candles: %s", symbol, exc)
+    if bot.journal is not None:
+        bot.journal.flush()
+    return snapshot
+
+
+def start_streaming(
+    bot: BybitTradingBot,
+    ws,
+    strategies: list[Callable],
+    pool: ThreadPoolExecutor,
+    intervals: tuple[int, ...] = (5, 240),
+    seed_limit: int = 200,
+    store: Optional[CandleStore] = None,
+) -> MarketStream:
+    """Switch ``bot`` to WebSocket market data and trade on 5m bar close.
+
+    Buffers are seeded once, from ``store`` via ``warm_candles`` when it has
+    a recent tail and over REST otherwise. Then ``ws`` keeps them current,
+    every confirmed bar is appended to ``store`` and every confirmed
+    5-minute bar schedules ``evaluate_symbol`` on ``pool``. A buffer that
+    skipped bars is re-seeded over REST on ``pool``.
+    """
+
+    def on_bar_close(symbol: str, interval: int) -> None:
+        if store is not None:
+            closed = market.candles(symbol, interval, 1)
+            if closed:
+                try:
+                    store.append(symbol, interval, closed)
+                except (OSError, ValueError) as exc:
+                    logger.error("%s: failed to store candles: %s", symbol, exc)
+        if interval == 5:
+            pool.submit(evaluate_symbol, bot, symbol, strategies)
+
+    def reseed(symbol: str, interval: int) -> None:
+        # the gapped buffer reads as missing, so this goes to REST
+        try:
+            market.seed(symbol, interval, bot._get_candles(symbol, interval, seed_limit))
+        except Exception as exc:
+            logger.error("%s: failed to re-seed %s candles: %s", symbol, interval, exc)
+
+    market = MarketStream(
+        bot.ALLOWED_SYMBOLS,
+        intervals=intervals,
+        on_bar_close=on_bar_close,
+        on_gap=lambda symbol, interval: pool.submit(reseed, symbol, interval),
+    )
+    for symbol in bot.ALLOWED_SYMBOLS:
+        for interval in intervals:
+            candles = None
+            if store is not None:
+                candles = warm_candles(bot, store, symbol, interval, seed_limit)
+            if candles is None:
+                candles = bot._get_candles(symbol, interval, seed_limit)
+            market.seed(symbol, interval, candles)
+    bot.market = market
+    market.subscribe(ws)
+    return market
 
 
 def main() -> None:  # pragma: no cover - side effects and infinite loop
@@ -410,37 +1209,110 @@ def main() -> None:  # pragma: no cover - side effects and infinite loop
         api_key=cfg.api_key,
         api_secret=cfg.api_secret,
         demo=cfg.demo,
+        # the scheduler reads the remaining quota from the limit headers
+        return_response_headers=cfg.scheduler,
+        timeout=cfg.call_timeout or 10,
     )
+    if cfg.endpoint:
+        # e.g. a local exchange_sim.py server for soak tests
+        session.endpoint = cfg.endpoint
     if cfg.ignore_ssl:
         session.client.verify = False
         urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    scheduled = ScheduledSession(session) if cfg.scheduler else None
+    if scheduled is not None:
+        session = scheduled
+    resilient = ResilientSession(session, timeout=cfg.call_timeout or None)
+    session = resilient
 
-    setup_logging()
-    bot = BybitTradingBot(session)
+    setup_logging(
+        async_mode=cfg.log_async,
+        max_bytes=cfg.log_max_bytes,
+        events_file=cfg.events_file or None,
+    )
+    metrics = MetricsRegistry()
+    session = InstrumentedSession(session, metrics)
+    exporter = MetricsExporter(
+        metrics, path=cfg.metrics_file or None, port=cfg.metrics_port or None
+    )
+    exporter.start()
+    instruments = InstrumentRegistry(session)
+    try:
+        instruments.start()
+    except Exception as exc:
+        logger.error("Failed to preload instruments: %s", exc)
+    journal = DecisionJournal(cfg.journal_file) if cfg.journal_file else None
+    state = None
+    if cfg.private_stream:
+        state = AccountState()
+        try:
+            state.seed(session)
+            private_ws = WebSocket(
+                testnet=cfg.testnet,
+                demo=cfg.demo,
+                channel_type="private",
+                api_key=cfg.api_key,
+                api_secret=cfg.api_secret,
+            )
+            state.subscribe(private_ws)
+        except Exception as exc:
+            logger.error("Account state unavailable, entries are not limited: %s", exc)
+            state = None
+    bot = BybitTradingBot(
+        session, instruments=instruments, metrics=metrics, journal=journal, state=state
+    )
+    bot.MAX_OPEN_POSITIONS = cfg.max_positions
+    if state is not None and cfg.trail_pct > 0:
+        # "1:30,2:30" -> close 30 % at +1 % and 30 % at +2 % from entry
+        ladder = [
+            tuple(float(x) for x in step.split(":"))
+            for step in cfg.tp_ladder.split(",")
+            if step
+        ]
+        PositionManager(bot, state, trail_pct=cfg.trail_pct, ladder=ladder).start()
+    try:
+        bot.sync_leverage()
+    except Exception as exc:
+        logger.error("Failed to fetch current leverage: %s", exc)
     print("Fetching account balance...")
     try:
-        result = session.get_wallet_balance(accountType="UNIFIED")
+        if state is not None:
+            result = {"totalEquity": state.equity(), "positions": state.positions()}
+        else:
+            result = session.get_wallet_balance(accountType="UNIFIED")
     except Exception as exc:
         print(f"Failed to fetch balance: {exc}")
     else:
         print(result)
-    strategies = [
-        lambda s: bot.trade_strategy(s, 100, 10, sma_crossover),
-        lambda s: bot.trade_strategy(s, 100, 10, breakout),
-        lambda s: bot.trade_strategy(s, 100, 10, mean_reversion),
-        lambda s: bot.trade_strategy(s, 100, 10, rsi_strategy),
-        lambda s: bot.trade_half_year(s, 100, 10),
-    ]
+    plugins = REGISTRY.load_entry_points()
+    if plugins:
+        logger.info("Strategy plugins loaded: %s", ", ".join(plugins))
+    # "sma_crossover,breakout" -> only these; empty runs every registered one
+    names = [n.strip() for n in cfg.strategies.split(",") if n.strip()] or None
+    strategies = default_strategies(bot, names=names)
+    store = CandleStore()
+    if cfg.stream:
+        ws = WebSocket(testnet=cfg.testnet, demo=cfg.demo, channel_type="linear")
+        with ThreadPoolExecutor(max_workers=cfg.workers) as pool:
+            start_streaming(bot, ws, strategies, pool, store=store)
+            while True:
+                time.sleep(60)
+                if journal is not None:
+                    journal.flush()
     while True:
-        bot.log_all_trends()
-        for symbol in bot.ALLOWED_SYMBOLS:
-            for strat in strategies:
-                try:
-                    result = strat(symbol)
-                    if result:
-                        logger.info(f"{symbol}: order placed {result}")
-                except Exception as exc:
-                    logger.error(f"{symbol}: trade failed: {exc}")
+        started = time.monotonic()
+        snapshot = polling_cycle(bot, strategies, store, cfg.workers)
+        logger.info(
+            "cycle took %.2fs, kline snapshot: hits=%s misses=%s, "
+            "set_leverage skipped=%s",
+            time.monotonic() - started,
+            snapshot.hits,
+            snapshot.misses,
+            bot.leverage_calls_skipped,
+        )
+        if scheduled is not None:
+            logger.info("scheduler: %s", scheduled.stats)
+        logger.info("resilience: %s", resilient.stats)
         time.sleep(60)
 
 
@@ -0,0 +1,170 @@
+"""Array-backed candle windows.
+
+``CandleSeries`` keeps chronological ``[ts, open, high, low, close, volume]``
+candles as six contiguous float64 NumPy columns instead of a list of Python
+lists, so a 200-bar window is one 9.6 kB buffer rather than ~1400 objects.
+``from_bybit`` parses the newest-first string rows of ``get_kline`` in one
+pass straight into that buffer.
+
+The series is a read-only sequence of rows: ``series[-1][4]``, ``len``,
+slicing (returns a series view) and iteration behave like the list it
+replaces, so the ``functions.py`` strategies accept it unchanged. Columns are
+available as NumPy views (``close``, ``high``, ...) and as Python lists via
+``column(index).tolist()``, which ``functions.IndicatorContext`` uses.
+``from_records`` builds a series from ``candle_store.CandleStore.read``
+without going through rows.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from itertools import chain
+from operator import itemgetter
+from typing import Iterable, Iterator, List
+
+import numpy as np
+
+__all__ = ["FIELDS", "CandleSeries"]
+
+FIELDS = ("ts", "open", "high", "low", "close", "volume")
+
+_SIX = itemgetter(0, 1, 2, 3, 4, 5)
+
+
+class CandleSeries(Sequence):
+    """Chronological candles stored as a ``(6, n)`` float64 array."""
+
+    __slots__ = ("_columns",)
+
+    def __init__(self, columns: np.ndarray):
+        columns = np.asarray(columns, dtype=np.float64)
+        if columns.ndim != 2 or columns.shape[0] != len(FIELDS):
+            raise ValueError("columns must have shape (6, n)")
+        self._columns = columns
+
+    @classmethod
+    def from_bybit(cls, rows: Sequence[Sequence[str]]) -> "CandleSeries":
+        """Parse ``get_kline`` rows (newest first, strings) to chronological order."""
+
+        n = len(rows)
+        if not n:
+            return cls(np.empty((len(FIELDS), 0)))
+        widths = set(map(len, rows))
+        width = len(rows[0])
+        if width >= len(FIELDS) and len(widths) == 1:
+            # parse every field, turnover included, then drop the extra column:
+            # cheaper than slicing each row first
+            flat = np.fromiter(
+                map(float, chain.from_iterable(rows)), dtype=np.float64, count=n * width
+            )
+            table = flat.reshape(n, width)[::-1, : len(FIELDS)]
+        else:
+            flat = np.fromiter(
+                map(float, chain.from_iterable(map(_SIX, rows))),
+                dtype=np.float64,
+                count=n * len(FIELDS),
+            )
+            table = flat.reshape(n, len(FIELDS))[::-1]
+        return cls(np.ascontiguousarray(table.T))
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence[float]]) -> "CandleSeries":
+        """Build from chronological numeric ``[ts, o, h, l, c, v, ...]`` rows."""
+
+        rows = list(rows)
+        if not rows:
+            return cls(np.empty((len(FIELDS), 0)))
+        table = np.array([_SIX(r) for r in rows], dtype=np.float64)
+        return cls(np.ascontiguousarray(table.T))
+
+    @classmethod
+    def from_records(cls, records: np.ndarray) -> "CandleSeries":
+        """Copy the fields of ``candle_store.RECORD`` records column by column.
+
+        Each field of a memmap slice is a strided view, so this is six
+        vectorized copies with no per-row Python objects.
+        """
+
+        columns = np.empty((len(FIELDS), len(records)), dtype=np.float64)
+        for i, name in enumerate(FIELDS):
+            columns[i] = records[name]
+        return cls(columns)
+
+    @classmethod
+    def concat(cls, parts: Iterable["CandleSeries"]) -> "CandleSeries":
+        """Join chronological series end to end."""
+
+        arrays = [part._columns for part in parts]
+        if not arrays:
+            return cls(np.empty((len(FIELDS), 0)))
+        return cls(np.concatenate(arrays, axis=1))
+
+    # -- sequence protocol ------------------------------------------------
+
+    def __len__(self) -> int:
+        return self._columns.shape[1]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return CandleSeries(self._columns[:, index])
+        return self._columns[:, index].tolist()
+
+    def __iter__(self) -> Iterator[List[float]]:
+        return iter(self._columns.T.tolist())
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, CandleSeries):
+            return np.array_equal(self._columns, other._columns)
+        if isinstance(other, Sequence) and not isinstance(other, (str, bytes)):
+            return self.tolist() == [list(r[: len(FIELDS)]) for r in other]
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"CandleSeries({len(self)} candles)"
+
+    # -- columns ----------------------------------------------------------
+
+    def column(self, index: int) -> np.ndarray:
+        """Read-only view of field ``index`` (``FIELDS`` order)."""
+
+        view = self._columns[index]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def ts(self) -> np.ndarray:
+        return self.column(0)
+
+    @property
+    def open(self) -> np.ndarray:
+        return self.column(1)
+
+    @property
+    def high(self) -> np.ndarray:
+        return self.column(2)
+
+    @property
+    def low(self) -> np.ndarray:
+        return self.column(3)
+
+    @property
+    def close(self) -> np.ndarray:
+        return self.column(4)
+
+    @property
+    def volume(self) -> np.ndarray:
+        return self.column(5)
+
+    @property
+    def nbytes(self) -> int:
+        return self._columns.nbytes
+
+    def tolist(self) -> List[List[float]]:
+        return self._columns.T.tolist()
+
+    def tobytes(self) -> bytes:
+        """Row-major float64 bytes, the layout of ``journal.pack_candles``."""
+
+        return self._columns.T.tobytes()
@@ -0,0 +1,196 @@
+"""Append-only binary candle store with memory-mapped reads.
+
+Each ``(symbol, interval)`` lives in ``<root>/<symbol>_<interval>.bin`` as
+fixed-width little-endian records ``(ts int64, open, high, low, close,
+volume float64)`` sorted by timestamp. New bars are appended, a bar with the
+same timestamp as the last record replaces it (the forming bar got updated)
+and bars older than the tail are merged in only when they fill a gap.
+
+Reads return a NumPy structured array backed by ``np.memmap``, so loading a
+year of 5-minute bars is a slice of the mapped file rather than a JSON parse.
+``series`` wraps such a slice in a ``CandleSeries``; ``rows`` converts it to
+Python lists and is meant for small ranges only.
+
+A crash in the middle of an append can leave a partial record at the end of
+a file. Reads map whole records only and the next append cuts the partial
+tail off before writing.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from candle_series import CandleSeries
+
+__all__ = ["RECORD", "CandleStore"]
+
+logger = logging.getLogger(__name__)
+
+RECORD = np.dtype(
+    [
+        ("ts", "<i8"),
+        ("open", "<f8"),
+        ("high", "<f8"),
+        ("low", "<f8"),
+        ("close", "<f8"),
+        ("volume", "<f8"),
+    ]
+)
+
+
+def _to_records(candles: Iterable[Sequence]) -> np.ndarray:
+    """Convert ``[ts, o, h, l, c, v, ...]`` rows (strings or numbers) to sorted unique records."""
+
+    if isinstance(candles, CandleSeries):
+        # already float columns: copy them without going through rows
+        records = np.empty(len(candles), dtype=RECORD)
+        for i, name in enumerate(RECORD.names):
+            records[name] = candles.column(i)
+    else:
+        rows = [tuple(c[:6]) for c in candles]
+        if not rows:
+            return np.empty(0, dtype=RECORD)
+        table = np.array(rows, dtype=object)
+        records = np.empty(len(rows), dtype=RECORD)
+        records["ts"] = table[:, 0].astype(np.float64).astype(np.int64)
+        for i, name in enumerate(RECORD.names[1:], start=1):
+            records[name] = table[:, i].astype(np.float64)
+    if not len(records):
+        return records
+    # keep the last occurrence of each timestamp, ordered by time
+    order = np.argsort(records["ts"], kind="stable")
+    records = records[order]
+    keep = np.append(records["ts"][1:] != records["ts"][:-1], True)
+    return records[keep]
+
+
+class CandleStore:
+    """Directory of per-(symbol, interval) binary candle files."""
+
+    def __init__(self, root: str | Path = "cache"):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+
+    def path(self, symbol: str, interval: int | str) -> Path:
+        return self.root / f"{symbol}_{interval}.bin"
+
+    def read(
+        self,
+        symbol: str,
+        interval: int | str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> np.ndarray:
+        """Return records with ``start <= ts <= end`` as a read-only memmap slice."""
+
+        path = self.path(symbol, interval)
+        count = path.stat().st_size // RECORD.itemsize if path.exists() else 0
+        if not count:
+            return np.empty(0, dtype=RECORD)
+        # ``shape`` skips a partial record left by an interrupted append
+        data = np.memmap(path, dtype=RECORD, mode="r", shape=(count,))
+        ts = data["ts"]
+        lo = 0 if start is None else int(np.searchsorted(ts, start, side="left"))
+        hi = len(data) if end is None else int(np.searchsorted(ts, end, side="right"))
+        return data[lo:hi]
+
+    def rows(
+        self,
+        symbol: str,
+        interval: int | str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> List[List[float]]:
+        """Return records as chronological ``[ts, o, h, l, c, v]`` float lists."""
+
+        data = self.read(symbol, interval, start, end)
+        return [[float(ts), o, h, lo, c, v] for ts, o, h, lo, c, v in data.tolist()]
+
+    def series(
+        self,
+        symbol: str,
+        interval: int | str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> CandleSeries:
+        """Return records as a ``CandleSeries`` copied column-wise from the memmap."""
+
+        return CandleSeries.from_records(self.read(symbol, interval, start, end))
+
+    def first_ts(self, symbol: str, interval: int | str) -> Optional[int]:
+        data = self.read(symbol, interval)
+        return int(data["ts"][0]) if len(data) else None
+
+    def last_ts(self, symbol: str, interval: int | str) -> Optional[int]:
+        data = self.read(symbol, interval)
+        return int(data["ts"][-1]) if len(data) else None
+
+    def append(self, symbol: str, interval: int | str, candles: Iterable[Sequence]) -> int:
+        """Store ``candles`` and return how many new timestamps were added.
+
+        ``candles`` may be in any order (Bybit returns newest first) and may
+        overlap what is already stored.
+        """
+
+        incoming = _to_records(candles)
+        if not len(incoming):
+            return 0
+        path = self.path(symbol, interval)
+        with self._lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._trim(path)
+            existing = self.read(symbol, interval)
+            if not len(existing):
+                with path.open("wb") as f:
+                    f.write(incoming.tobytes())
+                return len(incoming)
+            last = int(existing["ts"][-1])
+            older = incoming[incoming["ts"] < last]
+            if len(older):
+                pos = np.searchsorted(existing["ts"], older["ts"])
+                pos = np.minimum(pos, len(existing) - 1)
+                missing = older[existing["ts"][pos] != older["ts"]]
+                if len(missing):
+                    del existing
+                    return self._merge(path, incoming)
+            tail = incoming[incoming["ts"] >= last]
+            with path.open("r+b") as f:
+                if len(tail) and int(tail["ts"][0]) == last:
+                    f.seek((len(existing) - 1) * RECORD.itemsize)
+                    f.write(tail[:1].tobytes())
+                    tail = tail[1:]
+                f.seek(0, os.SEEK_END)
+                f.write(tail.tobytes())
+            return len(tail)
+
+    @staticmethod
+    def _trim(path: Path) -> None:
+        """Cut off a partial record left at the end of ``path`` by a crash."""
+
+        if not path.exists():
+            return
+        size = path.stat().st_size
+        torn = size % RECORD.itemsize
+        if torn:
+            logger.warning("%s: dropping %d bytes of a partial record", path, torn)
+            os.truncate(path, size - torn)
+
+    def _merge(self, path: Path, incoming: np.ndarray) -> int:
+        """Rewrite ``path`` with ``incoming`` merged in; used for gap repair."""
+
+        existing = np.fromfile(path, dtype=RECORD)
+        merged = np.concatenate([existing, incoming])
+        order = np.argsort(merged["ts"], kind="stable")
+        merged = merged[order]
+        keep = np.append(merged["ts"][1:] != merged["ts"][:-1], True)
+        merged = merged[keep]
+        tmp = path.with_suffix(".tmp")
+        merged.tofile(tmp)
+        os.replace(tmp, path)
+        return len(merged) - len(existing)
@@ -11,6 +11,22 @@ class BybitConfig:
     testnet: bool = False
     demo: bool = True
     ignore_ssl: bool = True
+    workers: int = 4
+    stream: bool = False
+    metrics_file: str = "metrics.json"
+    metrics_port: int = 0
+    log_async: bool = True
+    log_max_bytes: int = 10_000_000
+    events_file: str = "trade_events.jsonl"
+    journal_file: str = "journal.sqlite3"
+    endpoint: str = ""
+    scheduler: bool = True
+    call_timeout: float = 10.0
+    max_positions: int = 3
+    private_stream: bool = True
+    trail_pct: float = 0.0
+    tp_ladder: str = "1:30,2:30"
+    strategies: str = ""
 
     @classmethod
     def from_env(cls) -> 'BybitConfig':
@@ -20,4 +36,20 @@ class BybitConfig:
             testnet=os.getenv("BYBIT_TESTNET", "False").lower() == "true",
             demo=os.getenv("BYBIT_DEMO", "True").lower() == "true",
             ignore_ssl=os.getenv("BYBIT_IGNORE_SSL", "True").lower() == "true",
+            workers=int(os.getenv("BYBIT_WORKERS", "4")),
+            stream=os.getenv("BYBIT_STREAM", "False").lower() == "true",
+            metrics_file=os.getenv("BYBIT_METRICS_FILE", "metrics.json"),
+            metrics_port=int(os.getenv("BYBIT_METRICS_PORT", "0")),
+            log_async=os.getenv("BYBIT_LOG_ASYNC", "True").lower() == "true",
+            log_max_bytes=int(os.getenv("BYBIT_LOG_MAX_BYTES", "10000000")),
+            events_file=os.getenv("BYBIT_EVENTS_FILE", "trade_events.jsonl"),
+            journal_file=os.getenv("BYBIT_JOURNAL", "journal.sqlite3"),
+            endpoint=os.getenv("BYBIT_ENDPOINT", ""),
+            scheduler=os.getenv("BYBIT_SCHEDULER", "True").lower() == "true",
+            call_timeout=float(os.getenv("BYBIT_CALL_TIMEOUT", "10")),
+            max_positions=int(os.getenv("BYBIT_MAX_POSITIONS", "3")),
+            private_stream=os.getenv("BYBIT_PRIVATE_STREAM", "True").lower() == "true",
+            trail_pct=float(os.getenv("BYBIT_TRAIL_PCT", "0")),
+            tp_ladder=os.getenv("BYBIT_TP_LADDER", "1:30,2:30"),
+            strategies=os.getenv("BYBIT_STRATEGIES", ""),
         )
@@ -0,0 +1,383 @@
+"""Local Bybit v5 REST stand-in for load, latency and soak tests.
+
+``ExchangeSimulator`` serves the subset of the v5 API used by the bot over
+HTTP, backed by ``backtest.SimulatedSession``:
+
+====================================  =====================
+``GET  /v5/market/kline``             ``get_kline``
+``GET  /v5/market/tickers``           ``get_tickers``
+``GET  /v5/market/instruments-info``  ``get_instruments_info``
+``GET  /v5/position/list``            ``get_positions``
+``GET  /v5/execution/list``           ``get_executions``
+``GET  /v5/account/wallet-balance``   ``get_wallet_balance``
+``GET  /v5/order/realtime``           ``get_open_orders``
+``GET  /v5/order/history``            ``get_order_history``
+``POST /v5/position/set-leverage``    ``set_leverage``
+``POST /v5/position/trading-stop``    ``set_trading_stop``
+``POST /v5/order/create``             ``place_order``
+``POST /v5/order/create-batch``       ``place_batch_order``
+====================================  =====================
+
+Stored candles drive the price path: simulated time advances ``speed``
+times faster than the wall clock (300 = one 5-minute bar per second).
+Each endpoint can get its own latency distribution and a token bucket rate
+limit; throttled requests get ``retCode 10006`` (or HTTP 429) with the
+``X-Bapi-Limit-*`` headers pybit uses to back off. ``fill_delay`` keeps
+accepted orders pending for a while before they fill; meanwhile they are
+listed by ``get_open_orders`` with status ``New``.
+
+Point pybit at it by overriding the endpoint::
+
+    sim = ExchangeSimulator(history, latency={"*": lognormal(0.08, 0.5)})
+    url = sim.start()
+    session = HTTP(api_key="x", api_secret="y")
+    session.endpoint = url
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from backtest import History, SimulatedSession
+
+__all__ = [
+    "ROUTES",
+    "DEFAULT_RATE_LIMITS",
+    "constant",
+    "uniform",
+    "lognormal",
+    "TokenBucket",
+    "ExchangeSimulator",
+]
+
+logger = logging.getLogger(__name__)
+
+ROUTES: Dict[Tuple[str, str], str] = {
+    ("GET", "/v5/market/kline"): "get_kline",
+    ("GET", "/v5/market/tickers"): "get_tickers",
+    ("GET", "/v5/market/instruments-info"): "get_instruments_info",
+    ("GET", "/v5/position/list"): "get_positions",
+    ("GET", "/v5/execution/list"): "get_executions",
+    ("GET", "/v5/account/wallet-balance"): "get_wallet_balance",
+    ("GET", "/v5/order/realtime"): "get_open_orders",
+    ("GET", "/v5/order/history"): "get_order_history",
+    ("POST", "/v5/position/set-leverage"): "set_leverage",
+    ("POST", "/v5/position/trading-stop"): "set_trading_stop",
+    ("POST", "/v5/order/create"): "place_order",
+    ("POST", "/v5/order/create-batch"): "place_batch_order",
+}
+
+# requests per second and burst, roughly Bybit's default per-UID limits
+DEFAULT_RATE_LIMITS: Dict[str, Tuple[float, int]] = {
+    "/v5/order/create": (10, 10),
+    "/v5/order/create-batch": (10, 10),
+    "/v5/position/set-leverage": (10, 10),
+    "/v5/position/trading-stop": (10, 10),
+    "/v5/position/list": (50, 50),
+    "/v5/execution/list": (50, 50),
+    "/v5/account/wallet-balance": (50, 50),
+    "/v5/order/realtime": (50, 50),
+    "/v5/order/history": (50, 50),
+    "/v5/market/kline": (100, 100),
+    "/v5/market/tickers": (100, 100),
+    "/v5/market/instruments-info": (100, 100),
+}
+
+_INT_PARAMS = {"limit", "start", "end"}
+
+Latency = Callable[[], float]
+
+
+def constant(seconds: float) -> Latency:
+    return lambda: seconds
+
+
+def uniform(low: float, high: float, seed: Optional[int] = None) -> Latency:
+    rng = random.Random(seed)
+    return lambda: rng.uniform(low, high)
+
+
+def lognormal(median: float, sigma: float, seed: Optional[int] = None) -> Latency:
+    """Right-skewed latency with the given median, like real network tails."""
+
+    rng = random.Random(seed)
+    return lambda: median * rng.lognormvariate(0, sigma)
+
+
+class TokenBucket:
+    """``rate`` tokens per second up to ``burst``; ``take`` is non-blocking."""
+
+    def __init__(self, rate: float, burst: int, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self._clock = clock
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def take(self) -> Tuple[bool, int, float]:
+        """Return ``(allowed, remaining, seconds until a token is available)``."""
+
+        with self._lock:
+            now = self._clock()
+            self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            allowed = self.tokens >= 1
+            if allowed:
+                self.tokens -= 1
+            wait = (1 - self.tokens) / self.rate if self.tokens < 1 else 0.0
+            return allowed, int(self.tokens), wait
+
+
+class ExchangeSimulator:
+    """Threaded HTTP server exposing ``SimulatedSession`` as Bybit v5 REST."""
+
+    def __init__(
+        self,
+        history: History,
+        base_interval: int = 5,
+        speed: float = 300.0,
+        start_ms: Optional[int] = None,
+        latency: Optional[Mapping[str, Latency]] = None,
+        rate_limits: Optional[Mapping[str, Tuple[float, int]]] = DEFAULT_RATE_LIMITS,
+        http_429: bool = False,
+        fill_delay: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        clock: Callable[[], float] = time.monotonic,
+        **session_kwargs,
+    ):
+        self.session = SimulatedSession(history, base_interval=base_interval, **session_kwargs)
+        starts = [int(c[0]) for (_, iv), rows in history.items() if iv == base_interval for c in rows[:1]]
+        # begin once the first base bar has closed
+        self.start_ms = start_ms if start_ms is not None else min(starts) + base_interval * 60_000
+        self.speed = speed
+        self.latency = dict(latency or {})
+        self.buckets = {
+            path: TokenBucket(rate, burst, clock) for path, (rate, burst) in (rate_limits or {}).items()
+        }
+        self.http_429 = http_429
+        self.fill_delay = fill_delay
+        self.host = host
+        self.port = port
+        self._clock = clock
+        self._lock = threading.Lock()
+        # (fill time, order id, place_order params)
+        self._pending: List[Tuple[float, str, dict]] = []
+        self._started_at: Optional[float] = None
+        self._server: Optional[ThreadingHTTPServer] = None
+        self.requests: Dict[str, int] = {}
+        self.throttled: Dict[str, int] = {}
+
+    # -- simulated time ---------------------------------------------------
+
+    def now_ms(self) -> int:
+        if self._started_at is None:
+            return self.start_ms
+        return self.start_ms + int((self._clock() - self._started_at) * self.speed * 1000)
+
+    def _sync(self) -> None:
+        """Advance the session clock and fill orders whose delay has passed."""
+
+        now = self.now_ms()
+        if now != self.session.now:
+            self.session.advance(now)
+        if self._pending:
+            due = [p for t, _, p in self._pending if t <= self._clock()]
+            self._pending = [item for item in self._pending if item[0] > self._clock()]
+            for params in due:
+                try:
+                    self.session.place_order(**params)
+                except ValueError as exc:
+                    logger.warning("delayed fill rejected: %s", exc)
+
+    # -- request handling ---------------------------------------------------
+
+    def handle(self, method: str, path: str, params: dict) -> Tuple[int, dict, dict]:
+        """Return ``(http status, headers, body)`` for one request."""
+
+        name = ROUTES.get((method, path))
+        if name is None:
+            return 404, {}, {"retCode": 10001, "retMsg": f"unknown path {path}"}
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+        headers: dict = {}
+        bucket = self.buckets.get(path)
+        if bucket is not None:
+            allowed, remaining, wait = bucket.take()
+            reset_ms = int((time.time() + wait) * 1000)
+            headers = {
+                "X-Bapi-Limit": str(bucket.burst),
+                "X-Bapi-Limit-Status": str(remaining),
+                "X-Bapi-Limit-Reset-Timestamp": str(reset_ms),
+            }
+            if not allowed:
+                with self._lock:
+                    self.throttled[path] = self.throttled.get(path, 0) + 1
+                body = {"retCode": 10006, "retMsg": "Too many visits!", "result": {}, "retExtInfo": {}}
+                return (429 if self.http_429 else 200), headers, body
+        delay = self.latency.get(path, self.latency.get("*"))
+        if delay is not None:
+            time.sleep(max(0.0, delay()))
+        params = {k: int(v) if k in _INT_PARAMS and isinstance(v, str) else v for k, v in params.items()}
+        with self._lock:
+            self._sync()
+            try:
+                body = self._call(name, params)
+            except ValueError as exc:
+                body = {"retCode": 10001, "retMsg": str(exc), "result": {}, "retExtInfo": {}}
+            except Exception as exc:
+                if "110043" in str(exc):
+                    body = {"retCode": 110043, "retMsg": "leverage not modified", "result": {}, "retExtInfo": {}}
+                else:
+                    body = {"retCode": 10016, "retMsg": str(exc), "result": {}, "retExtInfo": {}}
+        body.setdefault("time", int(time.time() * 1000))
+        return 200, headers, body
+
+    def _call(self, name: str, params: dict) -> dict:
+        if name == "place_order" and self.fill_delay > 0:
+            order_id = f"sim-pending-{len(self.session.orders) + len(self._pending) + 1}"
+            self._pending.append((self._clock() + self.fill_delay, order_id, params))
+            return {
+                "retCode": 0,
+                "retMsg": "OK",
+                "result": {"orderId": order_id, "orderLinkId": params.get("orderLinkId", "")},
+                "retExtInfo": {},
+            }
+        if name == "get_open_orders":
+            return self._open_orders(**params)
+        return getattr(self.session, name)(**params)
+
+    def _open_orders(self, category: str = "linear", symbol: str = "", orderLinkId: str = "", **_) -> dict:
+        """Orders waiting for ``fill_delay``, in the shape of ``get_open_orders``."""
+
+        items = [
+            {
+                "orderId": order_id,
+                "orderLinkId": params.get("orderLinkId", ""),
+                "symbol": params.get("symbol", ""),
+                "side": params.get("side", "Buy"),
+                "orderType": params.get("orderType", "Market"),
+                "qty": str(params.get("qty", "0")),
+                "cumExecQty": "0",
+                "orderStatus": "New",
+                "reduceOnly": bool(params.get("reduceOnly", False)),
+            }
+            for _, order_id, params in self._pending
+            if (not symbol or params.get("symbol") == symbol)
+            and (not orderLinkId or params.get("orderLinkId") == orderLinkId)
+        ]
+        return {
+            "retCode": 0,
+            "retMsg": "OK",
+            "result": {"category": category, "list": items, "nextPageCursor": ""},
+            "retExtInfo": {},
+        }
+
+    # -- server -------------------------------------------------------------
+
+    def start(self) -> str:
+        """Start serving in a background thread and return the base URL."""
+
+        simulator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _respond(self, method: str) -> None:
+                url = urlsplit(self.path)
+                if method == "GET":
+                    params = dict(parse_qsl(url.query))
+                else:
+                    length = int(self.headers.get("Content-Length") or 0)
+                    raw = self.rfile.read(length) if length else b""
+                    params = json.loads(raw or b"{}")
+                status, headers, body = simulator.handle(method, url.path, params)
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):  # noqa: N802 - http.server API
+                self._respond("GET")
+
+            def do_POST(self):  # noqa: N802 - http.server API
+                self._respond("POST")
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._started_at = self._clock()
+        threading.Thread(target=self._server.serve_forever, name="exchange-sim", daemon=True).start()
+        return self.url
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "ExchangeSimulator":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entry point
+    import argparse
+
+    from backtest import load_history, load_store_history
+    from bot import BybitTradingBot
+    from candle_store import CandleStore
+
+    parser = argparse.ArgumentParser(description="Serve recorded klines as a local Bybit v5 API")
+    parser.add_argument("directory", help="Candle store or JSON cache directory")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--speed", type=float, default=300.0, help="Simulated seconds per wall second")
+    parser.add_argument("--latency", type=float, default=0.0, help="Median latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.5, help="Lognormal sigma of the latency")
+    parser.add_argument("--fill-delay", type=float, default=0.0)
+    parser.add_argument("--http-429", action="store_true", help="Throttle with HTTP 429 instead of retCode")
+    parser.add_argument("--no-rate-limit", action="store_true")
+    parser.add_argument("--symbols", nargs="*", default=BybitTradingBot.ALLOWED_SYMBOLS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    history = load_store_history(CandleStore(args.directory), args.symbols)
+    history = history or load_history(args.directory, args.symbols)
+    sim = ExchangeSimulator(
+        history,
+        speed=args.speed,
+        latency={"*": lognormal(args.latency, args.jitter)} if args.latency else None,
+        rate_limits=None if args.no_rate_limit else DEFAULT_RATE_LIMITS,
+        http_429=args.http_429,
+        fill_delay=args.fill_delay,
+        port=args.port,
+    )
+    print(f"Serving simulated Bybit v5 API on {sim.start()} (set BYBIT_ENDPOINT to use it)")
+    try:
+        while True:
+            time.sleep(60)
+            print({"requests": sim.requests, "throttled": sim.throttled, "equity": sim.session.equity()})
+    except KeyboardInterrupt:
+        sim.stop()
@@ -2,10 +2,14 @@ from __future__ import annotations
 
 import json
 import logging
+import math
+import threading
 from pathlib import Path
 from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 import statistics
 
+from candle_series import CandleSeries
+
 __all__ = [
     "calculate_dynamic_order_size",
     "apply_trailing_stop",
@@ -22,6 +26,8 @@ __all__ = [
     "rsi_strategy",
     "half_year_strategy",
     "apply_sl_tp_bounds",
+    "IndicatorContext",
+    "IndicatorCache",
 ]
 
 
@@ -93,21 +99,173 @@ def limit_open_positions(open_positions: Sequence[str], limit: int) -> bool:
     return len(open_positions) < limit
 
 
-# Helper for strategy ATR calculations
+# Shared per-bar indicator values
 
-def _atr_from_candles(candles: Sequence[Sequence[float]], period: int = 14) -> float:
-    highs = [float(c[2]) for c in candles]
-    lows = [float(c[3]) for c in candles]
-    closes = [float(c[4]) for c in candles]
+OPEN, HIGH, LOW, CLOSE, VOLUME = 1, 2, 3, 4, 5
+
+
+class IndicatorContext(Sequence):
+    """A candle window with memoized float columns and ATR.
+
+    Behaves like the candle list it wraps, so every strategy accepting
+    candles accepts a context, but ``closes``/``highs``/``lows`` are converted
+    once and ``atr(period)`` is computed once however many strategies read
+    it. ``tail(n)`` returns a context over the newest ``n`` candles that
+    slices the parent's columns and shares its ATR. Columns are shared:
+    treat them as read-only.
+    """
+
+    def __init__(
+        self,
+        candles: Sequence[Sequence[float]],
+        symbol: str = "",
+        interval: int | str = 5,
+        parent: Optional["IndicatorContext"] = None,
+    ):
+        self.candles = candles
+        self.symbol = symbol
+        self.interval = interval
+        self._parent = parent
+        self._memo: Dict[object, object] = {}
+
+    def __len__(self) -> int:
+        return len(self.candles)
+
+    def __getitem__(self, index):
+        return self.candles[index]
+
+    def __repr__(self) -> str:
+        return f"IndicatorContext({self.symbol!r}, {self.interval!r}, {len(self)} candles)"
+
+    @property
+    def bar(self) -> Optional[float]:
+        """Timestamp of the newest candle."""
+        return self.candles[-1][0] if self.candles else None
+
+    def column(self, index: int) -> List[float]:
+        key = ("column", index)
+        values = self._memo.get(key)
+        if values is None:
+            if self._parent is not None:
+                values = self._parent.column(index)[len(self._parent) - len(self) :]
+            else:
+                values = _column(self.candles, index)
+            self._memo[key] = values
+        return values
+
+    @property
+    def closes(self) -> List[float]:
+        return self.column(CLOSE)
+
+    @property
+    def highs(self) -> List[float]:
+        return self.column(HIGH)
+
+    @property
+    def lows(self) -> List[float]:
+        return self.column(LOW)
+
+    def atr(self, period: int = 14) -> float:
+        # ATR only reads the newest ``period + 1`` candles: a long enough
+        # tail has the same value as its parent
+        if self._parent is not None and len(self) > period:
+            return self._parent.atr(period)
+        key = ("atr", period)
+        value = self._memo.get(key)
+        if value is None:
+            value = self._memo[key] = _true_range_mean(self.highs, self.lows, self.closes, period)
+        return value
+
+    def tail(self, n: int) -> "IndicatorContext":
+        """Context over the newest ``n`` candles."""
+        if n >= len(self):
+            return self
+        key = ("tail", n)
+        context = self._memo.get(key)
+        if context is None:
+            root = self._parent or self
+            context = IndicatorContext(self.candles[-n:], self.symbol, self.interval, parent=root)
+            self._memo[key] = context
+        return context
+
+
+class IndicatorCache:
+    """One ``IndicatorContext`` per ``(symbol, interval)`` for the current bar.
+
+    ``context`` returns the cached context (or a ``tail`` of it) while the
+    window has the same newest candle, and replaces it when the bar or the
+    forming candle changes, so at most one window per pair is kept.
+    """
+
+    def __init__(self):
+        self._contexts: Dict[Tuple[str, int | str], IndicatorContext] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def context(
+        self, symbol: str, interval: int | str, candles: Sequence[Sequence[float]]
+    ) -> IndicatorContext:
+        if isinstance(candles, IndicatorContext):
+            return candles
+        if not candles:
+            return IndicatorContext(candles, symbol, interval)
+        key = (symbol, interval)
+        with self._lock:
+            cached = self._contexts.get(key)
+            if cached is not None and _covers(cached, candles):
+                self.hits += 1
+                return cached.tail(len(candles))
+            context = self._contexts[key] = IndicatorContext(candles, symbol, interval)
+            self.misses += 1
+        return context
+
+    def clear(self) -> None:
+        with self._lock:
+            self._contexts.clear()
+
+
+def _covers(context: IndicatorContext, candles: Sequence[Sequence[float]]) -> bool:
+    n = len(candles)
+    return (
+        len(context) >= n
+        and list(context[-1]) == list(candles[-1])
+        and context[-n][0] == candles[0][0]
+    )
+
+
+def _column(candles: Sequence[Sequence[float]], index: int) -> List[float]:
+    if isinstance(candles, IndicatorContext):
+        return candles.column(index)
+    if isinstance(candles, CandleSeries):
+        return candles.column(index).tolist()
+    return [float(c[index]) for c in candles]
+
+
+def _true_range_mean(
+    highs: Sequence[float], lows: Sequence[float], closes: Sequence[float], period: int
+) -> float:
+    # only the newest ``period`` true ranges are averaged
+    start = max(1, len(closes) - period)
     trs: List[float] = []
-    for i in range(1, len(closes)):
+    for i in range(start, len(closes)):
         tr = max(
             highs[i] - lows[i],
             abs(highs[i] - closes[i - 1]),
             abs(lows[i] - closes[i - 1]),
         )
         trs.append(tr)
-    return sum(trs[-period:]) / period
+    return sum(trs) / period
+
+
+# Helper for strategy ATR calculations
+
+def _atr_from_candles(candles: Sequence[Sequence[float]], period: int = 14) -> float:
+    if isinstance(candles, IndicatorContext):
+        return candles.atr(period)
+    return _true_range_mean(
+        _column(candles, HIGH), _column(candles, LOW), _column(candles, CLOSE), period
+    )
 
 
 def apply_sl_tp_bounds(
@@ -135,24 +293,15 @@ def apply_sl_tp_bounds(
     return stop, take
 
 
-def sma_crossover(
-    candles: Sequence[Sequence[float]], short: int = 5, long: int = 20, k: float = 2.0
+def _atr_levels(
+    signal: str, price: float, atr: float, k: float
 ) -> Tuple[str, float, float]:
-    """Simple SMA crossover strategy returning signal, stop-loss and take-profit."""
+    """Return ``signal`` with ATR based stop/take bounded by ``apply_sl_tp_bounds``."""
 
-    closes = [float(c[4]) for c in candles]
-    if len(closes) < long:
-        raise ValueError("not enough data")
-    short_sma = sum(closes[-short:]) / short
-    long_sma = sum(closes[-long:]) / long
-    price = closes[-1]
-    atr = _atr_from_candles(candles)
-    if short_sma > long_sma:
-        signal = "Buy"
+    if signal == "Buy":
         stop = price - atr
         take = price + k * atr
-    elif short_sma < long_sma:
-        signal = "Sell"
+    elif signal == "Sell":
         stop = price + atr
         take = price - k * atr
     else:
@@ -161,89 +310,145 @@ def sma_crossover(
     return signal, stop, take
 
 
-def breakout(
-    candles: Sequence[Sequence[float]], lookback: int = 20, k: float = 2.0
-) -> Tuple[str, float, float]:
-    """Breakout strategy based on recent highs/lows."""
+def _crossover_signal(fast: float, slow: float) -> str:
+    if fast > slow:
+        return "Buy"
+    if fast < slow:
+        return "Sell"
+    return "Hold"
 
-    if len(candles) < lookback + 1:
-        raise ValueError("not enough data")
-    highs = [float(c[2]) for c in candles]
-    lows = [float(c[3]) for c in candles]
-    closes = [float(c[4]) for c in candles]
-    prev_high = max(highs[-(lookback + 1) : -1])
-    prev_low = min(lows[-(lookback + 1) : -1])
-    price = closes[-1]
-    atr = _atr_from_candles(candles)
+
+def _breakout_signal(price: float, prev_high: float, prev_low: float) -> str:
     if price > prev_high:
+        return "Buy"
+    if price < prev_low:
+        return "Sell"
+    return "Hold"
+
+
+def _rsi_value(avg_gain: float, avg_loss: float) -> float:
+    return 100 if avg_loss == 0 else 100 - 100 / (1 + avg_gain / avg_loss)
+
+
+def _rsi_signal(rsi: float) -> str:
+    if rsi < 30:
+        return "Buy"
+    if rsi > 70:
+        return "Sell"
+    return "Hold"
+
+
+def _mean_reversion_levels(
+    price: float, sma: float, std: float, atr: float, k: float
+) -> Tuple[str, float, float]:
+    upper = sma + k * std
+    lower = sma - k * std
+    if price < lower:
         signal = "Buy"
         stop = price - atr
-        take = price + k * atr
-    elif price < prev_low:
+    elif price > upper:
         signal = "Sell"
         stop = price + atr
-        take = price - k * atr
     else:
         return "Hold", price, price
-    stop, take = apply_sl_tp_bounds(price, signal, stop, take)
+    stop, take = apply_sl_tp_bounds(price, signal, stop, sma)
     return signal, stop, take
 
 
+def _trend_signal(ema_fast: float, ema_slow: float, rsi: float) -> str:
+    if ema_fast > ema_slow and rsi > 50:
+        return "Buy"
+    if ema_fast < ema_slow and rsi < 50:
+        return "Sell"
+    return "Hold"
+
+
+def sma_crossover(
+    candles: Sequence[Sequence[float]],
+    short: int = 5,
+    long: int = 20,
+    k: float = 2.0,
+    atr: Optional[float] = None,
+) -> Tuple[str, float, float]:
+    """Simple SMA crossover strategy returning signal, stop-loss and take-profit.
+
+    ``atr`` may be passed when already computed for the same candles.
+    """
+
+    closes = _column(candles, CLOSE)
+    if len(closes) < long:
+        raise ValueError("not enough data")
+    short_sma = sum(closes[-short:]) / short
+    long_sma = sum(closes[-long:]) / long
+    price = closes[-1]
+    atr = _atr_from_candles(candles) if atr is None else atr
+    return _atr_levels(_crossover_signal(short_sma, long_sma), price, atr, k)
+
+
+def breakout(
+    candles: Sequence[Sequence[float]],
+    lookback: int = 20,
+    k: float = 2.0,
+    atr: Optional[float] = None,
+) -> Tuple[str, float, float]:
+    """Breakout strategy based on recent highs/lows."""
+
+    if len(candles) < lookback + 1:
+        raise ValueError("not enough data")
+    highs = _column(candles, HIGH)
+    lows = _column(candles, LOW)
+    closes = _column(candles, CLOSE)
+    prev_high = max(highs[-(lookback + 1) : -1])
+    prev_low = min(lows[-(lookback + 1) : -1])
+    price = closes[-1]
+    atr = _atr_from_candles(candles) if atr is None else atr
+    return _atr_levels(_breakout_signal(price, prev_high, prev_low), price, atr, k)
+
+
 def mean_reversion(
-    candles: Sequence[Sequence[float]], period: int = 20, k: float = 2.0
+    candles: Sequence[Sequence[float]],
+    period: int = 20,
+    k: float = 2.0,
+    atr: Optional[float] = None,
 ) -> Tuple[str, float, float]:
     """Mean reversion using Bollinger bands."""
 
-    closes = [float(c[4]) for c in candles]
+    closes = _column(candles, CLOSE)
     if len(closes) < period:
         raise ValueError("not enough data")
-    sma = sum(closes[-period:]) / period
-    std = statistics.pstdev(closes[-period:])
-    upper = sma + k * std
-    lower = sma - k * std
+    window = closes[-period:]
+    sma = sum(window) / period
     price = closes[-1]
-    atr = _atr_from_candles(candles)
-    if price < lower:
-        signal = "Buy"
-        stop = price - atr
-        take = sma
-    elif price > upper:
-        signal = "Sell"
-        stop = price + atr
-        take = sma
-    else:
-        return "Hold", price, price
-    stop, take = apply_sl_tp_bounds(price, signal, stop, take)
-    return signal, stop, take
+    # std only decides which side of a band the price is on, so a float
+    # estimate is enough unless the price is within rounding distance of a
+    # band; then the correctly rounded ``pstdev`` (slow, exact) settles it
+    std = math.sqrt(sum((c - sma) ** 2 for c in window) / period)
+    tol = 1e-9 * abs(price) + 1e-12
+    if abs(price - (sma + k * std)) <= tol or abs(price - (sma - k * std)) <= tol:
+        std = statistics.pstdev(window)
+    atr = _atr_from_candles(candles) if atr is None else atr
+    return _mean_reversion_levels(price, sma, std, atr, k)
 
 
 def rsi_strategy(
-    candles: Sequence[Sequence[float]], period: int = 14, k: float = 2.0
+    candles: Sequence[Sequence[float]],
+    period: int = 14,
+    k: float = 2.0,
+    atr: Optional[float] = None,
 ) -> Tuple[str, float, float]:
     """RSI overbought/oversold strategy."""
 
-    closes = [float(c[4]) for c in candles]
+    closes = _column(candles, CLOSE)
     if len(closes) < period + 1:
         raise ValueError("not enough data")
-    gains = [max(closes[i] - closes[i - 1], 0) for i in range(1, len(closes))]
-    losses = [max(closes[i - 1] - closes[i], 0) for i in range(1, len(closes))]
-    avg_gain = sum(gains[-period:]) / period
-    avg_loss = sum(losses[-period:]) / period
-    rsi = 100 if avg_loss == 0 else 100 - 100 / (1 + avg_gain / avg_loss)
+    # only the newest ``period`` changes are averaged
+    recent = range(len(closes) - period, len(closes))
+    avg_gain = sum([max(closes[i] - closes[i - 1], 0) for i in recent]) / period
+    avg_loss = sum([max(closes[i - 1] - closes[i], 0) for i in recent]) / period
+    rsi = _rsi_value(avg_gain, avg_loss)
     price = closes[-1]
-    atr = _atr_from_candles(candles)
-    if rsi < 30:
-        signal = "Buy"
-        stop = price - atr
-        take = price + k * atr
-    elif rsi > 70:
-        signal = "Sell"
-        stop = price + atr
-        take = price - k * atr
-    else:
-        return "Hold", price, price
-    stop, take = apply_sl_tp_bounds(price, signal, stop, take)
-    return signal, stop, take
+    atr = _atr_from_candles(candles) if atr is None else atr
+    return _atr_levels(_rsi_signal(rsi), price, atr, k)
 
 
 def select_strategy(
@@ -322,7 +527,7 @@ def log_performance_metrics(
 
 
 def half_year_strategy(
-    candles: Sequence[Sequence[float]], k: float = 2.0
+    candles: Sequence[Sequence[float]], k: float = 2.0, atr: Optional[float] = None
 ) -> Tuple[str, float, float]:
     """Return trade signal with stop-loss and take-profit from 6 month data.
 
@@ -331,16 +536,15 @@ def half_year_strategy(
 
     and computes ATR14 for volatility. ATR is converted to an equivalent 5-minute value
     by dividing by ``48`` so that stop-loss uses ``±ATR_5m`` and take-profit uses
-    ``±k*ATR_5m`` depending on the trade direction.
+    ``±k*ATR_5m`` depending on the trade direction. ``atr`` may be passed when
+    the 4-hour ATR14 is already known.
 
     """
 
     if len(candles) < 200:
         raise ValueError("need at least 200 candles")
 
-    closes = [float(c[4]) for c in candles]
-    highs = [float(c[2]) for c in candles]
-    lows = [float(c[3]) for c in candles]
+    closes = _column(candles, CLOSE)
 
     def ema(values: Sequence[float], period: int) -> float:
         factor = 2 / (period + 1)
@@ -360,40 +564,14 @@ def half_year_strategy(
         avg_loss = sum(losses[-period:]) / period
         if avg_loss == 0:
             return 100.0
-        rs = avg_gain / avg_loss
-        return 100 - 100 / (1 + rs)
-
-    def atr(high: Sequence[float], low: Sequence[float], close: Sequence[float], period: int = 14) -> float:
-        trs = []
-        for i in range(1, len(close)):
-            tr = max(
-                high[i] - low[i],
-                abs(high[i] - close[i - 1]),
-                abs(low[i] - close[i - 1]),
-            )
-            trs.append(tr)
-        return sum(trs[-period:]) / period
+        return _rsi_value(avg_gain, avg_loss)
 
     ema50 = ema(closes, 50)
     ema200 = ema(closes, 200)
     rsi_val = rsi(closes)
-    atr_val = atr(highs, lows, closes)
+    atr_val = _atr_from_candles(candles) if atr is None else atr
 
     atr_5m = atr_val / 48  # convert 4h ATR to 5m equivalent
 
     price = closes[-1]
-
-    if ema50 > ema200 and rsi_val > 50:
-        signal = "Buy"
-        stop = price - atr_5m
-        take = price + k * atr_5m
-    elif ema50 < ema200 and rsi_val < 50:
-        signal = "Sell"
-        stop = price + atr_5m
-        take = price - k * atr_5m
-    else:
-        signal = "Hold"
-        stop = take = price
-        return signal, stop, take
-    stop, take = apply_sl_tp_bounds(price, signal, stop, take)
-    return signal, stop, take
+    return _atr_levels(_trend_signal(ema50, ema200, rsi_val), price, atr_5m, k)
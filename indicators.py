@@ -0,0 +1,377 @@
+"""Incremental indicators updated in O(1) per bar.
+
+Each indicator keeps just enough state to produce its next value from a new
+observation, so strategies can be re-evaluated on every tick without
+rebuilding lists from the whole candle window. The formulas mirror the
+stateless helpers in ``functions.py``; the ``*Stream`` classes at the bottom
+wrap them into strategies returning the same ``(signal, stop, take)`` tuples.
+
+This module is a library: the bot's polling and streaming paths still call
+the stateless strategies through ``strategies.StrategyRunner``.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+import math
+import operator
+from typing import Callable, Deque, Optional, Sequence, Tuple
+
+from functions import (
+    _atr_levels,
+    _breakout_signal,
+    _crossover_signal,
+    _mean_reversion_levels,
+    _rsi_signal,
+    _rsi_value,
+    _trend_signal,
+)
+
+__all__ = [
+    "SMA",
+    "EMA",
+    "RSI",
+    "ATR",
+    "RollingStd",
+    "RollingMax",
+    "RollingMin",
+    "SmaCrossoverStream",
+    "BreakoutStream",
+    "MeanReversionStream",
+    "RsiStream",
+    "HalfYearStream",
+]
+
+
+class SMA:
+    """Simple moving average over the last ``period`` values."""
+
+    def __init__(self, period: int):
+        if period <= 0:
+            raise ValueError("period must be positive")
+        self.period = period
+        self._window: Deque[float] = deque()
+        self._sum = 0.0
+        self._updates = 0
+        self.value: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.value is not None
+
+    def update(self, x: float) -> Optional[float]:
+        self._window.append(x)
+        self._sum += x
+        if len(self._window) > self.period:
+            self._sum -= self._window.popleft()
+        self._updates += 1
+        # Re-sum periodically so add/subtract rounding errors do not build up
+        if self._updates % (self.period * 64) == 0:
+            self._sum = sum(self._window)
+        if len(self._window) == self.period:
+            self.value = self._sum / self.period
+        return self.value
+
+
+class EMA:
+    """Exponential moving average seeded with the first value.
+
+    Without ``window`` this is the usual recursive EMA over the whole stream.
+    With ``window`` the value equals an EMA restarted at the first of the last
+    ``window`` values, which is what ``half_year_strategy`` computes on its
+    candle list; the seed term is slid forward in O(1).
+    """
+
+    def __init__(self, period: int, window: Optional[int] = None):
+        if period <= 0:
+            raise ValueError("period must be positive")
+        if window is not None and window <= 0:
+            raise ValueError("window must be positive")
+        self.period = period
+        self.window = window
+        self._factor = 2 / (period + 1)
+        self._decay = 1 - self._factor
+        self._seed_weight = self._decay ** ((window or 1) - 1)
+        self._values: Deque[float] = deque()
+        self._tail = 0.0  # weighted sum of all values after the seed
+        self.value: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        if self.window is None:
+            return self.value is not None
+        return len(self._values) == self.window
+
+    def update(self, x: float) -> Optional[float]:
+        if self.window is None:
+            if self.value is None:
+                self.value = x
+            else:
+                self.value = x * self._factor + self.value * self._decay
+            return self.value
+        self._values.append(x)
+        if len(self._values) == 1:
+            self.value = x
+            return self.value
+        self._tail = self._tail * self._decay + x * self._factor
+        if len(self._values) > self.window:
+            self._values.popleft()
+            # the new seed no longer belongs to the weighted tail
+            self._tail -= self._values[0] * self._factor * self._seed_weight
+        seed = self._values[0] * self._decay ** (len(self._values) - 1)
+        self.value = seed + self._tail
+        return self.value
+
+
+class RSI:
+    """Relative Strength Index over closing prices.
+
+    The default averages the last ``period`` gains and losses like
+    ``rsi_strategy``; ``wilder=True`` switches to Wilder's smoothing.
+    """
+
+    def __init__(self, period: int = 14, wilder: bool = False):
+        if period <= 0:
+            raise ValueError("period must be positive")
+        self.period = period
+        self.wilder = wilder
+        self._prev: Optional[float] = None
+        self._gains = SMA(period)
+        self._losses = SMA(period)
+        self._avg_gain: Optional[float] = None
+        self._avg_loss: Optional[float] = None
+        self.value: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.value is not None
+
+    def update(self, close: float) -> Optional[float]:
+        prev, self._prev = self._prev, close
+        if prev is None:
+            return None
+        gain = max(close - prev, 0)
+        loss = max(prev - close, 0)
+        if self.wilder and self._avg_gain is not None:
+            self._avg_gain = (self._avg_gain * (self.period - 1) + gain) / self.period
+            self._avg_loss = (self._avg_loss * (self.period - 1) + loss) / self.period
+        else:
+            self._avg_gain = self._gains.update(gain)
+            self._avg_loss = self._losses.update(loss)
+        if self._avg_gain is not None:
+            self.value = _rsi_value(self._avg_gain, self._avg_loss)
+        return self.value
+
+
+class ATR:
+    """Average True Range matching ``_atr_from_candles``.
+
+    The default is the mean of the last ``period`` true ranges;
+    ``wilder=True`` switches to Wilder's smoothing.
+    """
+
+    def __init__(self, period: int = 14, wilder: bool = False):
+        if period <= 0:
+            raise ValueError("period must be positive")
+        self.period = period
+        self.wilder = wilder
+        self._prev_close: Optional[float] = None
+        self._trs = SMA(period)
+        self.value: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.value is not None
+
+    def update(self, high: float, low: float, close: float) -> Optional[float]:
+        prev, self._prev_close = self._prev_close, close
+        if prev is None:
+            return None
+        tr = max(high - low, abs(high - prev), abs(low - prev))
+        if self.wilder and self.value is not None:
+            self.value = (self.value * (self.period - 1) + tr) / self.period
+        else:
+            self.value = self._trs.update(tr)
+        return self.value
+
+
+class RollingStd:
+    """Population standard deviation of the last ``period`` values."""
+
+    def __init__(self, period: int):
+        if period <= 0:
+            raise ValueError("period must be positive")
+        self.period = period
+        self._window: Deque[float] = deque()
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._updates = 0
+        self.value: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.value is not None
+
+    def update(self, x: float) -> Optional[float]:
+        self._window.append(x)
+        if len(self._window) > self.period:
+            old = self._window.popleft()
+            mean = self._mean + (x - old) / self.period
+            self._m2 += (x - old) * (x - mean + old - self._mean)
+            self._mean = mean
+        else:
+            delta = x - self._mean
+            self._mean += delta / len(self._window)
+            self._m2 += delta * (x - self._mean)
+        self._updates += 1
+        if self._updates % (self.period * 64) == 0:
+            self._mean = sum(self._window) / len(self._window)
+            self._m2 = sum((v - self._mean) ** 2 for v in self._window)
+        if len(self._window) == self.period:
+            self.value = math.sqrt(max(self._m2, 0.0) / self.period)
+        return self.value
+
+
+class _RollingExtreme:
+    """Monotonic deque keeping the window extreme in amortised O(1).
+
+    ``dominates(a, b)`` is true when ``a`` beats ``b`` as the extreme.
+    """
+
+    def __init__(self, period: int, dominates: Callable[[float, float], bool]):
+        if period <= 0:
+            raise ValueError("period must be positive")
+        self.period = period
+        self._dominates = dominates
+        self._items: Deque[Tuple[int, float]] = deque()
+        self._count = 0
+        self.value: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.value is not None
+
+    def update(self, x: float) -> Optional[float]:
+        while self._items and not self._dominates(self._items[-1][1], x):
+            self._items.pop()
+        self._items.append((self._count, x))
+        if self._items[0][0] <= self._count - self.period:
+            self._items.popleft()
+        self._count += 1
+        if self._count >= self.period:
+            self.value = self._items[0][1]
+        return self.value
+
+
+class RollingMax(_RollingExtreme):
+    """Maximum of the last ``period`` values."""
+
+    def __init__(self, period: int):
+        super().__init__(period, operator.gt)
+
+
+class RollingMin(_RollingExtreme):
+    """Minimum of the last ``period`` values."""
+
+    def __init__(self, period: int):
+        super().__init__(period, operator.lt)
+
+
+# Streaming strategies. ``update`` takes one ``[ts, open, high, low, close, volume]``
+# candle and returns ``(signal, stop, take)`` once enough bars have been seen,
+# matching the stateless function evaluated on a window ending at that bar.
+
+
+class SmaCrossoverStream:
+    def __init__(self, short: int = 5, long: int = 20, k: float = 2.0, atr_period: int = 14):
+        self.k = k
+        self.short = SMA(short)
+        self.long = SMA(long)
+        self.atr = ATR(atr_period)
+
+    def update(self, candle: Sequence[float]) -> Optional[Tuple[str, float, float]]:
+        close = float(candle[4])
+        self.short.update(close)
+        self.long.update(close)
+        self.atr.update(float(candle[2]), float(candle[3]), close)
+        if not (self.long.ready and self.atr.ready):
+            return None
+        signal = _crossover_signal(self.short.value, self.long.value)
+        return _atr_levels(signal, close, self.atr.value, self.k)
+
+
+class BreakoutStream:
+    def __init__(self, lookback: int = 20, k: float = 2.0, atr_period: int = 14):
+        self.k = k
+        self.highs = RollingMax(lookback)
+        self.lows = RollingMin(lookback)
+        self.atr = ATR(atr_period)
+
+    def update(self, candle: Sequence[float]) -> Optional[Tuple[str, float, float]]:
+        high, low, close = float(candle[2]), float(candle[3]), float(candle[4])
+        # the breakout levels exclude the current bar
+        prev_high, prev_low = self.highs.value, self.lows.value
+        self.highs.update(high)
+        self.lows.update(low)
+        self.atr.update(high, low, close)
+        if prev_high is None or not self.atr.ready:
+            return None
+        signal = _breakout_signal(close, prev_high, prev_low)
+        return _atr_levels(signal, close, self.atr.value, self.k)
+
+
+class MeanReversionStream:
+    def __init__(self, period: int = 20, k: float = 2.0, atr_period: int = 14):
+        self.k = k
+        self.sma = SMA(period)
+        self.std = RollingStd(period)
+        self.atr = ATR(atr_period)
+
+    def update(self, candle: Sequence[float]) -> Optional[Tuple[str, float, float]]:
+        close = float(candle[4])
+        self.sma.update(close)
+        self.std.update(close)
+        self.atr.update(float(candle[2]), float(candle[3]), close)
+        if not (self.sma.ready and self.atr.ready):
+            return None
+        return _mean_reversion_levels(
+            close, self.sma.value, self.std.value, self.atr.value, self.k
+        )
+
+
+class RsiStream:
+    def __init__(self, period: int = 14, k: float = 2.0, atr_period: int = 14):
+        self.k = k
+        self.rsi = RSI(period)
+        self.atr = ATR(atr_period)
+
+    def update(self, candle: Sequence[float]) -> Optional[Tuple[str, float, float]]:
+        close = float(candle[4])
+        self.rsi.update(close)
+        self.atr.update(float(candle[2]), float(candle[3]), close)
+        if not (self.rsi.ready and self.atr.ready):
+            return None
+        return _atr_levels(_rsi_signal(self.rsi.value), close, self.atr.value, self.k)
+
+
+class HalfYearStream:
+    """Streaming ``half_year_strategy`` over a sliding ``window`` of 4h bars."""
+
+    def __init__(self, k: float = 2.0, window: int = 200):
+        self.k = k
+        self.window = window
+        self.ema_fast = EMA(50, window=window)
+        self.ema_slow = EMA(200, window=window)
+        self.rsi = RSI(14)
+        self.atr = ATR(14)
+
+    def update(self, candle: Sequence[float]) -> Optional[Tuple[str, float, float]]:
+        close = float(candle[4])
+        self.ema_fast.update(close)
+        self.ema_slow.update(close)
+        self.rsi.update(close)
+        self.atr.update(float(candle[2]), float(candle[3]), close)
+        if not self.ema_slow.ready:
+            return None
+        signal = _trend_signal(self.ema_fast.value, self.ema_slow.value, self.rsi.value)
+        return _atr_levels(signal, close, self.atr.value / 48, self.k)
@@ -0,0 +1,138 @@
+"""Shared cache of Bybit linear instrument metadata.
+
+``InstrumentRegistry`` loads every linear instrument with a single paginated
+``get_instruments_info`` call and keeps the lot and price filters already
+parsed into floats and ``Decimal`` steps, so order formatting never parses
+strings or waits on the network. ``start`` refreshes the registry in a
+background thread; symbols that were never loaded are fetched on first use.
+One registry can be shared by several ``BybitTradingBot`` instances.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Callable, Dict, Optional, Tuple
+
+__all__ = ["Instrument", "InstrumentRegistry"]
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Instrument:
+    """Pre-parsed lot size and price filters of one instrument."""
+
+    symbol: str
+    qty_step: float
+    min_qty: float
+    tick: float
+    d_qty_step: Decimal
+    d_min_qty: Decimal
+    d_tick: Decimal
+    info: dict
+
+    @classmethod
+    def from_info(cls, info: dict) -> "Instrument":
+        lot = info.get("lotSizeFilter", {})
+        price = info.get("priceFilter", {})
+        step = float(lot.get("qtyStep", 1))
+        min_qty = float(lot.get("minOrderQty", step))
+        tick = float(price.get("tickSize", 0.01))
+        return cls(
+            symbol=info.get("symbol", ""),
+            qty_step=step,
+            min_qty=min_qty,
+            tick=tick,
+            d_qty_step=Decimal(str(step)),
+            d_min_qty=Decimal(str(min_qty)),
+            d_tick=Decimal(str(tick)),
+            info=info,
+        )
+
+
+class InstrumentRegistry:
+    """Thread-safe symbol -> ``Instrument`` map with TTL based refresh."""
+
+    def __init__(
+        self,
+        session,
+        ttl: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.session = session
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._items: Dict[str, Tuple[float, Instrument]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def load(self) -> int:
+        """Fetch all linear instruments in bulk and return how many were loaded."""
+        loaded: Dict[str, Tuple[float, Instrument]] = {}
+        cursor = ""
+        while True:
+            params = {"category": "linear", "limit": 1000}
+            if cursor:
+                params["cursor"] = cursor
+            result = self.session.get_instruments_info(**params).get("result", {})
+            now = self._clock()
+            for info in result.get("list", []):
+                if info.get("symbol"):
+                    loaded[info["symbol"]] = (now, Instrument.from_info(info))
+            cursor = result.get("nextPageCursor", "")
+            if not cursor:
+                break
+        with self._lock:
+            self._items.update(loaded)
+        return len(loaded)
+
+    def _fetch(self, symbol: str) -> Instrument:
+        result = self.session.get_instruments_info(category="linear", symbol=symbol)
+        info = result.get("result", {}).get("list", [{}])[0]
+        instrument = Instrument.from_info(info)
+        with self._lock:
+            self._items[symbol] = (self._clock(), instrument)
+        return instrument
+
+    def get(self, symbol: str) -> Instrument:
+        """Return the instrument, fetching it when unknown or older than ``ttl``.
+
+        While the background refresher runs, entries never expire on the
+        caller's path.
+        """
+        with self._lock:
+            entry = self._items.get(symbol)
+        if entry is not None:
+            loaded_at, instrument = entry
+            if self._thread is not None or self._clock() - loaded_at < self.ttl:
+                return instrument
+        return self._fetch(symbol)
+
+    def start(self) -> None:
+        """Load now and keep refreshing every ``ttl`` seconds in the background."""
+        if self._thread is not None:
+            return
+        self.load()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="instrument-refresh", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.ttl):
+            try:
+                self.load()
+            except Exception as exc:  # keep the last good data
+                logger.error("instrument refresh failed: %s", exc)
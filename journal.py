@@ -0,0 +1,303 @@
+"""SQLite journal of trading decisions with query and replay tools.
+
+Every decision taken by ``BybitTradingBot.trade_strategy``,
+``trade_half_year`` and ``trade_with_signals`` becomes one row: the candles
+the strategy saw (packed float64, zlib-compressed) and their hash, indicator
+values, the signal with SL/TP, the order response or error and timings.
+Rows are buffered and written in one transaction per ``flush``; indexes on
+``(symbol, strategy, ts)``, ``(strategy, ts)``, ``(signal, ts)`` and ``(ts)``
+keep filtered queries fast on millions of records.
+
+``replay`` decodes the stored candles and runs the same strategy again,
+looked up by name in ``strategies.REGISTRY`` and called with the keyword
+arguments the decision recorded, so a decision can be reproduced without
+network access::
+
+    python journal.py query --symbol BTCUSDT --strategy sma_crossover --since 2024-05-01
+    python journal.py replay 1234
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from array import array
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence
+
+from candle_series import CandleSeries
+from strategies import REGISTRY
+
+__all__ = ["DecisionJournal", "pack_candles", "unpack_candles", "replay"]
+
+FIELDS = 6
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS decisions (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    symbol TEXT NOT NULL,
+    strategy TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    signal TEXT NOT NULL,
+    price REAL,
+    stop_loss REAL,
+    take_profit REAL,
+    inputs_hash TEXT NOT NULL,
+    inputs BLOB NOT NULL,
+    indicators TEXT,
+    response TEXT,
+    error TEXT,
+    decision_ms REAL,
+    total_ms REAL
+);
+CREATE INDEX IF NOT EXISTS decisions_symbol ON decisions (symbol, strategy, ts);
+CREATE INDEX IF NOT EXISTS decisions_strategy ON decisions (strategy, ts);
+CREATE INDEX IF NOT EXISTS decisions_signal ON decisions (signal, ts);
+CREATE INDEX IF NOT EXISTS decisions_ts ON decisions (ts);
+"""
+
+COLUMNS = (
+    "ts", "symbol", "strategy", "interval", "signal", "price", "stop_loss",
+    "take_profit", "inputs_hash", "inputs", "indicators", "response", "error",
+    "decision_ms", "total_ms",
+)
+
+
+def pack_candles(candles: Sequence[Sequence[float]]) -> tuple[bytes, str]:
+    """Return compressed ``[ts, o, h, l, c, v]`` rows and their SHA-256 prefix."""
+
+    if isinstance(candles, CandleSeries):
+        raw = candles.tobytes()
+    else:
+        raw = array("d", (float(x) for c in candles for x in c[:FIELDS])).tobytes()
+    return zlib.compress(raw, 1), hashlib.sha256(raw).hexdigest()[:16]
+
+
+def unpack_candles(blob: bytes) -> List[List[float]]:
+    values = array("d")
+    values.frombytes(zlib.decompress(blob))
+    return [values[i : i + FIELDS].tolist() for i in range(0, len(values), FIELDS)]
+
+
+class DecisionJournal:
+    """Buffered writer and reader of the ``decisions`` table."""
+
+    def __init__(self, path: str | Path = "journal.sqlite3", flush_every: int = 100):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_every = flush_every
+        self._lock = threading.Lock()
+        self._pending: List[tuple] = []
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def record(
+        self,
+        symbol: str,
+        strategy: str,
+        interval: int | str,
+        candles: Sequence[Sequence[float]],
+        signal: str,
+        price: Optional[float] = None,
+        stop_loss: Optional[float] = None,
+        take_profit: Optional[float] = None,
+        indicators: Optional[dict] = None,
+        response: Optional[dict] = None,
+        error: Optional[str] = None,
+        decision_ms: Optional[float] = None,
+        total_ms: Optional[float] = None,
+        ts: Optional[float] = None,
+    ) -> None:
+        """Queue one decision; rows are written every ``flush_every`` records."""
+
+        blob, digest = pack_candles(candles)
+        row = (
+            time.time() if ts is None else ts,
+            symbol,
+            strategy,
+            str(interval),
+            signal,
+            price,
+            stop_loss,
+            take_profit,
+            digest,
+            blob,
+            json.dumps(indicators, default=str) if indicators else None,
+            json.dumps(response, default=str) if response is not None else None,
+            error,
+            decision_ms,
+            total_ms,
+        )
+        with self._lock:
+            self._pending.append(row)
+            if len(self._pending) >= self.flush_every:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._pending:
+            return
+        placeholders = ", ".join("?" * len(COLUMNS))
+        with self._conn:
+            self._conn.executemany(
+                f"INSERT INTO decisions ({', '.join(COLUMNS)}) VALUES ({placeholders})",
+                self._pending,
+            )
+        self._pending.clear()
+
+    def close(self) -> None:
+        self.flush()
+        self._conn.close()
+
+    def query(
+        self,
+        symbol: Optional[str] = None,
+        strategy: Optional[str] = None,
+        signal: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: Optional[int] = 100,
+    ) -> Iterator[dict]:
+        """Yield decisions (without the candle blob), newest first."""
+
+        clauses, params = [], []
+        for column, value in (("symbol", symbol), ("strategy", strategy), ("signal", signal)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(until)
+        sql = (
+            "SELECT id, ts, symbol, strategy, interval, signal, price, stop_loss, take_profit, "
+            "inputs_hash, indicators, response, error, decision_ms, total_ms FROM decisions"
+        )
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY ts DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        self.flush()
+        cursor = self._conn.execute(sql, params)
+        names = [d[0] for d in cursor.description]
+        for row in cursor:
+            yield dict(zip(names, row))
+
+    def get(self, decision_id: int) -> Optional[dict]:
+        """Return one decision including its decoded ``candles``."""
+
+        self.flush()
+        cursor = self._conn.execute("SELECT * FROM decisions WHERE id = ?", (decision_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        record = dict(zip([d[0] for d in cursor.description], row))
+        record["candles"] = unpack_candles(record.pop("inputs"))
+        return record
+
+
+class _ReplaySession:
+    """Minimal session serving stored candles to a ``BybitTradingBot``."""
+
+    def __init__(self, candles: List[List[float]]):
+        self._rows = [[str(x) for x in c] for c in reversed(candles)]
+
+    def get_kline(self, limit: int = 200, **_) -> dict:
+        return {"result": {"list": self._rows[:limit]}}
+
+
+def replay(record: dict) -> dict:
+    """Re-run the strategy of ``record`` on its stored candles.
+
+    Returns the stored and replayed ``(signal, stop_loss, take_profit)`` and
+    whether they match exactly.
+    """
+
+    candles = record["candles"]
+    name = record["strategy"]
+    stored = (record["signal"], record["stop_loss"], record["take_profit"])
+    if name == "combined_signal":
+        from bot import BybitTradingBot
+
+        bot = BybitTradingBot(_ReplaySession(candles))
+        signal, _ma, _rsi = bot.combined_signal(record["symbol"])
+        # SL/TP of this path come from live price and ATR, only the signal is replayable
+        stored = (record["signal"], None, None)
+        replayed = (signal, None, None)
+    else:
+        # the registered function with its params, plus the keyword
+        # arguments the decision recorded (params and shared indicators)
+        spec = REGISTRY.get(name)
+        kwargs = {**spec.params, **json.loads(record.get("indicators") or "{}")}
+        replayed = tuple(spec.func(candles, **kwargs))
+    return {"stored": stored, "replayed": replayed, "match": stored == replayed}
+
+
+def _parse_time(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        from datetime import datetime, timezone
+
+        parsed = datetime.fromisoformat(value)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Query and replay the decision journal")
+    parser.add_argument("--db", default="journal.sqlite3", help="Journal database")
+    sub = parser.add_subparsers(dest="command", required=True)
+    query = sub.add_parser("query", help="List decisions as JSON lines, newest first")
+    query.add_argument("--symbol")
+    query.add_argument("--strategy")
+    query.add_argument("--signal")
+    query.add_argument("--since", help="Unix seconds or ISO date")
+    query.add_argument("--until", help="Unix seconds or ISO date")
+    query.add_argument("--limit", type=int, default=100)
+    rep = sub.add_parser("replay", help="Re-run a stored decision")
+    rep.add_argument("id", type=int)
+    args = parser.parse_args(argv)
+
+    journal = DecisionJournal(args.db)
+    try:
+        if args.command == "query":
+            for row in journal.query(
+                symbol=args.symbol,
+                strategy=args.strategy,
+                signal=args.signal,
+                since=_parse_time(args.since),
+                until=_parse_time(args.until),
+                limit=args.limit,
+            ):
+                print(json.dumps(row))
+        else:
+            record = journal.get(args.id)
+            if record is None:
+                parser.exit(1, f"decision {args.id} not found\n")
+            print(json.dumps(replay(record)))
+    finally:
+        journal.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Streaming market data from Bybit public WebSocket topics.
+
+``MarketStream`` subscribes to ``kline.{interval}.{symbol}`` and
+``tickers.{symbol}`` through a pybit ``WebSocket`` (or any object with the
+same ``kline_stream``/``ticker_stream`` methods), keeps a rolling buffer of
+candles per ``(symbol, interval)`` and the last traded price per symbol.
+Buffers hold closed bars plus the forming one, mirroring what ``get_kline``
+returns, so ``BybitTradingBot`` can read them instead of polling REST.
+``on_bar_close`` is called when Bybit confirms a bar, which is the moment to
+re-evaluate strategies.
+
+A message whose bar starts more than one interval after the newest buffered
+bar (a dropped connection, missed messages) leaves a hole in the buffer. The
+buffer is then marked as gapped: ``candles`` returns ``None`` for it, so
+readers fall back to REST, and ``on_gap`` is called so the owner can re-seed
+it (again on every bar close until it succeeds). ``seed`` clears the mark
+once the seeded bars join up with what was streamed meanwhile.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from itertools import islice
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+__all__ = ["MarketStream"]
+
+logger = logging.getLogger(__name__)
+
+
+class MarketStream:
+    """Rolling candle buffers and last prices fed by WebSocket messages."""
+
+    def __init__(
+        self,
+        symbols: Iterable[str],
+        intervals: Iterable[int] = (5,),
+        maxlen: int = 500,
+        stale_after: float = 60.0,
+        on_bar_close: Optional[Callable[[str, int], None]] = None,
+        clock: Callable[[], float] = time.time,
+        on_gap: Optional[Callable[[str, int], None]] = None,
+    ):
+        self.symbols = list(symbols)
+        self.intervals = list(intervals)
+        self.stale_after = stale_after
+        self.maxlen = maxlen
+        self.on_bar_close = on_bar_close
+        self.on_gap = on_gap
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._candles: Dict[Tuple[str, int], Deque[List[float]]] = {
+            (s, i): deque(maxlen=maxlen) for s in self.symbols for i in self.intervals
+        }
+        self._updated: Dict[Tuple[str, int], float] = {}
+        self._gapped: Set[Tuple[str, int]] = set()
+        self._prices: Dict[str, Tuple[float, float]] = {}
+
+    def subscribe(self, ws) -> None:
+        """Register kline and ticker callbacks on a pybit ``WebSocket``."""
+        for interval in self.intervals:
+            ws.kline_stream(interval=interval, symbol=self.symbols, callback=self.handle_kline)
+        ws.ticker_stream(symbol=self.symbols, callback=self.handle_ticker)
+
+    def seed(self, symbol: str, interval: int, candles: Sequence[Sequence[float]]) -> None:
+        """Fill the buffer with chronological candles, e.g. from REST or the store.
+
+        Streamed candles newer than the last seeded one are kept, so a re-seed
+        after a gap does not lose bars that arrived while it was fetched.
+        """
+        key = (symbol, interval)
+        rows = [list(map(float, c[:6])) for c in candles]
+        with self._lock:
+            buffer = self._candles.setdefault(key, deque(maxlen=self.maxlen))
+            if rows:
+                newer = [c for c in buffer if c[0] >= rows[-1][0]]
+                if newer and newer[0][0] == rows[-1][0]:
+                    rows.pop()  # the streamed copy of that bar is fresher
+                buffer.clear()
+                buffer.extend(rows)
+                buffer.extend(newer)
+                joined = [c[0] for c in rows[-1:] + newer]
+                interval_ms = int(interval) * 60_000
+                if any(b - a > interval_ms for a, b in zip(joined, joined[1:])):
+                    self._gapped.add(key)
+                else:
+                    self._gapped.discard(key)
+            self._updated[key] = self._clock()
+
+    def handle_kline(self, message: dict) -> None:
+        """Apply a ``kline.{interval}.{symbol}`` message."""
+        _, interval, symbol = message.get("topic", "..").split(".", 2)
+        key = (symbol, int(interval))
+        interval_ms = int(interval) * 60_000
+        closed = False
+        gap = False
+        with self._lock:
+            buffer = self._candles.get(key)
+            if buffer is None:
+                return
+            for item in message.get("data", []):
+                candle = [
+                    float(item["start"]),
+                    float(item["open"]),
+                    float(item["high"]),
+                    float(item["low"]),
+                    float(item["close"]),
+                    float(item["volume"]),
+                ]
+                if buffer and buffer[-1][0] == candle[0]:
+                    buffer[-1] = candle
+                elif not buffer or buffer[-1][0] < candle[0]:
+                    if buffer and candle[0] > buffer[-1][0] + interval_ms and key not in self._gapped:
+                        self._gapped.add(key)
+                        gap = True
+                    buffer.append(candle)
+                closed = closed or bool(item.get("confirm"))
+            self._updated[key] = self._clock()
+            # a re-seed that failed is retried on the next bar close
+            reseed = gap or (closed and key in self._gapped)
+        if gap:
+            logger.warning("%s: %s kline stream skipped bars, buffer needs a re-seed", symbol, interval)
+        if reseed:
+            if self.on_gap is not None:
+                try:
+                    self.on_gap(symbol, int(interval))
+                except Exception as exc:
+                    logger.error("%s: gap handler failed: %s", symbol, exc)
+        if closed and self.on_bar_close is not None:
+            try:
+                self.on_bar_close(symbol, int(interval))
+            except Exception as exc:
+                logger.error("%s: bar close handler failed: %s", symbol, exc)
+
+    def handle_ticker(self, message: dict) -> None:
+        """Apply a ``tickers.{symbol}`` snapshot or delta message."""
+        data = message.get("data", {})
+        price = data.get("lastPrice")
+        if price is None:
+            return
+        symbol = data.get("symbol") or message.get("topic", "").split(".", 1)[-1]
+        with self._lock:
+            self._prices[symbol] = (float(price), self._clock())
+
+    def candles(self, symbol: str, interval: int | str, limit: int) -> Optional[List[List[float]]]:
+        """Return the newest ``limit`` candles, or ``None`` if short, stale or gapped."""
+        try:
+            key = (symbol, int(interval))
+        except ValueError:
+            return None
+        with self._lock:
+            buffer = self._candles.get(key)
+            updated = self._updated.get(key)
+            if not buffer or len(buffer) < limit or updated is None or key in self._gapped:
+                return None
+            if self._clock() - updated > self.stale_after:
+                return None
+            return list(islice(buffer, len(buffer) - limit, None))
+
+    def last_price(self, symbol: str) -> Optional[float]:
+        """Return the last traded price unless it is older than ``stale_after``."""
+        with self._lock:
+            entry = self._prices.get(symbol)
+        if entry is None or self._clock() - entry[1] > self.stale_after:
+            return None
+        return entry[0]
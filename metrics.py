@@ -0,0 +1,266 @@
+"""In-process latency metrics for the trading loop.
+
+``MetricsRegistry`` keeps one log-bucketed ``Histogram`` per name (for
+example ``api.get_kline`` or ``strategy.sma_crossover``) together with call
+and error counts. Recording is a ``perf_counter`` pair, a bisect and a few
+integer increments under a lock, so timers can wrap every API call and
+strategy run. ``InstrumentedSession`` wraps a pybit ``HTTP`` session and times
+each method call; ``MetricsExporter`` periodically writes a JSON snapshot to a
+file and/or serves Prometheus text on ``/metrics``.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+__all__ = [
+    "Histogram",
+    "MetricsRegistry",
+    "InstrumentedSession",
+    "MetricsExporter",
+]
+
+logger = logging.getLogger(__name__)
+
+# 100 µs .. ~105 s, four buckets per doubling (~19% relative error)
+BUCKETS: List[float] = [1e-4 * 2 ** (i / 4) for i in range(81)]
+
+
+class Histogram:
+    """Latency histogram with fixed logarithmic buckets."""
+
+    __slots__ = ("counts", "count", "errors", "total", "max")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float, error: bool = False) -> None:
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        if error:
+            self.errors += 1
+
+    def quantile(self, q: float) -> float:
+        """Return the upper bound of the bucket holding quantile ``q``."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return min(BUCKETS[index], self.max) if index < len(BUCKETS) else self.max
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "sum": self.total,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class _Timer:
+    """Context manager behind ``MetricsRegistry.timer``.
+
+    A plain class rather than ``@contextmanager``: it wraps every API call and
+    strategy run, and a generator per block is measurably slower.
+    """
+
+    __slots__ = ("registry", "name", "started")
+
+    def __init__(self, registry: "MetricsRegistry", name: str):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.started = time.perf_counter()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.registry.observe(self.name, time.perf_counter() - self.started, error=exc_type is not None)
+
+
+class MetricsRegistry:
+    """Thread-safe collection of named latency histograms."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Histogram] = {}
+
+    def observe(self, name: str, seconds: float, error: bool = False) -> None:
+        with self._lock:
+            hist = self._histograms.get(name)
+            if hist is None:
+                hist = self._histograms[name] = Histogram()
+            hist.observe(seconds, error)
+
+    def timer(self, name: str) -> "_Timer":
+        """Time the block; exceptions are counted as errors and re-raised."""
+        return _Timer(self, name)
+
+    def timed(self, name: Optional[str] = None) -> Callable:
+        """Decorator form of :meth:`timer`, defaulting to the function name."""
+
+        def decorate(func: Callable) -> Callable:
+            label = name or func.__name__
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(label):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorate
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Return ``{name: summary}`` for every recorded histogram."""
+        with self._lock:
+            return {name: h.summary() for name, h in sorted(self._histograms.items())}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+    def export_json(self, path: str | Path) -> None:
+        """Atomically write the snapshot to ``path``."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"time": time.time(), "metrics": self.snapshot()}
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def to_prometheus(self, prefix: str = "bybit_bot") -> str:
+        """Render the snapshot in Prometheus text exposition format."""
+        lines = [
+            f"# TYPE {prefix}_latency_seconds summary",
+            f"# TYPE {prefix}_errors_total counter",
+        ]
+        for name, s in self.snapshot().items():
+            label = f'name="{name}"'
+            for q, key in (("0.5", "p50"), ("0.95", "p95"), ("0.99", "p99")):
+                value = s[key]
+                lines.append(f'{prefix}_latency_seconds{{{label},quantile="{q}"}} {value:.6f}')
+            lines.append(f"{prefix}_latency_seconds_sum{{{label}}} {s['sum']:.6f}")
+            lines.append(f"{prefix}_latency_seconds_count{{{label}}} {s['count']}")
+            lines.append(f"{prefix}_errors_total{{{label}}} {s['errors']}")
+        return "\n".join(lines) + "\n"
+
+
+class InstrumentedSession:
+    """Proxy timing every method call of ``session`` as ``<prefix>.<method>``."""
+
+    def __init__(self, session, metrics: MetricsRegistry, prefix: str = "api"):
+        object.__setattr__(self, "_session", session)
+        object.__setattr__(self, "_metrics", metrics)
+        object.__setattr__(self, "_prefix", prefix)
+
+    @property
+    def wrapped(self):
+        return self._session
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._session, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+        label = f"{self._prefix}.{name}"
+        timer = self._metrics.timer
+
+        def call(*args, **kwargs):
+            with timer(label):
+                return attr(*args, **kwargs)
+
+        return call
+
+    def __setattr__(self, name: str, value) -> None:
+        setattr(self._session, name, value)
+
+
+class MetricsExporter:
+    """Export ``registry`` every ``interval`` seconds to a file and/or HTTP."""
+
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        path: str | Path | None = None,
+        port: Optional[int] = None,
+        interval: float = 60.0,
+        host: str = "127.0.0.1",
+    ):
+        self.registry = registry
+        self.path = Path(path) if path else None
+        self.port = port
+        self.host = host
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def start(self) -> None:
+        if self.port is not None:
+            registry = self.registry
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):  # noqa: N802 - http.server API
+                    if self.path.rstrip("/") != "/metrics":
+                        self.send_error(404)
+                        return
+                    body = registry.to_prometheus().encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, *args):
+                    pass
+
+            self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+            self.port = self._server.server_address[1]
+            threading.Thread(
+                target=self._server.serve_forever, name="metrics-http", daemon=True
+            ).start()
+        if self.path is not None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="metrics-export", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self.path is not None:
+            self.registry.export_json(self.path)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.registry.export_json(self.path)
+            except OSError as exc:
+                logger.error("metrics export failed: %s", exc)
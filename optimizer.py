@@ -0,0 +1,338 @@
+"""Parameter search for the ``functions.py`` strategies.
+
+Each parameter combination is evaluated with the NumPy batch strategies from
+``vectorized.py`` and ``simulate_signals`` over every symbol of the stored
+history. Timestamp, high, low and close columns are copied once into a
+``multiprocessing`` shared memory block; worker processes of a ``ProcessPoolExecutor`` map it
+read-only at start-up, so a task only carries its parameter dict and returns
+a small summary. Tasks are independent, which lets the sweep scale with the
+number of cores. Per-bar P&L of the symbols is summed on a common timestamp
+axis, so histories of different lengths or with missing bars line up.
+
+    python optimizer.py cache sma_crossover --grid short=3,5,8 long=20,30 k=1.5,2,3
+    python optimizer.py cache breakout --random 50 --grid lookback=10:60 k=1:4
+    python optimizer.py cache mean_reversion --grid period=10:30 k=1.5:3:0.25
+
+In a grid, an integer range ``lo:hi`` covers every integer; a float range
+needs a step, ``lo:hi:step``. Random sampling ignores the step.
+"""
+
+from __future__ import annotations
+
+import inspect
+import itertools
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from vectorized import BATCH_STRATEGIES, simulate_signals
+
+__all__ = [
+    "PARAMETERS",
+    "SharedCandles",
+    "grid",
+    "random_space",
+    "evaluate",
+    "optimize",
+]
+
+# tunable arguments of each batch strategy and how many bars they need
+PARAMETERS: Dict[str, Tuple[str, ...]] = {
+    "sma_crossover": ("short", "long", "k"),
+    "breakout": ("lookback", "k"),
+    "mean_reversion": ("period", "k"),
+    "rsi": ("period", "k"),
+}
+
+RANK_KEYS = {"pnl": True, "sharpe": True, "max_drawdown": False}
+
+BARS_PER_YEAR = 365 * 24 * 12  # 5-minute bars
+
+
+def grid(space: Mapping[str, Sequence]) -> List[dict]:
+    """Return every combination of the values in ``space``."""
+
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*space.values())]
+
+
+def random_space(space: Mapping[str, Sequence], n: int, seed: int = 0) -> List[dict]:
+    """Sample ``n`` distinct combinations.
+
+    A two-element tuple ``(lo, hi)`` is a range: integers are drawn with
+    ``randint`` and floats uniformly; lists are sampled as choices.
+    """
+
+    rng = random.Random(seed)
+    seen, out = set(), []
+    for _ in range(n * 20):
+        params = {}
+        for name, values in space.items():
+            if isinstance(values, tuple) and len(values) == 2:
+                lo, hi = values
+                if isinstance(lo, int) and isinstance(hi, int):
+                    params[name] = rng.randint(lo, hi)
+                else:
+                    params[name] = round(rng.uniform(lo, hi), 4)
+            else:
+                params[name] = rng.choice(list(values))
+        key = tuple(sorted(params.items()))
+        if key not in seen:
+            seen.add(key)
+            out.append(params)
+            if len(out) == n:
+                break
+    return out
+
+
+class SharedCandles:
+    """Ts/high/low/close columns of several symbols in one shared memory block."""
+
+    def __init__(self, history: Mapping[str, Sequence[Sequence[float]]]):
+        self.layout: List[Tuple[str, int, int]] = []
+        offset = 0
+        for symbol, candles in history.items():
+            self.layout.append((symbol, offset, len(candles)))
+            offset += len(candles)
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, offset * 4 * 8))
+        data = np.ndarray((4, offset), dtype=np.float64, buffer=self.shm.buf)
+        for (symbol, start, n), candles in zip(self.layout, history.values()):
+            rows = np.asarray([(c[0], c[2], c[3], c[4]) for c in candles], dtype=np.float64)
+            data[:, start : start + n] = rows.reshape(n, 4).T
+        self.total = offset
+
+    @property
+    def spec(self) -> Tuple[str, int, List[Tuple[str, int, int]]]:
+        return self.shm.name, self.total, self.layout
+
+    def close(self) -> None:
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self) -> "SharedCandles":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+Columns = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]  # ts, high, low, close
+
+# per-process views set up by ``_attach``
+_SHM: Optional[shared_memory.SharedMemory] = None
+_COLUMNS: Dict[str, Columns] = {}
+
+
+def _attach(spec: Tuple[str, int, List[Tuple[str, int, int]]]) -> None:
+    global _SHM
+    _detach()
+    name, total, layout = spec
+    _SHM = shared_memory.SharedMemory(name=name)
+    data = np.ndarray((4, total), dtype=np.float64, buffer=_SHM.buf)
+    data.flags.writeable = False
+    for symbol, start, n in layout:
+        _COLUMNS[symbol] = tuple(data[i, start : start + n] for i in range(4))
+
+
+def _detach() -> None:
+    """Drop the views and close the handle opened by ``_attach``.
+
+    Workers exit with the pool; the in-process path calls this itself so the
+    mapping is released before ``SharedCandles`` unlinks the block.
+    """
+
+    global _SHM
+    _COLUMNS.clear()
+    if _SHM is not None:
+        _SHM.close()
+        _SHM = None
+
+
+def _min_window(func, params: dict) -> int:
+    """Bars the scalar strategy is called with: its default window, or more if a period needs it."""
+
+    needed = max([int(v) for k, v in params.items() if k != "k"] + [0])
+    return max(inspect.signature(func).parameters["window"].default, needed + 1)
+
+
+def _max_drawdown(equity: np.ndarray) -> float:
+    peak = np.maximum.accumulate(equity)
+    return float(np.max((peak - equity) / peak) * 100) if len(equity) else 0.0
+
+
+def evaluate(
+    strategy: str,
+    params: dict,
+    columns: Optional[Mapping[str, Columns]] = None,
+    notional: float = 1000.0,
+    start_cash: float = 10000.0,
+    fee_rate: float = 0.00055,
+) -> dict:
+    """Return ``pnl``, ``max_drawdown`` (percent), ``sharpe`` and ``trades`` of one run."""
+
+    columns = _COLUMNS if columns is None else columns
+    func = BATCH_STRATEGIES[strategy]
+    window = _min_window(func, params)
+    times, pnls = [], []
+    trades = 0
+    for ts, high, low, close in columns.values():
+        signal, stop, take = func(high, low, close, window=window, **params)
+        pnl, count = simulate_signals(high, low, close, signal, stop, take, notional, fee_rate)
+        trades += count
+        times.append(ts)
+        pnls.append(pnl)
+    total = _add_aligned(times, pnls)
+    equity = start_cash + np.cumsum(total)
+    returns = total / start_cash
+    std = float(returns.std()) if len(returns) else 0.0
+    sharpe = float(returns.mean() / std * math.sqrt(BARS_PER_YEAR)) if std > 0 else 0.0
+    return {
+        "strategy": strategy,
+        "params": dict(params),
+        "pnl": float(total.sum()),
+        "max_drawdown": _max_drawdown(np.concatenate([[start_cash], equity])),
+        "sharpe": sharpe,
+        "trades": trades,
+    }
+
+
+def _add_aligned(times: Sequence[np.ndarray], pnls: Sequence[np.ndarray]) -> np.ndarray:
+    """Sum per-bar P&L of several symbols on the union of their timestamps."""
+
+    if not times:
+        return np.zeros(0)
+    timeline = np.unique(np.concatenate(times))
+    total = np.zeros(len(timeline))
+    for ts, pnl in zip(times, pnls):
+        total[np.searchsorted(timeline, ts)] += pnl
+    return total
+
+
+def _run(task: Tuple[str, dict, dict]) -> dict:
+    strategy, params, kwargs = task
+    try:
+        return evaluate(strategy, params, **kwargs)
+    except ValueError as exc:  # e.g. short >= long or window too small
+        return {"strategy": strategy, "params": params, "error": str(exc)}
+
+
+def optimize(
+    history: Mapping[str, Sequence[Sequence[float]]],
+    strategy: str,
+    candidates: Iterable[dict],
+    rank_by: str = "sharpe",
+    max_workers: Optional[int] = None,
+    **kwargs,
+) -> List[dict]:
+    """Evaluate ``candidates`` on ``history`` (symbol -> 5m candles) and rank them.
+
+    ``rank_by`` is ``"pnl"``, ``"sharpe"`` (both descending) or
+    ``"max_drawdown"`` (ascending). Failed combinations are returned last
+    with an ``error`` key. ``max_workers=1`` runs in-process.
+    """
+
+    if strategy not in BATCH_STRATEGIES:
+        raise ValueError(f"Unknown strategy {strategy}")
+    if rank_by not in RANK_KEYS:
+        raise ValueError(f"rank_by must be one of {sorted(RANK_KEYS)}")
+    tasks = [(strategy, params, kwargs) for params in candidates]
+    with SharedCandles(history) as shared:
+        if max_workers == 1:
+            _attach(shared.spec)
+            try:
+                results = [_run(task) for task in tasks]
+            finally:
+                _detach()
+        else:
+            workers = max_workers or os.cpu_count() or 1
+            chunk = max(1, len(tasks) // (workers * 4))
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=_attach, initargs=(shared.spec,)
+            ) as pool:
+                results = list(pool.map(_run, tasks, chunksize=chunk))
+    ok = [r for r in results if "error" not in r]
+    failed = [r for r in results if "error" in r]
+    ok.sort(key=lambda r: r[rank_by], reverse=RANK_KEYS[rank_by])
+    return ok + failed
+
+
+def _parse_space(items: Sequence[str]) -> Dict[str, Sequence]:
+    """Parse ``name=v1,v2``, ``name=lo:hi`` and ``name=lo:hi:step`` arguments."""
+
+    def number(text: str):
+        return int(text) if text.lstrip("-").isdigit() else float(text)
+
+    space: Dict[str, Sequence] = {}
+    for item in items:
+        name, _, values = item.partition("=")
+        if ":" in values:
+            space[name] = tuple(number(v) for v in values.split(":", 2))
+        else:
+            space[name] = [number(v) for v in values.split(",")]
+    return space
+
+
+def _grid_values(name: str, values: Sequence) -> list:
+    """Expand a parsed range to grid values; lists are returned as they are."""
+
+    if not isinstance(values, tuple):
+        return list(values)
+    lo, hi, *step = values
+    if not step:
+        if not (isinstance(lo, int) and isinstance(hi, int)):
+            raise ValueError(f"{name}={lo}:{hi}: a float range needs a step, e.g. {name}={lo}:{hi}:0.5")
+        return list(range(lo, hi + 1))
+    if step[0] <= 0:
+        raise ValueError(f"{name}: step must be positive")
+    count = int(math.floor((hi - lo) / step[0] + 1e-9)) + 1
+    return [round(lo + i * step[0], 10) for i in range(max(count, 0))]
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entry point
+    import argparse
+
+    from backtest import load_history, load_store_history
+    from bot import BybitTradingBot
+    from candle_store import CandleStore
+
+    parser = argparse.ArgumentParser(description="Grid/random search of strategy parameters")
+    parser.add_argument("directory", help="Candle store or JSON cache directory")
+    parser.add_argument("strategy", choices=sorted(PARAMETERS))
+    parser.add_argument("--grid", nargs="+", required=True, help="name=v1,v2 or name=lo:hi")
+    parser.add_argument("--random", type=int, help="Sample this many combinations")
+    parser.add_argument("--rank-by", default="sharpe", choices=sorted(RANK_KEYS))
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--symbols", nargs="*", default=BybitTradingBot.ALLOWED_SYMBOLS)
+    args = parser.parse_args()
+
+    history = load_store_history(CandleStore(args.directory), args.symbols, intervals=(5,))
+    history = history or load_history(args.directory, args.symbols, intervals=(5,))
+    space = _parse_space(args.grid)
+    if args.random:
+        candidates = random_space({k: v[:2] if isinstance(v, tuple) else v for k, v in space.items()}, args.random)
+    else:
+        try:
+            candidates = grid({k: _grid_values(k, v) for k, v in space.items()})
+        except ValueError as exc:
+            parser.error(str(exc))
+    results = optimize(
+        {symbol: candles for (symbol, _), candles in history.items()},
+        args.strategy,
+        candidates,
+        rank_by=args.rank_by,
+        max_workers=args.workers,
+    )
+    for r in results[: args.top]:
+        if "error" in r:
+            print(r["params"], "error:", r["error"])
+        else:
+            print(
+                f"{r['params']} pnl={r['pnl']:.2f} dd={r['max_drawdown']:.2f}% "
+                f"sharpe={r['sharpe']:.2f} trades={r['trades']}"
+            )
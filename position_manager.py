@@ -0,0 +1,275 @@
+"""Trailing stops and take-profit ladders for open positions.
+
+``PositionManager`` runs in the background next to the trading loop. On
+every price update it takes the open positions from ``state.AccountState``
+and:
+
+* recomputes the stop with ``functions.apply_trailing_stop`` and moves the
+  position stop through ``set_trading_stop`` — only when the level, rounded
+  to the instrument tick, tightens by at least one tick;
+* once per position, places the ``functions.partial_take_profit`` ladder as
+  reduce-only limit orders in a single ``place_batch_order`` request. Legs
+  below the minimum order size are merged into the next one. Legs the
+  exchange rejects, and all legs of a request that raised, are sent again
+  on later cycles with their original ``orderLinkId``, so a request that
+  timed out but reached the exchange comes back as a duplicate instead of
+  a second order. A position gets at most ``MAX_LADDER_ATTEMPTS`` requests.
+
+API usage is bounded no matter how many positions are open: prices come from
+the market stream or one bulk ticker request per cycle, at most
+``max_calls`` stop amends are sent per cycle (largest moves first, the rest
+follow on the next cycle) and a symbol is amended at most once per
+``min_interval`` seconds.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import uuid
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from functions import apply_trailing_stop, partial_take_profit
+from resilience import DUPLICATE_LINK_ID
+
+__all__ = ["PositionManager"]
+
+logger = logging.getLogger(__name__)
+
+# (distance from entry in percent, percent of the position to close)
+DEFAULT_LADDER: Tuple[Tuple[float, float], ...] = ((1.0, 30.0), (2.0, 30.0))
+
+
+class PositionManager:
+    """Trail stops and place take-profit ladders for ``state``'s positions."""
+
+    # batch requests per position, failed ones included, before its legs are given up
+    MAX_LADDER_ATTEMPTS = 3
+
+    def __init__(
+        self,
+        bot,
+        state,
+        trail_pct: float = 1.0,
+        ladder: Sequence[Tuple[float, float]] = DEFAULT_LADDER,
+        interval: float = 1.0,
+        max_calls: int = 10,
+        min_interval: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.bot = bot
+        self.state = state
+        self.trail_pct = trail_pct
+        self.ladder = list(ladder)
+        self.interval = interval
+        self.max_calls = max_calls
+        self.min_interval = min_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._stops: Dict[str, float] = {}
+        self._amended_at: Dict[str, float] = {}
+        # symbol -> ((side, entry), legs still to place by index, attempts)
+        self._laddered: Dict[str, Tuple[Tuple[str, float], Dict[int, dict], int]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.amends = 0
+        self.skipped = 0
+
+    # -- one cycle --------------------------------------------------------
+
+    def run_once(self, prices: Optional[Dict[str, float]] = None) -> None:
+        """Manage every open position once using ``prices`` or fresh ones."""
+
+        positions = {p["symbol"]: p for p in self.state.positions()}
+        with self._lock:
+            for symbol in set(self._stops) - set(positions):
+                self._stops.pop(symbol, None)
+            for symbol in set(self._laddered) - set(positions):
+                self._laddered.pop(symbol, None)
+        if not positions:
+            return
+        if prices is None:
+            prices = self.bot._last_prices(list(positions))
+        self._place_ladders(positions.values())
+        amends = []
+        for symbol, position in positions.items():
+            price = prices.get(symbol)
+            if price is not None:
+                amend = self._trail(position, price)
+                if amend is not None:
+                    amends.append(amend)
+        # the largest moves protect the most profit, send them first
+        amends.sort(key=lambda a: a[2], reverse=True)
+        for symbol, level, _move in amends[: self.max_calls]:
+            self._amend(symbol, level)
+        self.skipped += max(0, len(amends) - self.max_calls)
+
+    def update(self, symbol: str, price: float) -> None:
+        """Handle one price update, e.g. from a ticker callback."""
+
+        if self.state.position(symbol) is not None:
+            self.run_once({symbol: price})
+
+    def _trail(self, position: dict, price: float) -> Optional[Tuple[str, float, float]]:
+        symbol, side = position["symbol"], position["side"]
+        with self._lock:
+            known = self._stops.get(symbol)
+            amended_at = self._amended_at.get(symbol)
+        current = position.get("stop_loss")
+        if known is not None:
+            current = known if current is None else (max if side == "Buy" else min)(known, current)
+        level = apply_trailing_stop(side, position["price"], price, self.trail_pct, current)
+        level = self.bot._format_price(symbol, level)
+        # without a known stop, measure from the trail at the entry price
+        reference = current
+        if reference is None:
+            reference = apply_trailing_stop(side, position["price"], position["price"], self.trail_pct)
+        move = level - reference if side == "Buy" else reference - level
+        if move < self.bot.instruments.get(symbol).tick * 0.999:
+            return None
+        # never put the stop on the wrong side of the market
+        if (side == "Buy" and level >= price) or (side == "Sell" and level <= price):
+            return None
+        if amended_at is not None and self._clock() - amended_at < self.min_interval:
+            return None
+        return symbol, level, move / price
+
+    def _amend(self, symbol: str, level: float) -> None:
+        try:
+            self.bot.session.set_trading_stop(
+                category="linear",
+                symbol=symbol,
+                stopLoss=str(level),
+                tpslMode="Full",
+                positionIdx=0,
+            )
+        except Exception as exc:
+            logger.error("%s: trailing stop to %s failed: %s", symbol, level, exc)
+            return
+        with self._lock:
+            self._stops[symbol] = level
+            self._amended_at[symbol] = self._clock()
+        self.amends += 1
+        logger.info("%s: stop trailed to %s", symbol, level)
+
+    def _place_ladders(self, positions) -> None:
+        ladders: List[Tuple[str, Tuple[str, float], Dict[int, dict]]] = []
+        for position in positions:
+            symbol = position["symbol"]
+            key = (position["side"], position["price"])
+            with self._lock:
+                entry = self._laddered.get(symbol)
+            if entry is not None and entry[0] == key:
+                legs, attempts = entry[1], entry[2]
+                if attempts >= self.MAX_LADDER_ATTEMPTS:
+                    continue
+            elif any(o.get("reduceOnly") for o in self.state.open_orders(symbol)):
+                # a ladder from an earlier run is still working
+                legs = {}
+                with self._lock:
+                    self._laddered[symbol] = (key, legs, 0)
+            else:
+                # built once per position: retries reuse the same link ids;
+                # empty when too small to split into legs of the minimum size
+                legs = dict(enumerate(self._ladder_orders(position)))
+                with self._lock:
+                    self._laddered[symbol] = (key, legs, 0)
+            if legs:
+                ladders.append((symbol, key, legs))
+        # a symbol's legs always travel in one request
+        chunks: List[List[Tuple[str, Tuple[str, float], Dict[int, dict]]]] = []
+        for ladder in ladders:
+            size = sum(len(legs) for _, _, legs in chunks[-1]) if chunks else self.bot.BATCH_LIMIT
+            if size + len(ladder[2]) > self.bot.BATCH_LIMIT:
+                chunks.append([])
+            chunks[-1].append(ladder)
+        for chunk in chunks:
+            try:
+                response = self.bot.session.place_batch_order(
+                    category="linear", request=[leg for _, _, legs in chunk for leg in legs.values()]
+                )
+            except Exception as exc:
+                # the outcome is unknown: every leg stays pending and the
+                # request still counts as an attempt for each position
+                logger.error("take-profit ladder failed: %s", exc)
+                response = None
+            statuses = iter((response or {}).get("retExtInfo", {}).get("list", []))
+            for symbol, key, legs in chunk:
+                if response is None:
+                    pending = dict(legs)
+                else:
+                    pending = {}
+                    for index, leg in legs.items():
+                        status = next(statuses, {"code": 0})
+                        # a duplicate link id was placed by an earlier attempt
+                        if status.get("code", 0) not in (0, DUPLICATE_LINK_ID):
+                            pending[index] = leg
+                            logger.error("%s: take-profit leg at %s rejected: %s", symbol, leg["price"], status.get("msg"))
+                with self._lock:
+                    previous = self._laddered.get(symbol)
+                    attempts = previous[2] + 1 if previous is not None and previous[0] == key else 1
+                    self._laddered[symbol] = (key, pending, attempts)
+
+    def _ladder_orders(self, position: dict) -> List[dict]:
+        """Reduce-only legs of ``ladder``, each at least the minimum order size.
+
+        Leg sizes are rounded down to the quantity step; a leg that would be
+        below the minimum is merged into the next one and the legs together
+        never exceed the position.
+        """
+
+        symbol = position["symbol"]
+        close_side = "Sell" if position["side"] == "Buy" else "Buy"
+        sign = 1 if position["side"] == "Buy" else -1
+        instrument = self.bot.instruments.get(symbol)
+        step, min_qty = instrument.d_qty_step, instrument.d_min_qty
+        remaining = (Decimal(str(position["size"])) // step) * step
+        carry = Decimal(0)
+        targets = [(position["price"] * (1 + sign * move / 100), pct) for move, pct in self.ladder]
+        legs = []
+        for order in partial_take_profit(position["size"], targets):
+            qty = Decimal(str(order["qty"])) + carry
+            rounded = min((qty // step) * step, remaining)
+            if rounded < min_qty:
+                rounded = Decimal(0)
+            carry = qty - rounded
+            if not rounded:
+                continue
+            remaining -= rounded
+            legs.append(
+                {
+                    "symbol": symbol,
+                    "side": close_side,
+                    "orderType": "Limit",
+                    "qty": str(float(rounded)),
+                    "price": str(self.bot._format_price(symbol, order["price"])),
+                    "timeInForce": "GTC",
+                    "reduceOnly": True,
+                    "orderLinkId": f"tp-{uuid.uuid4().hex[:24]}",
+                }
+            )
+        return legs
+
+    # -- background loop ----------------------------------------------------
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="position-manager", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as exc:
+                logger.error("position manager cycle failed: %s", exc)
@@ -0,0 +1,394 @@
+"""Deadlines, retries and circuit breakers around pybit REST calls.
+
+``ResilientSession`` wraps the pybit ``HTTP`` session (or the
+``ScheduledSession`` around it) so one slow or failing endpoint cannot stall
+the trading loop:
+
+* every call has a deadline (``timeout`` seconds including retries); a call
+  that does not finish in time raises ``CallTimeout`` to the caller while
+  the hung request is left to finish on its worker thread;
+* reads (``get_*``) are retried with jittered exponential backoff on
+  transient failures — timeouts, network and HTTP errors and Bybit's
+  server-side codes in ``TRANSIENT_CODES``;
+* writes are never retried blindly. ``place_order`` is retried only when it
+  carries an ``orderLinkId`` and ``place_batch_order`` only when every leg
+  does: Bybit rejects a duplicate link id (``DUPLICATE_LINK_ID``), which
+  tells that the first attempt went through, and the order is then looked up
+  by that id in the order history instead of placed twice;
+* each endpoint has a ``CircuitBreaker``. After ``failure_threshold``
+  consecutive transient failures it opens for ``cooldown`` seconds and calls
+  fail fast with ``CircuitOpen``; reads are answered from the last good
+  response if it is younger than ``stale_ttl``. The same stale answer is
+  used when a read fails after all retries or is shed by the scheduler.
+
+Business errors (``InvalidRequestError`` with any other ``retCode``) are
+raised unchanged and do not count towards the breaker.
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Callable, Optional
+
+import requests
+from pybit.exceptions import FailedRequestError, InvalidRequestError
+
+from scheduler import RequestShed
+
+__all__ = [
+    "TRANSIENT_CODES",
+    "DUPLICATE_LINK_ID",
+    "CallTimeout",
+    "CircuitOpen",
+    "CircuitBreaker",
+    "ResilientSession",
+    "error_code",
+    "not_executed",
+]
+
+logger = logging.getLogger(__name__)
+
+# server timeout, rate limit, internal error, service busy
+TRANSIENT_CODES = {10000, 10006, 10016, 10429}
+DUPLICATE_LINK_ID = 110072
+# server timeout and internal error: the request may still have been executed
+AMBIGUOUS_CODES = {10000, 10016}
+
+
+class CallTimeout(TimeoutError):
+    """A session call did not finish before its deadline."""
+
+
+class CircuitOpen(RuntimeError):
+    """The endpoint's breaker is open; the call was not attempted."""
+
+
+class _AlreadyPlaced(Exception):
+    """A retried write was rejected because an earlier attempt went through."""
+
+
+def error_code(exc: BaseException) -> Optional[int]:
+    """Bybit ``retCode`` of a pybit exception, if it carries one."""
+
+    code = getattr(exc, "status_code", None)
+    return code if isinstance(code, int) else None
+
+
+def not_executed(exc: BaseException) -> bool:
+    """Whether ``exc`` proves that a write was not executed by the exchange.
+
+    True for local validation errors, calls that were never sent (breaker
+    open, shed) and exchange rejections carrying a ``retCode``. Timeouts and
+    transport errors are ambiguous: the request may have gone through.
+    """
+
+    if isinstance(exc, (ValueError, CircuitOpen, RequestShed)):
+        return True
+    if isinstance(exc, InvalidRequestError):
+        return error_code(exc) not in AMBIGUOUS_CODES
+    return False
+
+
+def _transient(exc: BaseException) -> bool:
+    if isinstance(exc, (CallTimeout, FailedRequestError, requests.exceptions.RequestException)):
+        return True
+    if isinstance(exc, InvalidRequestError):
+        return error_code(exc) in TRANSIENT_CODES
+    return False
+
+
+class CircuitBreaker:
+    """Closed -> open after ``failure_threshold`` failures -> half-open after ``cooldown``."""
+
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            return "half_open" if self._clock() - self.opened_at >= self.cooldown else "open"
+
+    def allow(self) -> bool:
+        """Whether a call may go out; in half-open state only one trial at a time."""
+
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self._clock() - self.opened_at < self.cooldown or self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                self.opened_at = self._clock()
+            self._trial = False
+
+
+class ResilientSession:
+    """Proxy adding deadlines, safe retries, breakers and stale reads to ``session``."""
+
+    def __init__(
+        self,
+        session,
+        timeout: Optional[float] = 10.0,
+        retries: int = 3,
+        base_delay: float = 0.2,
+        max_delay: float = 5.0,
+        failure_threshold: int = 5,
+        cooldown: float = 30.0,
+        stale_ttl: float = 300.0,
+        cache_size: int = 1024,
+        max_workers: int = 16,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        set_ = object.__setattr__
+        set_(self, "_session", session)
+        set_(self, "_timeout", timeout)
+        set_(self, "_retries", retries)
+        set_(self, "_base_delay", base_delay)
+        set_(self, "_max_delay", max_delay)
+        set_(self, "_failure_threshold", failure_threshold)
+        set_(self, "_cooldown", cooldown)
+        set_(self, "_stale_ttl", stale_ttl)
+        set_(self, "_cache_size", cache_size)
+        set_(self, "_clock", clock)
+        set_(self, "_sleep", sleep)
+        set_(self, "_lock", threading.Lock())
+        set_(self, "_cache", OrderedDict())
+        set_(self, "breakers", {})
+        set_(self, "stats", {"retries": 0, "timeouts": 0, "stale": 0, "rejected": 0})
+        pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="api") if timeout else None
+        set_(self, "_pool", pool)
+
+    @property
+    def wrapped(self):
+        return self._session
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._session, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+        if name.startswith("get_"):
+            return lambda *args, **kwargs: self._read(name, attr, args, kwargs)
+        if name == "place_order":
+            return lambda *args, **kwargs: self._place_order(attr, args, kwargs)
+        if name == "place_batch_order":
+            return lambda *args, **kwargs: self._place_batch_order(attr, args, kwargs)
+        return lambda *args, **kwargs: self._write(name, attr, args, kwargs)
+
+    def __setattr__(self, name: str, value) -> None:
+        setattr(self._session, name, value)
+
+    def breaker(self, name: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self.breakers.get(name)
+            if breaker is None:
+                breaker = self.breakers[name] = CircuitBreaker(
+                    self._failure_threshold, self._cooldown, self._clock
+                )
+            return breaker
+
+    # -- single attempt ---------------------------------------------------
+
+    def _attempt(self, name: str, attr, args, kwargs, deadline: Optional[float]):
+        breaker = self.breaker(name)
+        if not breaker.allow():
+            with self._lock:
+                self.stats["rejected"] += 1
+            raise CircuitOpen(f"{name}: circuit open after {breaker.failures} failures")
+        try:
+            if self._pool is None:
+                result = attr(*args, **kwargs)
+            else:
+                remaining = max(0.0, deadline - self._clock()) if deadline is not None else None
+                future = self._pool.submit(attr, *args, **kwargs)
+                try:
+                    result = future.result(timeout=remaining)
+                except FutureTimeout:
+                    with self._lock:
+                        self.stats["timeouts"] += 1
+                    raise CallTimeout(f"{name}: no response within {self._timeout}s") from None
+        except RequestShed:
+            raise  # local back-pressure, not an endpoint failure
+        except Exception as exc:
+            if _transient(exc):
+                breaker.failure()
+            else:
+                breaker.success()
+            raise
+        breaker.success()
+        return result
+
+    def _backoff(self, attempt: int, deadline: Optional[float]) -> bool:
+        """Sleep before retry ``attempt``; ``False`` if the deadline would pass."""
+
+        delay = random.uniform(0, min(self._max_delay, self._base_delay * 2**attempt))
+        if deadline is not None and self._clock() + delay >= deadline:
+            return False
+        with self._lock:
+            self.stats["retries"] += 1
+        self._sleep(delay)
+        return True
+
+    def _deadline(self) -> Optional[float]:
+        return self._clock() + self._timeout if self._timeout else None
+
+    # -- reads ------------------------------------------------------------
+
+    def _read(self, name: str, attr, args, kwargs):
+        try:
+            key = (name, args, tuple(sorted(kwargs.items())))
+            hash(key)
+        except TypeError:
+            key = None
+        deadline = self._deadline()
+        attempt = 0
+        while True:
+            try:
+                result = self._attempt(name, attr, args, kwargs, deadline)
+            except (CircuitOpen, RequestShed) as exc:
+                return self._stale(key, exc)
+            except Exception as exc:
+                if not _transient(exc):
+                    raise
+                if attempt >= self._retries or not self._backoff(attempt, deadline):
+                    return self._stale(key, exc)
+                attempt += 1
+                continue
+            if key is not None:
+                with self._lock:
+                    self._cache[key] = (self._clock(), result)
+                    self._cache.move_to_end(key)
+                    while len(self._cache) > self._cache_size:
+                        self._cache.popitem(last=False)
+            return result
+
+    def _stale(self, key, exc: Exception):
+        with self._lock:
+            cached = self._cache.get(key) if key is not None else None
+            if cached is not None and self._clock() - cached[0] <= self._stale_ttl:
+                self.stats["stale"] += 1
+                logger.warning("%s failed (%s), serving data from %.0fs ago", key[0], exc, self._clock() - cached[0])
+                return cached[1]
+        raise exc
+
+    # -- writes -----------------------------------------------------------
+
+    def _write(self, name: str, attr, args, kwargs):
+        return self._attempt(name, attr, args, kwargs, self._deadline())
+
+    def _place_order(self, attr, args, kwargs):
+        idempotent = bool(kwargs.get("orderLinkId"))
+        try:
+            result, _retried = self._idempotent("place_order", attr, args, kwargs, idempotent)
+        except _AlreadyPlaced:
+            # an earlier attempt reached the exchange after all
+            return self._existing_order(kwargs)
+        return result
+
+    def _place_batch_order(self, attr, args, kwargs):
+        legs = kwargs.get("request") or []
+        idempotent = bool(legs) and all(leg.get("orderLinkId") for leg in legs)
+        result, retried = self._idempotent("place_batch_order", attr, args, kwargs, idempotent)
+        if retried:
+            body = result[0] if isinstance(result, tuple) else result
+            self._resolve_duplicate_legs(body, legs, kwargs.get("category", "linear"))
+        return result
+
+    def _idempotent(self, name: str, attr, args, kwargs, idempotent: bool):
+        """Call a write, retrying transient failures only when ``idempotent``.
+
+        Returns ``(result, retried)``; raises ``_AlreadyPlaced`` when a retry
+        is rejected as a duplicate of an earlier attempt.
+        """
+
+        deadline = self._deadline()
+        attempt = 0
+        while True:
+            try:
+                return self._attempt(name, attr, args, kwargs, deadline), attempt > 0
+            except InvalidRequestError as exc:
+                if attempt and error_code(exc) == DUPLICATE_LINK_ID:
+                    raise _AlreadyPlaced() from exc
+                if not idempotent or not _transient(exc):
+                    raise
+                last = exc
+            except CircuitOpen:
+                raise
+            except Exception as exc:
+                if not idempotent or not _transient(exc):
+                    raise
+                last = exc
+            if attempt >= self._retries or not self._backoff(attempt, deadline):
+                raise last
+            attempt += 1
+            logger.warning("%s failed, retrying with the same orderLinkId", name)
+
+    def _resolve_duplicate_legs(self, body: dict, legs: list, category: str) -> None:
+        """Replace per-leg duplicate rejections of a retried batch with the placed orders."""
+
+        result = body.setdefault("result", {})
+        orders = result.setdefault("list", [])
+        statuses = body.setdefault("retExtInfo", {}).setdefault("list", [])
+        for pos, leg in enumerate(legs):
+            if pos >= len(statuses) or statuses[pos].get("code") != DUPLICATE_LINK_ID:
+                continue
+            found = self._existing_order({**leg, "category": category})["result"]
+            while len(orders) <= pos:
+                orders.append({})
+            orders[pos] = {**orders[pos], **found}
+            statuses[pos] = {"code": 0, "msg": "OK"}
+
+    def _existing_order(self, kwargs: dict) -> dict:
+        """Look an order up by ``orderLinkId``, closed orders included.
+
+        Entries are IOC market orders that are filled or cancelled at once, so
+        the order history is searched before the open orders.
+        """
+
+        link_id = kwargs["orderLinkId"]
+        params = {"category": kwargs.get("category", "linear"), "symbol": kwargs.get("symbol"), "orderLinkId": link_id}
+        order_id = ""
+        for lookup in ("get_order_history", "get_open_orders"):
+            try:
+                found = getattr(self._session, lookup)(**params)
+                if isinstance(found, tuple):
+                    found = found[0]
+                orders = found.get("result", {}).get("list", [])
+            except Exception as exc:  # lookup is best effort
+                logger.warning("%s for order %s failed: %s", lookup, link_id, exc)
+                continue
+            if orders:
+                order_id = orders[0].get("orderId", "")
+                break
+        if not order_id:
+            logger.warning("order %s was placed but could not be found", link_id)
+        return {
+            "retCode": 0,
+            "retMsg": "OK",
+            "result": {"orderId": order_id, "orderLinkId": link_id},
+            "retExtInfo": {"duplicate": True},
+        }
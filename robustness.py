@@ -0,0 +1,291 @@
+"""Offline robustness suite: crash windows, walk-forward and bootstrap paths.
+
+``stress_tests.run_crash_scenario`` replays one downloaded period through
+backtrader. This module runs the same kind of check — P&L and maximum
+drawdown of a strategy over a stressed period — for thousands of scenarios
+against local candles:
+
+* crash windows: fixed ``(start, end)`` time ranges such as May 2022;
+* walk-forward splits: rolling train/test windows; with ``candidates`` the
+  best parameters on the train part are evaluated on the following test part;
+* bootstrap paths: block-resampled bar returns of the whole history.
+
+Candles live in shared memory (see ``optimizer.SharedCandles``) and every
+scenario is a tiny task for a ``ProcessPoolExecutor``. Results are folded
+into per-strategy distributions as they arrive, so only two floats per
+scenario are kept and no order lists are ever collected::
+
+    python robustness.py cache --crash 2022-05-05:2022-05-15 --walk-forward 6 --bootstrap 1000
+"""
+
+from __future__ import annotations
+
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+import optimizer
+from optimizer import SharedCandles, evaluate
+
+__all__ = [
+    "Distribution",
+    "crash_scenarios",
+    "walk_forward_scenarios",
+    "bootstrap_scenarios",
+    "run_robustness",
+]
+
+Range = Tuple[int, int]
+# (kind, label, strategy, params, {symbol: (lo, hi)} or None, extra)
+Scenario = Tuple[str, str, str, dict, Optional[Dict[str, Range]], dict]
+
+DEFAULT_STRATEGIES: Dict[str, dict] = {name: {} for name in optimizer.PARAMETERS}
+
+
+class Distribution:
+    """P&L and drawdown samples of one strategy and scenario kind."""
+
+    def __init__(self) -> None:
+        self.pnl = array("d")
+        self.drawdown = array("d")
+        self.errors = 0
+
+    def add(self, result: dict) -> None:
+        if "error" in result:
+            self.errors += 1
+            return
+        self.pnl.append(result["pnl"])
+        self.drawdown.append(result["max_drawdown"])
+
+    def summary(self) -> dict:
+        out = {"count": len(self.pnl), "errors": self.errors}
+        if not self.pnl:
+            return out
+        pnl = np.frombuffer(self.pnl, dtype=np.float64)
+        dd = np.frombuffer(self.drawdown, dtype=np.float64)
+        for name, values in (("pnl", pnl), ("max_drawdown", dd)):
+            p5, p50, p95 = np.percentile(values, [5, 50, 95])
+            out[name] = {
+                "mean": float(values.mean()),
+                "std": float(values.std()),
+                "min": float(values.min()),
+                "p5": float(p5),
+                "p50": float(p50),
+                "p95": float(p95),
+                "max": float(values.max()),
+            }
+        out["loss_rate"] = float((pnl < 0).mean())
+        return out
+
+
+def _index_ranges(timestamps: Mapping[str, np.ndarray], start: int, end: int) -> Dict[str, Range]:
+    """Map ``start <= ts < end`` to index ranges per symbol."""
+
+    return {
+        symbol: (int(np.searchsorted(ts, start, "left")), int(np.searchsorted(ts, end, "left")))
+        for symbol, ts in timestamps.items()
+    }
+
+
+def crash_scenarios(
+    timestamps: Mapping[str, np.ndarray],
+    windows: Iterable[Range],
+    strategies: Mapping[str, dict],
+) -> List[Scenario]:
+    """One scenario per crash window (ms timestamps) and strategy."""
+
+    out = []
+    for start, end in windows:
+        ranges = _index_ranges(timestamps, start, end)
+        for name, params in strategies.items():
+            out.append(("crash", f"{start}-{end}", name, params, ranges, {}))
+    return out
+
+
+def walk_forward_scenarios(
+    timestamps: Mapping[str, np.ndarray],
+    splits: int,
+    strategies: Mapping[str, dict],
+    train_fraction: float = 0.5,
+    candidates: Optional[Mapping[str, Sequence[dict]]] = None,
+) -> List[Scenario]:
+    """Rolling train/test splits over the common time span.
+
+    The first ``train_fraction`` of the span is the initial train window;
+    the rest is cut into ``splits`` consecutive test windows, each trained
+    on the equally long period right before it.
+    """
+
+    first = max(int(ts[0]) for ts in timestamps.values())
+    last = min(int(ts[-1]) for ts in timestamps.values()) + 1
+    train = int((last - first) * train_fraction)
+    step = (last - first - train) // max(splits, 1)
+    out = []
+    for i in range(splits):
+        test_start = first + train + i * step
+        train_ranges = _index_ranges(timestamps, test_start - train, test_start)
+        test_ranges = _index_ranges(timestamps, test_start, test_start + step)
+        for name, params in strategies.items():
+            extra = {"train": train_ranges, "candidates": list((candidates or {}).get(name, []))}
+            out.append(("walk_forward", f"split{i}", name, params, test_ranges, extra))
+    return out
+
+
+def bootstrap_scenarios(
+    paths: int, strategies: Mapping[str, dict], block: int = 288, seed: int = 0
+) -> List[Scenario]:
+    """``paths`` block-bootstrap scenarios per strategy (``block`` bars per draw)."""
+
+    return [
+        ("bootstrap", f"path{i}", name, params, None, {"seed": seed + i, "block": block})
+        for i in range(paths)
+        for name, params in strategies.items()
+    ]
+
+
+def _slice(columns, ranges: Optional[Dict[str, Range]]):
+    if ranges is None:
+        return columns
+    out = {}
+    for symbol, cols in columns.items():
+        lo, hi = ranges.get(symbol, (0, 0))
+        if hi > lo:
+            out[symbol] = tuple(col[lo:hi] for col in cols)
+    return out
+
+
+def _bootstrap(columns, seed: int, block: int):
+    """Resample bar-to-bar close returns in blocks, keeping high/low relative to close.
+
+    Timestamps stay as they are: a path is a new price series on the same bars.
+    """
+
+    rng = np.random.default_rng(seed)
+    out = {}
+    for symbol, (ts, high, low, close) in columns.items():
+        n = len(close)
+        if n < 2:
+            continue
+        ret = close[1:] / close[:-1]
+        up = high[1:] / close[1:]
+        down = low[1:] / close[1:]
+        starts = rng.integers(0, max(1, n - 1 - block), size=(n - 1) // block + 1)
+        idx = (starts[:, None] + np.arange(block)).ravel()[: n - 1]
+        idx = np.minimum(idx, n - 2)
+        path = close[0] * np.concatenate([[1.0], np.cumprod(ret[idx])])
+        out[symbol] = (
+            ts,
+            np.concatenate([[high[0]], path[1:] * up[idx]]),
+            np.concatenate([[low[0]], path[1:] * down[idx]]),
+            path,
+        )
+    return out
+
+
+def _run_scenario(task: Tuple[Scenario, dict]) -> Tuple[str, str, dict]:
+    (kind, label, name, params, ranges, extra), kwargs = task
+    columns = optimizer._COLUMNS
+    try:
+        if kind == "bootstrap":
+            columns = _bootstrap(columns, extra["seed"], extra["block"])
+        elif kind == "walk_forward" and extra.get("candidates"):
+            train = _slice(columns, extra["train"])
+            scored = []
+            for candidate in extra["candidates"]:
+                try:
+                    scored.append((evaluate(name, candidate, train, **kwargs)["sharpe"], candidate))
+                except ValueError:
+                    continue
+            if scored:
+                params = max(scored, key=lambda s: s[0])[1]
+        if kind != "bootstrap":
+            columns = _slice(columns, ranges)
+        result = evaluate(name, params, columns, **kwargs)
+    except ValueError as exc:
+        result = {"error": str(exc)}
+    result["label"] = label
+    return kind, name, result
+
+
+def run_robustness(
+    history: Mapping[str, Sequence[Sequence[float]]],
+    scenarios: Sequence[Scenario],
+    max_workers: Optional[int] = None,
+    on_result=None,
+    **kwargs,
+) -> Dict[str, Dict[str, dict]]:
+    """Run ``scenarios`` on ``history`` (symbol -> 5m candles) in parallel.
+
+    Returns ``{strategy: {kind: summary}}`` with P&L and drawdown
+    percentiles. ``on_result(kind, strategy, result)`` sees every scenario
+    result as it arrives, e.g. to stream them to a file.
+    """
+
+    stats: Dict[Tuple[str, str], Distribution] = {}
+    tasks = ((scenario, kwargs) for scenario in scenarios)
+    with SharedCandles(history) as shared:
+        if max_workers == 1:
+            optimizer._attach(shared.spec)
+            try:
+                _collect(map(_run_scenario, tasks), stats, on_result)
+            finally:
+                optimizer._detach()
+        else:
+            workers = max_workers or os.cpu_count() or 1
+            chunk = max(1, len(scenarios) // (workers * 8))
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=optimizer._attach, initargs=(shared.spec,)
+            ) as pool:
+                _collect(pool.map(_run_scenario, tasks, chunksize=chunk), stats, on_result)
+    report: Dict[str, Dict[str, dict]] = {}
+    for (name, kind), dist in sorted(stats.items()):
+        report.setdefault(name, {})[kind] = dist.summary()
+    return report
+
+
+def _collect(results: Iterable, stats: Dict[Tuple[str, str], Distribution], on_result) -> None:
+    for kind, name, result in results:
+        stats.setdefault((name, kind), Distribution()).add(result)
+        if on_result is not None:
+            on_result(kind, name, result)
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entry point
+    import argparse
+    import json
+    from datetime import datetime, timezone
+
+    from backtest import load_history, load_store_history
+    from bot import BybitTradingBot
+    from candle_store import CandleStore
+
+    def _ms(day: str) -> int:
+        parsed = datetime.strptime(day, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+        return int(parsed.timestamp() * 1000)
+
+    parser = argparse.ArgumentParser(description="Crash, walk-forward and bootstrap robustness runs")
+    parser.add_argument("directory", help="Candle store or JSON cache directory")
+    parser.add_argument("--strategies", nargs="*", default=sorted(DEFAULT_STRATEGIES))
+    parser.add_argument("--crash", nargs="*", default=[], help="YYYY-MM-DD:YYYY-MM-DD windows")
+    parser.add_argument("--walk-forward", type=int, default=0, help="Number of test splits")
+    parser.add_argument("--bootstrap", type=int, default=0, help="Paths per strategy")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--symbols", nargs="*", default=BybitTradingBot.ALLOWED_SYMBOLS)
+    args = parser.parse_args()
+
+    history = load_store_history(CandleStore(args.directory), args.symbols, intervals=(5,))
+    history = history or load_history(args.directory, args.symbols, intervals=(5,))
+    candles = {symbol: rows for (symbol, _), rows in history.items()}
+    timestamps = {s: np.array([int(c[0]) for c in rows]) for s, rows in candles.items()}
+    strategies = {name: {} for name in args.strategies}
+    scenarios: List[Scenario] = []
+    windows = [tuple(_ms(d) for d in w.split(":")) for w in args.crash]
+    scenarios += crash_scenarios(timestamps, windows, strategies)
+    if args.walk_forward:
+        scenarios += walk_forward_scenarios(timestamps, args.walk_forward, strategies)
+    if args.bootstrap:
+        scenarios += bootstrap_scenarios(args.bootstrap, strategies)
+    print(json.dumps(run_robustness(candles, scenarios, max_workers=args.workers), indent=2))
@@ -0,0 +1,284 @@
+"""Rate-limit-aware scheduling of pybit REST calls.
+
+``ScheduledSession`` sits between ``BybitTradingBot`` and the pybit ``HTTP``
+session. Every call takes a token from the bucket of its endpoint group
+(``ENDPOINTS``/``LIMITS``, matched to Bybit's published per-UID limits) and
+from a shared bucket for the per-IP budget. Waiting calls are served by
+priority lane:
+
+* ``HIGH`` — order placement, amends, cancels and trading stops;
+* ``NORMAL`` — leverage, positions, executions and wallet balance;
+* ``LOW`` — market data such as ``get_kline`` and ``get_tickers``.
+
+Low-priority reads never drain the last ``reserve`` shared tokens, so an
+order does not queue behind a burst of kline polling. Under pressure they
+degrade instead of piling up: identical reads already in flight are
+coalesced into one request, and reads that would wait longer than
+``max_wait`` or find ``max_queued`` reads ahead of them are shed with
+``RequestShed``.
+
+When the session is created with ``return_response_headers=True`` the
+``X-Bapi-Limit-Status`` and ``X-Bapi-Limit-Reset-Timestamp`` headers adjust
+the group bucket to the quota the exchange actually reports, and the
+headers are stripped so callers still get the plain response dict.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Mapping, Optional, Tuple
+
+__all__ = [
+    "HIGH",
+    "NORMAL",
+    "LOW",
+    "ENDPOINTS",
+    "LIMITS",
+    "RequestShed",
+    "TokenBucket",
+    "ScheduledSession",
+]
+
+HIGH, NORMAL, LOW = 0, 1, 2
+LANES = {HIGH: "high", NORMAL: "normal", LOW: "low"}
+
+# method -> (endpoint group, priority)
+ENDPOINTS: Dict[str, Tuple[str, int]] = {
+    "place_order": ("order", HIGH),
+    "amend_order": ("order", HIGH),
+    "cancel_order": ("order", HIGH),
+    "cancel_all_orders": ("order", HIGH),
+    "place_batch_order": ("batch", HIGH),
+    "amend_batch_order": ("batch", HIGH),
+    "cancel_batch_order": ("batch", HIGH),
+    "set_trading_stop": ("trading_stop", HIGH),
+    "set_leverage": ("leverage", NORMAL),
+    "get_positions": ("position", NORMAL),
+    "get_open_orders": ("order_read", NORMAL),
+    "get_order_history": ("order_read", NORMAL),
+    "get_executions": ("account", NORMAL),
+    "get_wallet_balance": ("account", NORMAL),
+    "get_kline": ("market", LOW),
+    "get_tickers": ("market", LOW),
+    "get_orderbook": ("market", LOW),
+    "get_instruments_info": ("market", LOW),
+}
+
+# requests per second and burst per group
+LIMITS: Dict[str, Tuple[float, float]] = {
+    "order": (10, 10),
+    "batch": (10, 10),
+    "trading_stop": (10, 10),
+    "leverage": (10, 10),
+    "position": (50, 50),
+    "order_read": (50, 50),
+    "account": (50, 50),
+    "market": (120, 120),
+}
+
+# every request from one IP: 600 per 5 second window
+SHARED_LIMIT: Tuple[float, float] = (120, 600)
+
+
+class RequestShed(RuntimeError):
+    """A low-priority request was dropped instead of waiting for quota."""
+
+
+class TokenBucket:
+    """``rate`` tokens per second up to ``burst``; not thread-safe on its own."""
+
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.blocked_until = 0.0
+        self._clock = clock
+        self._updated = clock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, need: float = 1.0) -> float:
+        """Seconds until ``need`` tokens are available."""
+
+        now = self._clock()
+        self._refill(now)
+        blocked = max(0.0, self.blocked_until - now)
+        return max(blocked, (need - self.tokens) / self.rate if self.tokens < need else 0.0)
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+    def sync(self, remaining: int, reset_at: Optional[float]) -> None:
+        """Trust the exchange: never assume more quota than it reports."""
+
+        self._refill(self._clock())
+        self.tokens = min(self.tokens, float(remaining))
+        if remaining <= 0 and reset_at is not None:
+            self.blocked_until = max(self.blocked_until, reset_at)
+
+
+class ScheduledSession:
+    """Proxy that paces ``session`` calls through token buckets and lanes."""
+
+    def __init__(
+        self,
+        session,
+        limits: Mapping[str, Tuple[float, float]] = LIMITS,
+        shared: Optional[Tuple[float, float]] = SHARED_LIMIT,
+        reserve: float = 0.1,
+        max_wait: float = 2.0,
+        max_queued: int = 32,
+        clock: Callable[[], float] = time.monotonic,
+        wall_clock: Callable[[], float] = time.time,
+    ):
+        set_ = object.__setattr__
+        set_(self, "_session", session)
+        set_(self, "_buckets", {group: TokenBucket(r, b, clock) for group, (r, b) in limits.items()})
+        set_(self, "_shared", TokenBucket(*shared, clock) if shared else None)
+        set_(self, "_reserve", reserve * shared[1] if shared else 0.0)
+        set_(self, "_max_wait", max_wait)
+        set_(self, "_max_queued", max_queued)
+        set_(self, "_clock", clock)
+        set_(self, "_wall_clock", wall_clock)
+        set_(self, "_cond", threading.Condition())
+        set_(self, "_waiting", [])  # heap of (priority, seq) contending for shared tokens
+        set_(self, "_queued", {HIGH: 0, NORMAL: 0, LOW: 0})
+        set_(self, "_seq", itertools.count())
+        set_(self, "_inflight", {})
+        set_(self, "stats", {"calls": 0, "waited": 0, "coalesced": 0, "shed": 0, "header_syncs": 0})
+
+    @property
+    def wrapped(self):
+        return self._session
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._session, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+        group, priority = ENDPOINTS.get(name, (None, NORMAL))
+
+        def call(*args, **kwargs):
+            if priority == LOW and not args:
+                return self._coalesced(name, attr, group, kwargs)
+            return self._call(attr, group, priority, args, kwargs)
+
+        return call
+
+    def __setattr__(self, name: str, value) -> None:
+        setattr(self._session, name, value)
+
+    # -- quota ------------------------------------------------------------
+
+    def _acquire(self, group: Optional[str], priority: int) -> None:
+        bucket = self._buckets.get(group) if group else None
+        deadline = self._clock() + self._max_wait if priority == LOW else None
+        need = 1.0 + (self._reserve if priority == LOW else 0.0)
+        ticket = (priority, next(self._seq))
+        waited = False
+        with self._cond:
+            if priority == LOW and self._queued[LOW] >= self._max_queued:
+                self.stats["shed"] += 1
+                raise RequestShed(f"{group}: {self._max_queued} low-priority requests already queued")
+            self._queued[priority] += 1
+            contending = False
+            try:
+                while True:
+                    wait = bucket.wait_time() if bucket is not None else 0.0
+                    if wait > 0.0 and contending:
+                        # only calls with group quota compete for shared tokens
+                        self._leave(ticket)
+                        contending = False
+                    if wait == 0.0 and self._shared is not None:
+                        if not contending:
+                            heapq.heappush(self._waiting, ticket)
+                            contending = True
+                        if self._waiting[0] != ticket:
+                            wait = 1.0 / self._shared.rate
+                        else:
+                            wait = self._shared.wait_time(need)
+                    if wait == 0.0:
+                        if bucket is not None:
+                            bucket.take()
+                        if self._shared is not None:
+                            self._shared.take()
+                        break
+                    if deadline is not None and self._clock() + wait > deadline:
+                        self.stats["shed"] += 1
+                        raise RequestShed(f"{group}: no quota within {self._max_wait:.1f}s")
+                    waited = True
+                    self._cond.wait(wait)
+            finally:
+                self._queued[priority] -= 1
+                if contending:
+                    self._leave(ticket)
+                self.stats["calls"] += 1
+                self.stats["waited"] += waited
+                self._cond.notify_all()
+
+    def _leave(self, ticket: Tuple[int, int]) -> None:
+        self._waiting.remove(ticket)
+        heapq.heapify(self._waiting)
+
+    def _sync(self, group: Optional[str], headers) -> None:
+        bucket = self._buckets.get(group) if group else None
+        remaining = headers.get("X-Bapi-Limit-Status") if headers else None
+        if bucket is None or remaining is None:
+            return
+        reset = headers.get("X-Bapi-Limit-Reset-Timestamp")
+        reset_at = None
+        if reset:
+            # header is wall-clock ms; buckets run on the monotonic clock
+            reset_at = self._clock() + max(0.0, int(reset) / 1000 - self._wall_clock())
+        with self._cond:
+            bucket.sync(int(remaining), reset_at)
+            self.stats["header_syncs"] += 1
+
+    # -- calls ------------------------------------------------------------
+
+    def _call(self, attr, group: Optional[str], priority: int, args, kwargs):
+        self._acquire(group, priority)
+        result = attr(*args, **kwargs)
+        if isinstance(result, tuple) and len(result) == 3:
+            # pybit with return_response_headers=True: (response, elapsed, headers)
+            self._sync(group, result[2])
+            return result[0]
+        return result
+
+    def _coalesced(self, name: str, attr, group: Optional[str], kwargs: dict):
+        try:
+            key = (name, tuple(sorted(kwargs.items())))
+            hash(key)
+        except TypeError:
+            return self._call(attr, group, LOW, (), kwargs)
+        with self._cond:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+            else:
+                self.stats["coalesced"] += 1
+        if not leader:
+            return future.result()
+        try:
+            result = self._call(attr, group, LOW, (), kwargs)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._cond:
+                del self._inflight[key]
+
+    def queued(self) -> Dict[str, int]:
+        """Number of calls currently waiting per lane."""
+
+        with self._cond:
+            return {LANES[p]: n for p, n in self._queued.items()}
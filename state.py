@@ -0,0 +1,222 @@
+"""Local account state fed by Bybit private WebSocket topics.
+
+``AccountState`` holds open linear positions, open orders, recent
+executions and wallet equity. It is seeded once over REST with ``seed`` and
+then kept current by the ``position``, ``order``, ``execution`` and
+``wallet`` streams of a private pybit ``WebSocket`` (or any object with the
+same ``*_stream`` methods), so ``BybitTradingBot`` can check what it holds
+without extra requests.
+
+``admit`` is the entry gate: it refuses a symbol that already has a
+position or an entry in flight and applies ``functions.limit_open_positions``
+to the symbols held. An admitted entry stays pending until the streams show
+the position, the order ends without a fill, or ``pending_ttl`` passes.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional
+
+from functions import limit_open_positions
+
+__all__ = ["AccountState"]
+
+logger = logging.getLogger(__name__)
+
+OPEN_STATUSES = {"New", "PartiallyFilled", "Untriggered"}
+
+
+class AccountState:
+    """Positions, open orders, executions and wallet of one account."""
+
+    def __init__(
+        self,
+        category: str = "linear",
+        pending_ttl: float = 30.0,
+        max_executions: int = 200,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.category = category
+        self.pending_ttl = pending_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._positions: Dict[str, dict] = {}
+        self._orders: Dict[str, dict] = {}
+        self._executions: Deque[dict] = deque(maxlen=max_executions)
+        self._wallet: Dict[str, dict] = {}
+        self._pending: Dict[str, float] = {}
+        self.seeded = False
+
+    # -- feeding --------------------------------------------------------------
+
+    def seed(self, session, settle_coin: str = "USDT", account_type: str = "UNIFIED") -> None:
+        """Load positions, open orders and the wallet over REST."""
+
+        positions = self._paginate(
+            session.get_positions, category=self.category, settleCoin=settle_coin, limit=200
+        )
+        orders = self._paginate(
+            session.get_open_orders, category=self.category, settleCoin=settle_coin, limit=50
+        )
+        wallet = session.get_wallet_balance(accountType=account_type).get("result", {}).get("list", [])
+        with self._lock:
+            self._positions.clear()
+            self._orders.clear()
+            self._wallet.clear()
+        self._apply_positions(positions)
+        self._apply_orders(orders)
+        self._apply_wallet(wallet)
+        self.seeded = True
+
+    @staticmethod
+    def _paginate(method, **params) -> List[dict]:
+        items: List[dict] = []
+        cursor = ""
+        while True:
+            if cursor:
+                params["cursor"] = cursor
+            result = method(**params).get("result", {})
+            items.extend(result.get("list", []))
+            cursor = result.get("nextPageCursor", "")
+            if not cursor:
+                return items
+
+    def subscribe(self, ws) -> None:
+        """Register callbacks on a private pybit ``WebSocket``."""
+
+        ws.position_stream(callback=self.handle_position)
+        ws.order_stream(callback=self.handle_order)
+        ws.execution_stream(callback=self.handle_execution)
+        ws.wallet_stream(callback=self.handle_wallet)
+
+    def handle_position(self, message: dict) -> None:
+        self._apply_positions(message.get("data", []))
+
+    def handle_order(self, message: dict) -> None:
+        self._apply_orders(message.get("data", []))
+
+    def handle_execution(self, message: dict) -> None:
+        with self._lock:
+            for item in message.get("data", []):
+                if item.get("category", self.category) == self.category:
+                    self._executions.append(item)
+
+    def handle_wallet(self, message: dict) -> None:
+        self._apply_wallet(message.get("data", []))
+
+    def _apply_positions(self, items: List[dict]) -> None:
+        with self._lock:
+            for item in items:
+                if item.get("category", self.category) != self.category:
+                    continue
+                symbol = item["symbol"]
+                size = float(item.get("size") or 0)
+                if size == 0:
+                    self._positions.pop(symbol, None)
+                    continue
+                self._positions[symbol] = {
+                    "symbol": symbol,
+                    "side": item.get("side", ""),
+                    "size": size,
+                    # REST calls it avgPrice, the stream entryPrice
+                    "price": float(item.get("avgPrice") or item.get("entryPrice") or 0),
+                    "leverage": float(item.get("leverage") or 0),
+                    "stop_loss": float(item.get("stopLoss") or 0) or None,
+                    "take_profit": float(item.get("takeProfit") or 0) or None,
+                }
+                self._pending.pop(symbol, None)
+
+    def _apply_orders(self, items: List[dict]) -> None:
+        with self._lock:
+            for item in items:
+                if item.get("category", self.category) != self.category:
+                    continue
+                order_id = item.get("orderId", "")
+                status = item.get("orderStatus", "New")
+                if status in OPEN_STATUSES:
+                    self._orders[order_id] = item
+                    continue
+                self._orders.pop(order_id, None)
+                symbol = item.get("symbol", "")
+                filled = float(item.get("cumExecQty") or 0) > 0
+                if not filled and symbol not in self._positions:
+                    # the entry died unfilled (IOC cancel, rejection)
+                    self._pending.pop(symbol, None)
+
+    def _apply_wallet(self, items: List[dict]) -> None:
+        with self._lock:
+            for item in items:
+                self._wallet[item.get("accountType", "UNIFIED")] = item
+
+    # -- queries --------------------------------------------------------------
+
+    def _held(self) -> List[str]:
+        now = self._clock()
+        for symbol, since in list(self._pending.items()):
+            if now - since > self.pending_ttl:
+                logger.warning("%s: entry not confirmed after %.0fs", symbol, self.pending_ttl)
+                del self._pending[symbol]
+        return sorted(set(self._positions) | set(self._pending))
+
+    def open_symbols(self) -> List[str]:
+        """Symbols with a position or an admitted entry not yet confirmed."""
+
+        with self._lock:
+            return self._held()
+
+    def position(self, symbol: str) -> Optional[dict]:
+        with self._lock:
+            position = self._positions.get(symbol)
+            return dict(position) if position else None
+
+    def positions(self) -> List[dict]:
+        with self._lock:
+            return [dict(p) for p in self._positions.values()]
+
+    def open_orders(self, symbol: Optional[str] = None) -> List[dict]:
+        with self._lock:
+            return [o for o in self._orders.values() if symbol is None or o.get("symbol") == symbol]
+
+    def executions(self, symbol: Optional[str] = None, limit: int = 50) -> List[dict]:
+        """Newest executions first."""
+
+        with self._lock:
+            items = [e for e in reversed(self._executions) if symbol is None or e.get("symbol") == symbol]
+        return items[:limit]
+
+    def leverages(self) -> Dict[str, int]:
+        with self._lock:
+            return {s: int(p["leverage"]) for s, p in self._positions.items() if p["leverage"]}
+
+    def equity(self, account_type: str = "UNIFIED") -> Optional[float]:
+        with self._lock:
+            wallet = self._wallet.get(account_type)
+        if not wallet or wallet.get("totalEquity") in (None, ""):
+            return None
+        return float(wallet["totalEquity"])
+
+    # -- entry gate -----------------------------------------------------------
+
+    def admit(self, symbol: str, max_positions: int) -> Optional[str]:
+        """Reserve an entry on ``symbol``; return why not, or ``None`` if admitted."""
+
+        with self._lock:
+            held = self._held()
+            if symbol in self._positions:
+                return "position already open"
+            if symbol in self._pending:
+                return "entry already pending"
+            if not limit_open_positions(held, max_positions):
+                return f"{len(held)} of {max_positions} positions open"
+            self._pending[symbol] = self._clock()
+            return None
+
+    def release(self, symbol: str) -> None:
+        """Drop a reservation whose order was not sent."""
+
+        with self._lock:
+            self._pending.pop(symbol, None)
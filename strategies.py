@@ -0,0 +1,218 @@
+"""Registry of tradable strategies and their data requirements.
+
+Every strategy is described by a ``StrategySpec``: the candle function from
+``functions.py`` (or a plugin), the interval and number of bars it reads and
+the shared indicators it accepts as keyword arguments. ``StrategyRunner``
+unions the requirements of the selected specs, fetches each interval once
+per symbol with the longest lookback, computes every requested indicator
+once on that window and then runs the strategies on their own slices. The
+windows are ``functions.IndicatorContext`` objects from the bot's cache, so
+the strategies also share their float columns::
+
+    runner = StrategyRunner(bot, REGISTRY.specs(["sma_crossover", "breakout"]))
+    runner("BTCUSDT")
+
+A failing strategy is logged and skipped so the others still run; the
+runner counts such failures in ``errors``, which ``backtest.run_backtest``
+reports as ``strategy_errors``.
+
+Strategies from other packages are picked up from the
+``bybit_bot.strategies`` entry point group; an entry point may name a
+``StrategySpec`` or a plain ``candles -> (signal, stop, take)`` function::
+
+    [project.entry-points."bybit_bot.strategies"]
+    my_strategy = "my_package.strategies:SPEC"
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from dataclasses import dataclass, field
+from importlib.metadata import entry_points
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from functions import (
+    _atr_from_candles,
+    breakout,
+    half_year_strategy,
+    mean_reversion,
+    rsi_strategy,
+    sma_crossover,
+)
+
+__all__ = [
+    "ENTRY_POINT_GROUP",
+    "INDICATORS",
+    "StrategySpec",
+    "StrategyRegistry",
+    "StrategyRunner",
+    "REGISTRY",
+]
+
+logger = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = "bybit_bot.strategies"
+
+# indicator name -> function of the candle window, passed to strategies by name
+INDICATORS: Dict[str, Callable[[Sequence[Sequence[float]]], float]] = {
+    "atr": _atr_from_candles,
+}
+
+
+@dataclass(frozen=True)
+class StrategySpec:
+    """A strategy function and the data it needs."""
+
+    name: str
+    func: Callable
+    interval: int | str = 5
+    lookback: int = 50
+    indicators: Tuple[str, ...] = ()
+    params: Mapping[str, object] = field(default_factory=dict, compare=False)
+
+
+class StrategyRegistry:
+    """Named ``StrategySpec`` objects in registration order."""
+
+    def __init__(self, specs: Iterable[StrategySpec] = ()):
+        self._specs: Dict[str, StrategySpec] = {}
+        for spec in specs:
+            self.register(spec)
+
+    def register(self, spec: StrategySpec, replace: bool = False) -> StrategySpec:
+        if spec.name in self._specs and not replace:
+            raise ValueError(f"Strategy {spec.name} is already registered")
+        unknown = set(spec.indicators) - set(INDICATORS)
+        if unknown:
+            raise ValueError(f"Unknown indicators for {spec.name}: {sorted(unknown)}")
+        self._specs[spec.name] = spec
+        return spec
+
+    def strategy(self, interval: int | str = 5, lookback: int = 50, indicators: Sequence[str] = (), name: Optional[str] = None):
+        """Decorator registering a ``candles -> (signal, stop, take)`` function."""
+
+        def decorate(func: Callable) -> Callable:
+            self.register(StrategySpec(name or func.__name__, func, interval, lookback, tuple(indicators)))
+            return func
+
+        return decorate
+
+    def get(self, name: str) -> StrategySpec:
+        try:
+            return self._specs[name]
+        except KeyError:
+            raise ValueError(f"Unknown strategy {name}") from None
+
+    def specs(self, names: Optional[Iterable[str]] = None) -> List[StrategySpec]:
+        if names is None:
+            return list(self._specs.values())
+        return [self.get(name) for name in names]
+
+    def names(self) -> List[str]:
+        return list(self._specs)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._specs
+
+    def __iter__(self) -> Iterator[StrategySpec]:
+        return iter(list(self._specs.values()))
+
+    def __len__(self) -> int:
+        return len(self._specs)
+
+    def load_entry_points(self, group: str = ENTRY_POINT_GROUP) -> List[str]:
+        """Register strategies published by installed packages; return their names."""
+
+        loaded = []
+        for ep in entry_points(group=group):
+            try:
+                obj = ep.load()
+                spec = obj if isinstance(obj, StrategySpec) else StrategySpec(ep.name, obj)
+                self.register(spec)
+            except Exception as exc:
+                logger.error("strategy plugin %s failed to load: %s", ep.name, exc)
+                continue
+            loaded.append(spec.name)
+        return loaded
+
+
+def requirements(specs: Iterable[StrategySpec]) -> Dict[int | str, Tuple[int, Tuple[str, ...]]]:
+    """Union of ``specs`` per interval: longest lookback and all indicators."""
+
+    needs: Dict[int | str, Tuple[int, Tuple[str, ...]]] = {}
+    for spec in specs:
+        lookback, indicators = needs.get(spec.interval, (0, ()))
+        merged = indicators + tuple(i for i in spec.indicators if i not in indicators)
+        needs[spec.interval] = (max(lookback, spec.lookback), merged)
+    return needs
+
+
+class StrategyRunner:
+    """Per-symbol callable fetching data once and running several strategies."""
+
+    def __init__(self, bot, specs: Sequence[StrategySpec], amount: float = 100, leverage: int = 10):
+        self.bot = bot
+        self.specs = list(specs)
+        self.amount = amount
+        self.leverage = leverage
+        self.needs = requirements(self.specs)
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, symbol: str) -> Optional[List[dict]]:
+        windows: Dict[int | str, list] = {}
+        shared: Dict[int | str, Dict[str, float]] = {}
+        for interval, (lookback, indicators) in self.needs.items():
+            try:
+                candles = self.bot._context(symbol, interval, lookback)
+            except Exception as exc:
+                logger.error("%s: %s candles unavailable: %s", symbol, interval, exc)
+                continue
+            windows[interval] = candles
+            values = {}
+            for name in indicators:
+                try:
+                    values[name] = INDICATORS[name](candles)
+                except (ValueError, ZeroDivisionError, IndexError):
+                    continue  # the strategy computes it itself or rejects the window
+            shared[interval] = values
+        placed = []
+        for spec in self.specs:
+            candles = windows.get(spec.interval)
+            if candles is None:
+                continue
+            indicators = {
+                name: value for name, value in shared[spec.interval].items() if name in spec.indicators
+            }
+            try:
+                result = self.bot.trade_strategy(
+                    symbol,
+                    self.amount,
+                    self.leverage,
+                    spec.func,
+                    spec.interval,
+                    spec.lookback,
+                    candles=candles.tail(spec.lookback),
+                    indicators={**spec.params, **indicators},
+                    name=spec.name,
+                )
+            except Exception as exc:
+                with self._lock:
+                    self.errors += 1
+                logger.error("%s: %s failed: %s", symbol, spec.name, exc)
+                continue
+            if result:
+                placed.append(result)
+        return placed or None
+
+
+REGISTRY = StrategyRegistry(
+    [
+        StrategySpec("sma_crossover", sma_crossover, 5, 50, ("atr",)),
+        StrategySpec("breakout", breakout, 5, 50, ("atr",)),
+        StrategySpec("mean_reversion", mean_reversion, 5, 50, ("atr",)),
+        StrategySpec("rsi_strategy", rsi_strategy, 5, 50, ("atr",)),
+        StrategySpec("half_year_strategy", half_year_strategy, 240, 200, ("atr",)),
+    ]
+)
@@ -0,0 +1,131 @@
+import threading
+import time
+
+import pytest
+
+from backfill import PREPEND_PAGES, backfill, find_gaps, known_empty, missing_ranges
+from candle_store import CandleStore
+
+STEP = 300_000
+
+
+class FakeKlineSession:
+    """Answers paginated get_kline like Bybit: newest first, at most ``limit`` bars."""
+
+    def __init__(self, fail_pages=0, listed=0, slow_before=None):
+        self.calls = []
+        self.fail_pages = fail_pages
+        self.listed = listed
+        self.slow_before = slow_before
+        self._lock = threading.Lock()
+
+    def get_kline(self, category, symbol, interval, start, end, limit):
+        with self._lock:
+            self.calls.append((symbol, interval, start, end))
+            if self.fail_pages:
+                self.fail_pages -= 1
+                raise ConnectionError("timeout")
+        if self.slow_before is not None and start < self.slow_before:
+            time.sleep(0.05)
+        step = int(interval) * 60_000
+        first = max(-(-start // step) * step, self.listed)
+        bars = [
+            [str(ts), "1", "2", "0.5", str(ts / step), "10"]
+            for ts in range(first, end + 1, step)
+        ]
+        return {"result": {"list": list(reversed(bars))[:limit]}}
+
+
+def test_find_gaps():
+    assert find_gaps([0, STEP, 4 * STEP, 5 * STEP], STEP) == [(2 * STEP, 3 * STEP)]
+
+
+def test_backfill_pages_and_is_idempotent(tmp_path):
+    store = CandleStore(tmp_path)
+    session = FakeKlineSession()
+    end = 2500 * STEP
+    added = backfill(session, store, 0, end, symbols=["BTCUSDT"], intervals=[5], limit=1000)
+    assert added[("BTCUSDT", 5)] == 2500
+    assert len(session.calls) == 3
+    ts = store.read("BTCUSDT", 5)["ts"]
+    assert ts[0] == 0 and ts[-1] == 2499 * STEP
+    session.calls.clear()
+    assert backfill(session, store, 0, end, symbols=["BTCUSDT"], intervals=[5]) == {}
+    assert session.calls == []
+
+
+def test_backfill_resumes_after_failed_pages(tmp_path):
+    store = CandleStore(tmp_path)
+    end = 3000 * STEP
+    backfill(FakeKlineSession(fail_pages=1), store, 0, end, symbols=["ETHUSDT"], intervals=[5], max_workers=1)
+    assert missing_ranges(store, "ETHUSDT", 5, 0, 2999 * STEP) != []
+    session = FakeKlineSession()
+    backfill(session, store, 0, end, symbols=["ETHUSDT"], intervals=[5])
+    assert len(session.calls) == 1
+    assert missing_ranges(store, "ETHUSDT", 5, 0, 2999 * STEP) == []
+
+
+def test_backfill_repairs_gaps(tmp_path):
+    store = CandleStore(tmp_path)
+    rows = [[i * STEP, 1, 2, 0.5, 1, 1] for i in range(100) if not 40 <= i < 50]
+    store.append("SOLUSDT", 5, rows)
+    session = FakeKlineSession()
+    backfill(session, store, 0, 100 * STEP, symbols=["SOLUSDT"], intervals=[5])
+    assert session.calls == [("SOLUSDT", 5, 40 * STEP, 49 * STEP)]
+    assert len(store.read("SOLUSDT", 5)) == 100
+
+
+def _count_merges(monkeypatch):
+    merges = []
+    original = CandleStore._merge
+    monkeypatch.setattr(CandleStore, "_merge", lambda self, *a: merges.append(a) or original(self, *a))
+    return merges
+
+
+def test_pages_are_written_in_time_order(tmp_path, monkeypatch):
+    merges = _count_merges(monkeypatch)
+    store = CandleStore(tmp_path)
+    # older pages answer last, as they would under load
+    session = FakeKlineSession(slow_before=6000 * STEP)
+    end = 8000 * STEP
+    backfill(session, store, 3000 * STEP, end, symbols=["BTCUSDT"], intervals=[5], max_workers=4)
+    assert merges == []
+    assert missing_ranges(store, "BTCUSDT", 5, 3000 * STEP, 7999 * STEP) == []
+    # history older than the store is one rewrite, not one per page
+    backfill(FakeKlineSession(), store, 0, end, symbols=["BTCUSDT"], intervals=[5])
+    assert len(merges) == 1
+    assert store.first_ts("BTCUSDT", 5) == 0 and len(store.read("BTCUSDT", 5)) == 8000
+
+
+def test_interrupted_history_backfill_keeps_written_batches(tmp_path, monkeypatch):
+    merges = _count_merges(monkeypatch)
+    store = CandleStore(tmp_path)
+    store.append("BTCUSDT", 5, [[i * STEP, 1, 2, 0.5, 1, 1] for i in range(5000, 5100)])
+
+    class Interrupted(FakeKlineSession):
+        def get_kline(self, category, symbol, interval, start, end, limit):
+            if start < 2500 * STEP:
+                raise KeyboardInterrupt
+            return super().get_kline(category, symbol, interval, start, end, limit)
+
+    # 50 pages of 100 bars before the stored data, written newest first
+    with pytest.raises(KeyboardInterrupt):
+        backfill(Interrupted(), store, 0, 5100 * STEP, symbols=["BTCUSDT"], intervals=[5], max_workers=1, limit=100)
+    assert len(merges) == 1
+    assert store.first_ts("BTCUSDT", 5) == (5000 - PREPEND_PAGES * 100) * STEP
+    session = FakeKlineSession()
+    backfill(session, store, 0, 5100 * STEP, symbols=["BTCUSDT"], intervals=[5], limit=100)
+    assert len(session.calls) == 30
+    assert len(store.read("BTCUSDT", 5)) == 5100 and missing_ranges(store, "BTCUSDT", 5, 0, 5099 * STEP) == []
+
+
+def test_empty_ranges_are_not_requested_again(tmp_path):
+    store = CandleStore(tmp_path)
+    session = FakeKlineSession(listed=1500 * STEP)
+    end = 2500 * STEP
+    backfill(session, store, 0, end, symbols=["XRPUSDT"], intervals=[5])
+    assert store.first_ts("XRPUSDT", 5) == 1500 * STEP
+    assert known_empty(store, "XRPUSDT", 5) == [(0, 1499 * STEP)]
+    session.calls.clear()
+    assert backfill(session, store, 0, end, symbols=["XRPUSDT"], intervals=[5]) == {}
+    assert session.calls == []
@@ -0,0 +1,139 @@
+import json
+import logging
+import random
+
+import pytest
+
+from backtest import SimulatedMarket, SimulatedSession, load_history, resample, run_backtest
+from bot import BybitTradingBot
+from strategies import REGISTRY, StrategySpec
+
+T0 = 1_700_000_100_000 // 300_000 * 300_000
+
+
+def _synth(n, seed=1, start=100.0):
+    rng = random.Random(seed)
+    price = start
+    candles = []
+    for i in range(n):
+        open_ = price
+        price *= 1 + rng.gauss(0, 0.004)
+        candles.append(
+            [T0 + i * 300_000, open_, max(open_, price) * 1.001, min(open_, price) * 0.999, price, 1.0]
+        )
+    return candles
+
+
+def test_get_kline_serves_only_closed_bars():
+    candles = _synth(10)
+    session = SimulatedSession({("BTCUSDT", 5): candles})
+    session.advance(T0 + 3 * 300_000)
+    rows = session.get_kline(symbol="BTCUSDT", interval=5, limit=50)["result"]["list"]
+    assert [r[0] for r in rows] == [candles[2][0], candles[1][0], candles[0][0]]
+    ticker = session.get_tickers(symbol="BTCUSDT")["result"]["list"][0]
+    assert float(ticker["lastPrice"]) == candles[2][4]
+
+
+def test_stop_loss_triggers_on_next_bar():
+    candles = [
+        [T0, 100, 101, 99, 100, 1],
+        [T0 + 300_000, 100, 100.5, 97, 98, 1],
+    ]
+    session = SimulatedSession({("BTCUSDT", 5): candles}, fee_rate=0)
+    session.advance(T0 + 300_000)
+    session.place_order(symbol="BTCUSDT", side="Buy", qty="1", stopLoss="98.5", takeProfit="103")
+    session.advance(T0 + 600_000)
+    assert session.positions == []
+    assert session.executions[0]["reason"] == "sl"
+    assert session.realized == pytest.approx(-1.5)
+
+
+def test_bot_batch_orders_fill_in_simulation():
+    history = {("BTCUSDT", 5): _synth(10), ("ETHUSDT", 5): _synth(10, seed=2)}
+    session = SimulatedSession(history)
+    session.advance(T0 + 5 * 300_000)
+    bot = BybitTradingBot(session)
+    intents = [
+        {"symbol": s, "side": "Buy", "amount": 100, "leverage": 10,
+         "stop_loss": session.bars[s][4] * 0.98, "take_profit": session.bars[s][4] * 1.02}
+        for s in ("BTCUSDT", "ETHUSDT")
+    ]
+    # no data for DOGEUSDT, so no price either
+    intents.append(dict(intents[0], symbol="DOGEUSDT"))
+    results = bot.place_orders(intents)
+    assert [r["ok"] for r in results] == [True, True, False]
+    assert {p["symbol"] for p in session.positions} == {"BTCUSDT", "ETHUSDT"}
+
+
+def test_resample_builds_higher_interval():
+    candles = _synth(96)
+    bars = resample(candles, 240)
+    assert sum(b[5] for b in bars) == pytest.approx(96)
+    assert all(b[0] % (240 * 60_000) == 0 for b in bars)
+
+
+def test_run_backtest_drives_real_bot(tmp_path):
+    candles = _synth(400)
+    (tmp_path / "BTCUSDT_5.json").write_text(json.dumps(candles))
+    history = load_history(tmp_path, ["BTCUSDT"])
+    assert ("BTCUSDT", 240) in history
+    placed = []
+
+    def strategies(bot):
+        assert isinstance(bot, BybitTradingBot)
+        original = bot.place_order
+
+        def record(*args, **kwargs):
+            placed.append(args)
+            return original(*args, **kwargs)
+
+        bot.place_order = record
+        return [lambda s: bot.trade_strategy(s, 100, 10, lambda c: ("Buy", c[-1][4] * 0.98, c[-1][4] * 1.02))]
+
+    result = run_backtest(history, strategies=strategies)
+    assert set(result) >= {"pnl", "max_drawdown", "orders"}
+    assert len(result["orders"]) == len(placed) > 0
+    # candles come from SimulatedMarket views, not get_kline round trips
+    assert result["kline_misses"] == 0
+    assert result["max_drawdown"] >= 0
+    assert result["strategy_errors"] == 0
+
+
+def test_simulated_market_serves_closed_bar_views():
+    candles = _synth(10)
+    session = SimulatedSession({("BTCUSDT", 5): candles})
+    market = SimulatedMarket(session)
+    session.advance(T0 + 3 * 300_000)
+    window = market.candles("BTCUSDT", 5, 50)
+    assert window == candles[:3]
+    assert market.candles("BTCUSDT", 5, 2) == candles[1:3]
+    assert market.last_price("BTCUSDT") == candles[2][4]
+    assert market.candles("ETHUSDT", 5, 50) is None and market.last_price("ETHUSDT") is None
+
+
+def test_strategy_errors_are_counted(caplog):
+    history = {("BTCUSDT", 5): _synth(80)}
+
+    def strategies(bot):
+        def broken(symbol):
+            raise ValueError("bad window")
+
+        return [broken]
+
+    with caplog.at_level(logging.WARNING, logger="backtest"):
+        result = run_backtest(history, strategies=strategies)
+    assert result["strategy_errors"] == 80 - 50 + 1
+    assert "strategy calls failed" in caplog.text
+
+
+def test_default_runner_failures_are_counted_and_muted(monkeypatch, caplog):
+    def broken(candles, **kwargs):
+        raise ZeroDivisionError("flat window")
+
+    monkeypatch.setitem(REGISTRY._specs, "breakout", StrategySpec("breakout", broken, 5, 50, ("atr",)))
+    history = {("BTCUSDT", 5): _synth(80)}
+    with caplog.at_level(logging.INFO):
+        result = run_backtest(history)
+    assert result["strategy_errors"] == 80 - 50 + 1
+    assert not [r for r in caplog.records if r.name == "strategies"]
+    assert logging.getLogger("strategies").level == logging.NOTSET
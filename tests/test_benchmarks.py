@@ -0,0 +1,27 @@
+import json
+
+from benchmarks import compare, main, run_suite
+
+
+def test_run_suite_covers_hot_paths():
+    report = run_suite(sizes=(50, 200), repeat=1, min_time=0.001)
+    names = set(report["results"])
+    assert {"sma_crossover[50]", "_atr_from_candles[200]", "half_year_strategy[200]"} <= names
+    assert {"strategies_plain[200]", "strategies_shared[200]"} <= names
+    parsed = report["results"]
+    assert parsed["parse_series[200]"]["bytes"] < parsed["parse_lists[200]"]["bytes"]
+    assert {"_format_qty", "_format_price", "trade_strategy", "polling_cycle"} <= names
+    assert all(r["best"] > 0 for r in report["results"].values())
+
+
+def test_compare_flags_regressions_and_cli_exit_code(tmp_path):
+    base = {"results": {"a": {"best": 1.0}, "b": {"best": 1.0}}}
+    now = {"results": {"a": {"best": 1.1}, "b": {"best": 1.5}, "c": {"best": 9.0}}}
+    assert [r["name"] for r in compare(base, now, threshold=0.2)] == ["b"]
+
+    baseline = tmp_path / "base.json"
+    baseline.write_text(json.dumps({"results": {"_format_qty": {"best": 1e-12}}}))
+    code = main(["--out", str(tmp_path / "new.json"), "--sizes", "50", "--repeat", "1",
+                 "--compare", str(baseline)])
+    assert code == 1
+    assert "_format_qty" in json.loads((tmp_path / "new.json").read_text())["results"]
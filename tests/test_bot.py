@@ -2,13 +2,23 @@ import sys
 import unittest
 from pathlib import Path
 from unittest.mock import MagicMock
+import json
 import logging
 import tempfile
+import threading
+import time
 
 # Добавляем путь к родительской папке, чтобы импортировать bot.py
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
-from bot import BybitTradingBot, setup_logging, logger  # импорт бота и логгера
+from bot import (  # импорт бота и логгера
+    BybitTradingBot,
+    KlineSnapshot,
+    run_cycle,
+    setup_logging,
+    log_event,
+    logger,
+)
 
 
 class TestBybitTradingBot(unittest.TestCase):
@@ -240,6 +250,82 @@ class TestBybitTradingBot(unittest.TestCase):
         self.bot.place_order("BTCUSDT", "Buy", 100, 10, 95, 105)
         self.session.place_order.assert_called_once()
 
+    def test_place_order_reads_leverage_error_code(self):
+        from pybit.exceptions import InvalidRequestError
+
+        self.session.set_leverage.side_effect = InvalidRequestError(
+            "POST /v5/position/set-leverage", "leverage not modified", 110043, "00:00:00", None
+        )
+        self.bot.place_order("BTCUSDT", "Buy", 100, 10, 95, 105)
+        self.bot.place_order("BTCUSDT", "Buy", 100, 10, 95, 105)
+        self.assertEqual(self.session.set_leverage.call_count, 1)
+        link_ids = {c.kwargs["orderLinkId"] for c in self.session.place_order.call_args_list}
+        self.assertEqual(len(link_ids), 2)
+
+    def test_set_leverage_called_only_when_target_changes(self):
+        self.bot.place_order("BTCUSDT", "Buy", 100, 10, 95, 105)
+        self.bot.place_order("BTCUSDT", "Buy", 100, 10, 95, 105)
+        self.assertEqual(self.session.set_leverage.call_count, 1)
+        self.assertEqual(self.bot.leverage_calls_skipped, 1)
+        self.bot.place_order("BTCUSDT", "Buy", 80, 15, 95, 105)
+        self.assertEqual(self.session.set_leverage.call_count, 2)
+
+    def test_sync_leverage_seeds_from_positions(self):
+        self.session.get_positions.return_value = {
+            "result": {"list": [{"symbol": "BTCUSDT", "leverage": "10"}]}
+        }
+        self.assertEqual(self.bot.sync_leverage(), {"BTCUSDT": 10})
+        self.session.get_positions.assert_called_once_with(
+            category="linear", settleCoin="USDT", limit=200
+        )
+        self.bot.place_order("BTCUSDT", "Buy", 100, 10, 95, 105)
+        self.session.set_leverage.assert_not_called()
+
+    def test_place_orders_batches_and_reports_per_order(self):
+        self.session.get_tickers.return_value = {
+            "result": {
+                "list": [
+                    {"symbol": "BTCUSDT", "lastPrice": "100"},
+                    {"symbol": "ETHUSDT", "lastPrice": "100"},
+                ]
+            }
+        }
+        self.session.place_batch_order.return_value = {
+            "result": {"list": [{"orderId": "1"}, {"orderId": ""}]},
+            "retExtInfo": {"list": [{"code": 0}, {"code": 110007, "msg": "no balance"}]},
+        }
+        results = self.bot.place_orders(
+            [
+                {"symbol": "BTCUSDT", "side": "Buy", "amount": 100, "leverage": 10,
+                 "stop_loss": 95, "take_profit": 105},
+                {"symbol": "SOLUSDT", "side": "Buy", "amount": 100, "leverage": 10,
+                 "stop_loss": 105, "take_profit": 95, "price": 100},
+                {"symbol": "ETHUSDT", "side": "Sell", "amount": 100, "leverage": 10,
+                 "stop_loss": 105, "take_profit": 95},
+            ]
+        )
+        self.session.get_tickers.assert_called_once_with(category="linear")
+        _, kwargs = self.session.place_batch_order.call_args
+        self.assertEqual([r["symbol"] for r in kwargs["request"]], ["BTCUSDT", "ETHUSDT"])
+        self.assertEqual(kwargs["request"][0]["qty"], "10.0")
+        self.assertEqual([r["ok"] for r in results], [True, False, False])
+        self.assertEqual(results[0]["orderId"], "1")
+        self.assertIn("SL/TP", results[1]["error"])
+        self.assertEqual(results[2]["error"], "no balance")
+
+    def test_place_orders_chunks_requests(self):
+        self.session.get_order_history.return_value = {"result": {"list": []}}
+        self.session.place_batch_order.side_effect = [
+            Exception("timeout"),
+            {"result": {"list": [{"orderId": "x"}]}, "retExtInfo": {"list": [{"code": 0}]}},
+        ]
+        intent = {"symbol": "BTCUSDT", "side": "Buy", "amount": 100, "leverage": 10,
+                  "stop_loss": 95, "take_profit": 105, "price": 100}
+        results = self.bot.place_orders([intent] * (BybitTradingBot.BATCH_LIMIT + 1))
+        self.assertEqual(self.session.place_batch_order.call_count, 2)
+        self.assertFalse(any(r["ok"] for r in results[:-1]))
+        self.assertTrue(results[-1]["ok"])
+
     def test_qty_is_rounded_to_step(self):
         self.session.get_tickers.return_value = {
             "result": {"list": [{"lastPrice": "114000"}]}
@@ -330,6 +416,69 @@ class TestBybitTradingBot(unittest.TestCase):
             self.bot.log_market_trend.call_count, len(self.bot.ALLOWED_SYMBOLS)
         )
 
+    def test_kline_snapshot_fetches_once_per_cycle(self):
+        candles = [[0, 100, 101, 99, str(100 + i % 3), 0] for i in range(50)]
+        self.session.get_kline.return_value = {"result": {"list": candles}}
+        with self.bot.kline_snapshot() as snapshot:
+            self.bot.log_market_trend("BTCUSDT")
+            self.bot.ma_crossover_signal("BTCUSDT")
+            self.bot.rsi_signal("BTCUSDT")
+            self.bot._atr("BTCUSDT")
+        self.session.get_kline.assert_called_once_with(
+            category="linear", symbol="BTCUSDT", interval=5, limit=50
+        )
+        self.assertEqual(snapshot.misses, 1)
+        self.assertEqual(snapshot.hits, 3)
+        # the signal methods and ATR share one indicator context
+        self.assertEqual((self.bot.indicators.hits, self.bot.indicators.misses), (2, 1))
+        self.bot.log_market_trend("BTCUSDT")
+        self.assertEqual(self.session.get_kline.call_count, 2)
+
+    def test_kline_snapshot_expires_on_bar_close(self):
+        now = [299.0]
+        snapshot = KlineSnapshot(clock=lambda: now[0])
+        snapshot.put("BTCUSDT", 5, [[0, 1, 1, 1, 1, 0]] * 3)
+        self.assertEqual(len(snapshot.get("BTCUSDT", 5, 2)), 2)
+        self.assertIsNone(snapshot.get("BTCUSDT", 5, 4))
+        now[0] = 300.0
+        self.assertIsNone(snapshot.get("BTCUSDT", 5, 2))
+        self.assertEqual((snapshot.hits, snapshot.misses), (1, 2))
+
+    def test_run_cycle_runs_symbols_in_parallel(self):
+        self.bot.log_market_trend = MagicMock()
+        calls = []
+        lock = threading.Lock()
+
+        def slow_strategy(symbol):
+            time.sleep(0.05)
+            with lock:
+                calls.append(symbol)
+
+        def failing_strategy(symbol):
+            raise RuntimeError("boom")
+
+        started = time.monotonic()
+        with self.assertLogs("bot", level="ERROR") as cm:
+            run_cycle(
+                self.bot, [failing_strategy, slow_strategy], max_workers=6
+            )
+        elapsed = time.monotonic() - started
+        self.assertEqual(sorted(calls), sorted(self.bot.ALLOWED_SYMBOLS))
+        self.assertEqual(len(cm.output), len(self.bot.ALLOWED_SYMBOLS))
+        self.assertLess(elapsed, 0.05 * len(self.bot.ALLOWED_SYMBOLS))
+
+    def test_run_cycle_keeps_per_symbol_order(self):
+        self.bot.log_market_trend = MagicMock()
+        order = []
+        strategies = [
+            lambda s: order.append((s, 1)),
+            lambda s: order.append((s, 2)),
+        ]
+        run_cycle(self.bot, strategies, max_workers=3)
+        for symbol in self.bot.ALLOWED_SYMBOLS:
+            steps = [step for s, step in order if s == symbol]
+            self.assertEqual(steps, [1, 2])
+
     def test_setup_logging_writes_to_file(self):
         with tempfile.TemporaryDirectory() as tmpdir:
             log_path = Path(tmpdir) / "log.txt"
@@ -343,6 +492,50 @@ class TestBybitTradingBot(unittest.TestCase):
             self.assertIn("file logging works", content)
             root_logger.handlers.clear()
 
+    def test_async_logging_with_rotation_and_events(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            log_path = Path(tmpdir) / "log.txt"
+            events_path = Path(tmpdir) / "events.jsonl"
+            listeners = setup_logging(
+                log_path, async_mode=True, max_bytes=200, backup_count=2,
+                events_file=events_path,
+            )
+            for i in range(20):
+                logger.info("queued line %d", i)
+            log_event("decision", symbol="BTCUSDT", signal="Buy")
+            for listener in listeners:
+                listener.stop()
+                for handler in listener.handlers:
+                    handler.close()
+            self.assertTrue((Path(tmpdir) / "log.txt.1").exists())
+            self.assertIn("queued line 19", log_path.read_text(encoding="utf-8"))
+            event = json.loads(events_path.read_text(encoding="utf-8"))
+            self.assertEqual(event["event"], "decision")
+            self.assertEqual(event["signal"], "Buy")
+            logging.getLogger().handlers.clear()
+            logging.getLogger("bot.events").handlers.clear()
+
+    def test_async_logging_formats_on_the_listener_thread(self):
+        rendered_on = []
+
+        class Probe:
+            def __str__(self):
+                rendered_on.append(threading.current_thread())
+                return "probe"
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            log_path = Path(tmpdir) / "log.txt"
+            listeners = setup_logging(log_path, async_mode=True)
+            logger.info("value %s", Probe())
+            for listener in listeners:
+                listener.stop()
+                for handler in listener.handlers:
+                    handler.close()
+            self.assertIn("value probe", log_path.read_text(encoding="utf-8"))
+            self.assertTrue(rendered_on)
+            self.assertNotIn(threading.current_thread(), rendered_on)
+            logging.getLogger().handlers.clear()
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from candle_series import CandleSeries
+from candle_store import CandleStore
+from functions import IndicatorContext, breakout, half_year_strategy, mean_reversion, rsi_strategy, sma_crossover
+from journal import pack_candles
+from benchmarks import _kline_rows, synthetic_candles
+
+
+def _legacy(rows):
+    return [list(map(float, c[:6])) for c in reversed(rows)]
+
+
+def test_from_bybit_matches_per_field_parsing():
+    rows = _kline_rows(synthetic_candles(60))
+    series = CandleSeries.from_bybit(rows)
+    assert len(series) == 60 and series == _legacy(rows)
+    # six-field and ragged rows take the slower path with the same result
+    six = [r[:6] for r in rows]
+    ragged = [r if i % 2 else r[:6] for i, r in enumerate(rows)]
+    assert CandleSeries.from_bybit(six) == series
+    assert CandleSeries.from_bybit(ragged) == series
+    assert len(CandleSeries.from_bybit([])) == 0
+
+
+def test_series_behaves_like_a_list_of_rows():
+    candles = synthetic_candles(30)
+    series = CandleSeries.from_rows(candles)
+    assert series[-1] == candles[-1] and series[0][4] == candles[0][4]
+    assert list(series) == candles
+    tail = series[-10:]
+    assert isinstance(tail, CandleSeries) and tail == candles[-10:]
+    assert tail.close.tolist() == [c[4] for c in candles[-10:]]
+    with pytest.raises(ValueError):
+        series.close[0] = 1.0
+    assert series.nbytes == 30 * 6 * 8
+
+
+def test_strategies_and_consumers_accept_series(tmp_path):
+    candles = synthetic_candles(250, seed=4)
+    series = CandleSeries.from_rows(candles)
+    for strategy in (sma_crossover, breakout, mean_reversion, rsi_strategy):
+        assert strategy(series[-50:]) == strategy(candles[-50:])
+        assert strategy(IndicatorContext(series[-50:])) == strategy(candles[-50:])
+    assert half_year_strategy(series) == half_year_strategy(candles)
+    assert pack_candles(series) == pack_candles(candles)
+    store = CandleStore(tmp_path)
+    assert store.append("BTCUSDT", 5, series) == 250
+    assert np.array_equal(store.read("BTCUSDT", 5)["close"], series.close)
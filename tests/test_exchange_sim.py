@@ -0,0 +1,108 @@
+import json
+import random
+import urllib.request
+
+import pytest
+from pybit.exceptions import InvalidRequestError
+from pybit.unified_trading import HTTP
+
+from bot import BybitTradingBot
+from exchange_sim import ExchangeSimulator, TokenBucket, constant
+from state import AccountState
+
+T0 = 1_700_000_100_000 // 300_000 * 300_000
+
+
+def _synth(n, seed=1, start=100.0):
+    rng = random.Random(seed)
+    price = start
+    candles = []
+    for i in range(n):
+        open_ = price
+        price *= 1 + rng.gauss(0, 0.004)
+        candles.append(
+            [T0 + i * 300_000, open_, max(open_, price) * 1.001, min(open_, price) * 0.999, price, 1.0]
+        )
+    return candles
+
+
+@pytest.fixture
+def sim():
+    history = {("BTCUSDT", 5): _synth(100)}
+    # frozen clock: simulated time stays at the first closed bar
+    with ExchangeSimulator(history, speed=0, clock=lambda: 0.0, rate_limits=None) as sim:
+        yield sim
+
+
+def _session(url):
+    session = HTTP(api_key="x", api_secret="y")
+    session.endpoint = url
+    return session
+
+
+def test_pybit_reads_klines_and_places_orders(sim):
+    session = _session(sim.url)
+    rows = session.get_kline(category="linear", symbol="BTCUSDT", interval=5, limit=10)["result"]["list"]
+    assert len(rows) == 1
+    bot = BybitTradingBot(session)
+    response = bot.place_order("BTCUSDT", "Buy", 80, 15, stop_loss=90, take_profit=120)
+    assert response["retCode"] == 0
+    assert sim.session.positions[0]["symbol"] == "BTCUSDT"
+    assert sim.requests["/v5/order/create"] == 1
+    # the leverage is already 15: the simulator answers 110043 like Bybit
+    with pytest.raises(InvalidRequestError) as exc:
+        session.set_leverage(category="linear", symbol="BTCUSDT", buyLeverage="15", sellLeverage="15")
+    assert exc.value.status_code == 110043
+
+
+def test_account_state_seeds_and_orders_are_found_by_link_id():
+    now = [0.0]
+    history = {("BTCUSDT", 5): _synth(100)}
+    with ExchangeSimulator(history, speed=0, clock=lambda: now[0], rate_limits=None, fill_delay=1.0) as sim:
+        session = _session(sim.url)
+        session.place_order(
+            category="linear", symbol="BTCUSDT", side="Buy", orderType="Market", qty="1", orderLinkId="entry-1"
+        )
+        state = AccountState()
+        state.seed(session)
+        assert state.seeded and [o["orderLinkId"] for o in state.open_orders("BTCUSDT")] == ["entry-1"]
+        now[0] = 2.0
+        assert session.get_open_orders(category="linear", symbol="BTCUSDT")["result"]["list"] == []
+        found = session.get_order_history(category="linear", symbol="BTCUSDT", orderLinkId="entry-1")
+    order = found["result"]["list"][0]
+    assert order["orderStatus"] == "Filled" and order["cumExecQty"] == "1.0"
+
+
+def test_price_path_follows_the_clock():
+    candles = _synth(100)
+    now = [0.0]
+    with ExchangeSimulator({("BTCUSDT", 5): candles}, speed=300, clock=lambda: now[0]) as sim:
+        session = _session(sim.url)
+        now[0] = 2.0  # two 5-minute bars later
+        price = session.get_tickers(category="linear", symbol="BTCUSDT")["result"]["list"][0]["lastPrice"]
+    assert float(price) == candles[2][4]
+
+
+def test_rate_limit_answers_10006_with_headers():
+    with ExchangeSimulator(
+        {("BTCUSDT", 5): _synth(10)}, rate_limits={"/v5/market/tickers": (0.001, 2)}, latency={"*": constant(0)}
+    ) as sim:
+        url = f"{sim.url}/v5/market/tickers?category=linear&symbol=BTCUSDT"
+        bodies = []
+        for _ in range(3):
+            with urllib.request.urlopen(url) as resp:
+                bodies.append((json.load(resp), resp.headers))
+    assert [b["retCode"] for b, _ in bodies] == [0, 0, 10006]
+    assert bodies[1][1]["X-Bapi-Limit-Status"] == "0"
+    assert int(bodies[2][1]["X-Bapi-Limit-Reset-Timestamp"]) > 0
+    assert sim.throttled == {"/v5/market/tickers": 1}
+
+
+def test_token_bucket_refills():
+    now = [0.0]
+    bucket = TokenBucket(rate=2, burst=1, clock=lambda: now[0])
+    assert bucket.take()[0]
+    allowed, _, wait = bucket.take()
+    assert not allowed and wait == pytest.approx(0.5)
+    now[0] = 0.5
+    assert bucket.take()[0]
@@ -1,5 +1,8 @@
 import json
 import logging
+import math
+import random
+import statistics
 from pathlib import Path
 import tempfile
 
@@ -21,6 +24,10 @@ from functions import (
     rsi_strategy,
     half_year_strategy,
     apply_sl_tp_bounds,
+    IndicatorCache,
+    IndicatorContext,
+    _atr_from_candles,
+    _mean_reversion_levels,
 )
 
 def test_calculate_dynamic_order_size():
@@ -164,6 +171,24 @@ def test_mean_reversion_sell():
     assert target == pytest.approx(114.0)
 
 
+def test_mean_reversion_matches_exact_pstdev_at_the_bands():
+    rng = random.Random(3)
+    for i in range(200):
+        if i % 2:
+            # the last close sits on the upper band exactly when k = sqrt(19)
+            prices = [100.0] * 49 + [100.0 + rng.uniform(0.1, 5)]
+            k = math.sqrt(19)
+        else:
+            prices = [100 + rng.gauss(0, 1) for _ in range(50)]
+            k = rng.choice([1.0, 2.0, 2.5])
+        candles = _make_candles(prices)
+        window = prices[-20:]
+        expected = _mean_reversion_levels(
+            prices[-1], sum(window) / 20, statistics.pstdev(window), _atr_from_candles(candles), k
+        )
+        assert mean_reversion(candles, k=k) == expected
+
+
 def test_rsi_strategy_buy_sell():
     prices = list(range(100, 84, -1))
     signal, _, _ = rsi_strategy(_make_candles(prices))
@@ -172,3 +197,42 @@ def test_rsi_strategy_buy_sell():
     signal, _, _ = rsi_strategy(_make_candles(prices))
     assert signal == "Sell"
 
+
+
+def _walk(n, seed=3):
+    import random
+
+    rng = random.Random(seed)
+    price, rows = 100.0, []
+    for i in range(n):
+        close = price * (1 + rng.gauss(0, 0.01))
+        rows.append([i * 300_000.0, price, max(price, close) + 0.3, min(price, close) - 0.3, close, 1.0])
+        price = close
+    return rows
+
+
+def test_strategies_on_context_match_plain_candles():
+    candles = _walk(250)
+    context = IndicatorContext(candles)
+    for strategy in (sma_crossover, breakout, mean_reversion, rsi_strategy):
+        assert strategy(context.tail(50)) == strategy(candles[-50:])
+    assert half_year_strategy(context) == half_year_strategy(candles)
+    assert context.tail(15).atr() == _atr_from_candles(candles[-15:]) == context.atr()
+    # the tail slices the parent's columns instead of converting again
+    assert context.tail(50).closes == context.closes[-50:]
+    assert context.column(4) is context.closes
+
+
+def test_indicator_cache_reuses_window_until_bar_changes():
+    cache = IndicatorCache()
+    candles = _walk(50)
+    first = cache.context("BTCUSDT", 5, candles)
+    assert cache.context("BTCUSDT", 5, list(candles)) is first
+    assert cache.context("BTCUSDT", 5, candles[-20:]) is first.tail(20)
+    # the forming candle moved: new values, new context
+    moved = candles[:-1] + [candles[-1][:4] + [candles[-1][4] + 1, 1.0]]
+    assert cache.context("BTCUSDT", 5, moved) is not first
+    # next bar evicts the previous one
+    nxt = cache.context("BTCUSDT", 5, candles[1:] + [[50 * 300_000.0, 1, 2, 0.5, 1.5, 1]])
+    assert cache.context("BTCUSDT", 5, candles) is not nxt
+    assert (cache.hits, cache.misses) == (2, 4)
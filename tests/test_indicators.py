@@ -0,0 +1,115 @@
+import random
+import statistics
+
+import pytest
+
+from functions import (
+    _atr_from_candles,
+    breakout,
+    half_year_strategy,
+    mean_reversion,
+    rsi_strategy,
+    sma_crossover,
+)
+from indicators import (
+    ATR,
+    EMA,
+    RSI,
+    SMA,
+    BreakoutStream,
+    HalfYearStream,
+    MeanReversionStream,
+    RollingMax,
+    RollingMin,
+    RollingStd,
+    RsiStream,
+    SmaCrossoverStream,
+)
+
+
+def _random_candles(n, seed=7, start=30000.0):
+    rng = random.Random(seed)
+    price = start
+    candles = []
+    for i in range(n):
+        open_ = price
+        price *= 1 + rng.gauss(0, 0.01)
+        high = max(open_, price) * (1 + abs(rng.gauss(0, 0.003)))
+        low = min(open_, price) * (1 - abs(rng.gauss(0, 0.003)))
+        candles.append([i * 300000.0, open_, high, low, price, 1.0])
+    return candles
+
+
+def _assert_same(result, expected):
+    assert result[0] == expected[0]
+    assert result[1] == pytest.approx(expected[1], rel=1e-9)
+    assert result[2] == pytest.approx(expected[2], rel=1e-9)
+
+
+def test_rolling_indicators_match_window_formulas():
+    values = [c[4] for c in _random_candles(500)]
+    sma, std, hi, lo = SMA(20), RollingStd(20), RollingMax(20), RollingMin(20)
+    for i, v in enumerate(values):
+        sma.update(v)
+        std.update(v)
+        hi.update(v)
+        lo.update(v)
+        if i >= 19:
+            window = values[i - 19 : i + 1]
+            assert sma.value == pytest.approx(sum(window) / 20, rel=1e-12)
+            assert std.value == pytest.approx(statistics.pstdev(window), rel=1e-7)
+            assert hi.value == max(window)
+            assert lo.value == min(window)
+
+
+def test_ema_window_matches_restarted_ema():
+    values = [c[4] for c in _random_candles(400)]
+
+    def restarted(vals, period):
+        factor = 2 / (period + 1)
+        e = vals[0]
+        for v in vals[1:]:
+            e = v * factor + e * (1 - factor)
+        return e
+
+    ema = EMA(50, window=200)
+    for i, v in enumerate(values):
+        ema.update(v)
+        if i >= 199:
+            assert ema.value == pytest.approx(restarted(values[i - 199 : i + 1], 50), rel=1e-10)
+    plain = EMA(10)
+    for v in values:
+        plain.update(v)
+    assert plain.value == pytest.approx(restarted(values, 10), rel=1e-12)
+
+
+def test_atr_and_rsi_match_stateless():
+    candles = _random_candles(300)
+    atr, rsi, wilder = ATR(14), RSI(14), RSI(14, wilder=True)
+    for i, c in enumerate(candles):
+        atr.update(c[2], c[3], c[4])
+        rsi.update(c[4])
+        wilder.update(c[4])
+        if i >= 14:
+            assert atr.value == pytest.approx(_atr_from_candles(candles[i - 14 : i + 1]), rel=1e-9)
+    assert 0 <= wilder.value <= 100
+    assert rsi.ready
+
+
+@pytest.mark.parametrize(
+    "stream, func, window",
+    [
+        (SmaCrossoverStream, sma_crossover, 50),
+        (BreakoutStream, breakout, 50),
+        (MeanReversionStream, mean_reversion, 50),
+        (RsiStream, rsi_strategy, 50),
+        (HalfYearStream, half_year_strategy, 200),
+    ],
+)
+def test_streams_match_strategies(stream, func, window):
+    candles = _random_candles(600, seed=3)
+    state = stream()
+    for i, c in enumerate(candles):
+        result = state.update(c)
+        if i >= window - 1:
+            _assert_same(result, func(candles[i - window + 1 : i + 1]))
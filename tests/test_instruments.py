@@ -0,0 +1,55 @@
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+from bot import BybitTradingBot
+from instruments import InstrumentRegistry
+
+
+def _info(symbol, step="0.001", tick="0.1"):
+    return {
+        "symbol": symbol,
+        "lotSizeFilter": {"qtyStep": step, "minOrderQty": step},
+        "priceFilter": {"tickSize": tick},
+    }
+
+
+def test_load_fetches_all_pages_in_bulk():
+    session = MagicMock()
+    session.get_instruments_info.side_effect = [
+        {"result": {"list": [_info("BTCUSDT")], "nextPageCursor": "abc"}},
+        {"result": {"list": [_info("ETHUSDT", "0.01", "0.01")], "nextPageCursor": ""}},
+    ]
+    registry = InstrumentRegistry(session)
+    assert registry.load() == 2
+    assert session.get_instruments_info.call_args_list[1].kwargs["cursor"] == "abc"
+    eth = registry.get("ETHUSDT")
+    assert eth.qty_step == 0.01 and eth.d_tick == Decimal("0.01")
+    assert session.get_instruments_info.call_count == 2
+
+
+def test_registry_shared_between_bots_and_refreshes_after_ttl():
+    now = [0.0]
+    session = MagicMock()
+    session.get_instruments_info.return_value = {"result": {"list": [_info("BTCUSDT")]}}
+    registry = InstrumentRegistry(session, ttl=60, clock=lambda: now[0])
+    first = BybitTradingBot(session, instruments=registry)
+    second = BybitTradingBot(session, instruments=registry)
+    assert first._format_qty("BTCUSDT", 0.0123) == 0.012
+    assert second._format_price("BTCUSDT", 100.04) == 100.0
+    assert session.get_instruments_info.call_count == 1
+    session.get_instruments_info.return_value = {"result": {"list": [_info("BTCUSDT", tick="0.5")]}}
+    now[0] = 61.0
+    assert second._format_price("BTCUSDT", 100.3) == 100.5
+    assert session.get_instruments_info.call_count == 2
+
+
+def test_background_refresh_keeps_entries_on_order_path():
+    session = MagicMock()
+    session.get_instruments_info.return_value = {"result": {"list": [_info("BTCUSDT")]}}
+    registry = InstrumentRegistry(session, ttl=3600)
+    registry.start()
+    try:
+        assert registry.get("BTCUSDT").min_qty == 0.001
+        assert session.get_instruments_info.call_count == 1
+    finally:
+        registry.stop()
@@ -0,0 +1,185 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+from bot import BybitTradingBot, start_streaming, warm_candles
+from candle_store import CandleStore
+from market_stream import MarketStream
+
+
+class FakeWebSocket:
+    """Stands in for pybit's WebSocket: records subscriptions and pushes messages."""
+
+    def __init__(self):
+        self.kline = {}
+        self.ticker = None
+
+    def kline_stream(self, interval, symbol, callback):
+        self.kline[interval] = callback
+
+    def ticker_stream(self, symbol, callback):
+        self.ticker = callback
+
+    def push_kline(self, symbol, interval, start, close, confirm):
+        self.kline[interval](
+            {
+                "topic": f"kline.{interval}.{symbol}",
+                "type": "snapshot",
+                "data": [
+                    {
+                        "start": start,
+                        "end": start + interval * 60_000 - 1,
+                        "interval": str(interval),
+                        "open": "100",
+                        "close": str(close),
+                        "high": "110",
+                        "low": "90",
+                        "volume": "5",
+                        "confirm": confirm,
+                    }
+                ],
+            }
+        )
+
+    def push_ticker(self, symbol, price):
+        self.ticker({"topic": f"tickers.{symbol}", "type": "delta", "data": {"symbol": symbol, "lastPrice": str(price)}})
+
+
+def _seed(n, step=300_000):
+    return [[i * step, 100, 110, 90, 100, 5] for i in range(n)]
+
+
+def test_buffers_update_forming_bar_and_fire_on_close():
+    closed = []
+    ws = FakeWebSocket()
+    market = MarketStream(["BTCUSDT"], on_bar_close=lambda s, i: closed.append((s, i)))
+    market.seed("BTCUSDT", 5, _seed(3))
+    market.subscribe(ws)
+    ws.push_kline("BTCUSDT", 5, 900_000, 101, confirm=False)
+    ws.push_kline("BTCUSDT", 5, 900_000, 102, confirm=True)
+    candles = market.candles("BTCUSDT", 5, 4)
+    assert [c[4] for c in candles] == [100, 100, 100, 102]
+    assert closed == [("BTCUSDT", 5)]
+    assert market.candles("BTCUSDT", 5, 5) is None
+    ws.push_ticker("BTCUSDT", 101.5)
+    ws.ticker({"topic": "tickers.BTCUSDT", "type": "delta", "data": {"symbol": "BTCUSDT"}})
+    assert market.last_price("BTCUSDT") == 101.5
+
+
+def test_stale_buffers_fall_back_to_rest():
+    now = [0.0]
+    market = MarketStream(["BTCUSDT"], stale_after=10, clock=lambda: now[0])
+    market.seed("BTCUSDT", 5, _seed(50))
+    assert market.candles("BTCUSDT", 5, 50) is not None
+    now[0] = 11.0
+    assert market.candles("BTCUSDT", 5, 50) is None
+
+
+def test_gap_hides_buffer_until_reseeded():
+    gaps = []
+    ws = FakeWebSocket()
+    market = MarketStream(["BTCUSDT"], on_gap=lambda s, i: gaps.append((s, i)))
+    market.seed("BTCUSDT", 5, _seed(50))
+    market.subscribe(ws)
+    # bars 50 and 51 were missed while the socket was down
+    ws.push_kline("BTCUSDT", 5, 52 * 300_000, 101, confirm=False)
+    ws.push_kline("BTCUSDT", 5, 52 * 300_000, 102, confirm=True)
+    # once when the hole shows up, again on the bar close while still gapped
+    assert gaps == [("BTCUSDT", 5)] * 2
+    assert market.candles("BTCUSDT", 5, 10) is None
+    # a REST window that stops short of the streamed bar keeps the gap
+    market.seed("BTCUSDT", 5, _seed(51))
+    assert market.candles("BTCUSDT", 5, 10) is None
+    market.seed("BTCUSDT", 5, _seed(53))
+    candles = market.candles("BTCUSDT", 5, 53)
+    assert [c[0] for c in candles] == [i * 300_000 for i in range(53)]
+    assert candles[-1][4] == 102  # the streamed copy of the overlap is kept
+    ws.push_kline("BTCUSDT", 5, 53 * 300_000, 103, confirm=True)
+    assert len(gaps) == 2 and len(market.candles("BTCUSDT", 5, 54)) == 54
+
+
+def test_streaming_reseeds_gapped_buffer_over_rest():
+    session = MagicMock()
+    session.get_kline.side_effect = _kline_response(None)
+    bot = BybitTradingBot(session)
+    ws = FakeWebSocket()
+    step = 300_000
+    forming = int(time.time() * 1000) // step * step
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        market = start_streaming(bot, ws, [lambda symbol: None], pool, intervals=(5,))
+        calls = session.get_kline.call_count
+        ws.push_kline("SOLUSDT", 5, forming + 3 * step, 100, confirm=False)
+    assert session.get_kline.call_count == calls + 1
+    assert session.get_kline.call_args.kwargs["symbol"] == "SOLUSDT"
+    assert market.candles("SOLUSDT", 5, 50) is None  # REST still ends before the streamed bar
+
+
+def test_bot_reads_stream_and_trades_on_bar_close():
+    session = MagicMock()
+    session.get_kline.return_value = {"result": {"list": list(reversed(_seed(200)))}}
+    bot = BybitTradingBot(session)
+    bot.log_market_trend = MagicMock()
+    evaluated = []
+    ws = FakeWebSocket()
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        start_streaming(bot, ws, [evaluated.append], pool)
+        seeded_calls = session.get_kline.call_count
+        ws.push_ticker("ETHUSDT", 2500)
+        assert bot._last_price("ETHUSDT") == 2500
+        assert len(bot._get_candles("ETHUSDT", 5, 50)) == 50
+        # seeded from the same rows, so the next 4h bar follows the last 5m start
+        ws.push_kline("ETHUSDT", 240, 199 * 300_000 + 14_400_000, 100, confirm=True)
+        ws.push_kline("ETHUSDT", 5, 200 * 300_000, 100, confirm=True)
+    assert seeded_calls == len(bot.ALLOWED_SYMBOLS) * 2
+    assert session.get_kline.call_count == seeded_calls
+    session.get_tickers.assert_not_called()
+    assert evaluated == ["ETHUSDT"]
+
+
+def _kline_response(end, step=300_000):
+    def get_kline(limit, **_):
+        forming = int(time.time() * 1000) // step * step if end is None else end
+        rows = [[str(forming - i * step), "100", "110", "90", "101", "5"] for i in range(limit)]
+        return {"result": {"list": rows}}
+
+    return get_kline
+
+
+def test_warm_candles_downloads_only_missing_bars(tmp_path):
+    store = CandleStore(tmp_path)
+    store.append("BTCUSDT", 5, _seed(200))
+    last = 199 * 300_000
+    session = MagicMock()
+    session.get_kline.side_effect = _kline_response(last + 600_000)
+    bot = BybitTradingBot(session)
+    candles = warm_candles(bot, store, "BTCUSDT", 5, 200, now=(last + 601_000) / 1000)
+    # the last stored bar, one missed while offline and the forming one
+    assert session.get_kline.call_args.kwargs["limit"] == 3
+    assert len(candles) == 200 and candles[-1][0] == last + 600_000
+    assert candles[-3][4] == 101  # the exchange's copy of the overlap wins
+    assert candles[0] == [2 * 300_000, 100, 110, 90, 100, 5]
+    # nothing stored, a gap in the tail or too much missing: fetch in full
+    assert warm_candles(bot, store, "ETHUSDT", 5, 200) is None
+    assert warm_candles(bot, store, "BTCUSDT", 5, 200, now=last / 1000 + 10**6) is None
+    store.append("SOLUSDT", 5, _seed(10)[:4] + _seed(10)[5:])
+    assert warm_candles(bot, store, "SOLUSDT", 5, 10, now=10 * 300) is None
+    assert session.get_kline.call_count == 1
+
+
+def test_streaming_warm_starts_from_store(tmp_path):
+    step = 300_000
+    forming = int(time.time() * 1000) // step * step
+    store = CandleStore(tmp_path)
+    store.append("BTCUSDT", 5, [[forming - i * step, 100, 110, 90, 100, 5] for i in range(1, 201)])
+    session = MagicMock()
+    session.get_kline.side_effect = _kline_response(None)
+    bot = BybitTradingBot(session)
+    ws = FakeWebSocket()
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        start_streaming(bot, ws, [lambda symbol: None], pool, intervals=(5,), store=store)
+        limits = {c.kwargs["symbol"]: c.kwargs["limit"] for c in session.get_kline.call_args_list}
+        assert limits["BTCUSDT"] <= 3 and limits["ETHUSDT"] == 200
+        assert len(bot._get_candles("BTCUSDT", 5, 200)) == 200
+        ws.push_kline("ETHUSDT", 5, forming, 100, confirm=True)
+    # confirmed bars are persisted for the next start
+    assert store.last_ts("ETHUSDT", 5) == forming
@@ -0,0 +1,65 @@
+import json
+import urllib.request
+from unittest.mock import MagicMock
+
+import pytest
+
+from bot import BybitTradingBot
+from functions import sma_crossover
+from metrics import Histogram, InstrumentedSession, MetricsExporter, MetricsRegistry
+
+
+def test_histogram_quantiles_follow_buckets():
+    hist = Histogram()
+    for ms in range(1, 101):
+        hist.observe(ms / 1000)
+    assert hist.count == 100
+    assert hist.quantile(0.5) == pytest.approx(0.05, rel=0.2)
+    assert hist.quantile(0.99) == pytest.approx(0.099, rel=0.2)
+    assert hist.quantile(1.0) == pytest.approx(0.1)
+
+
+def test_timer_counts_errors_and_decorator_names():
+    metrics = MetricsRegistry()
+    with pytest.raises(RuntimeError):
+        with metrics.timer("boom"):
+            raise RuntimeError
+
+    @metrics.timed()
+    def work():
+        return 1
+
+    assert work() == 1
+    snap = metrics.snapshot()
+    assert snap["boom"]["errors"] == 1
+    assert snap["work"]["count"] == 1 and snap["work"]["errors"] == 0
+
+
+def test_bot_times_api_calls_and_strategies():
+    session = MagicMock()
+    candles = [[i, 1, 1, 1, 100 + i, 1] for i in range(50)]
+    session.get_kline.return_value = {"result": {"list": list(reversed(candles))}}
+    session.get_tickers.side_effect = Exception("down")
+    bot = BybitTradingBot(session)
+    bot.trade_strategy("BTCUSDT", 100, 10, sma_crossover)
+    with pytest.raises(Exception):
+        bot._last_price("BTCUSDT")
+    snap = bot.metrics.snapshot()
+    assert snap["api.get_kline"]["count"] == 1
+    assert snap["api.get_tickers"]["errors"] == 1
+    assert snap["strategy.sma_crossover"]["count"] == 1
+    assert isinstance(bot.session, InstrumentedSession)
+
+
+def test_exporter_writes_file_and_serves_prometheus(tmp_path):
+    metrics = MetricsRegistry()
+    metrics.observe("api.get_kline", 0.01)
+    exporter = MetricsExporter(metrics, path=tmp_path / "m.json", port=0, interval=3600)
+    exporter.start()
+    try:
+        body = urllib.request.urlopen(f"http://127.0.0.1:{exporter.port}/metrics").read().decode()
+    finally:
+        exporter.stop()
+    assert 'bybit_bot_latency_seconds_count{name="api.get_kline"} 1' in body
+    data = json.loads((tmp_path / "m.json").read_text())
+    assert data["metrics"]["api.get_kline"]["count"] == 1
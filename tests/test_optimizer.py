@@ -0,0 +1,103 @@
+import random
+
+import numpy as np
+import pytest
+
+import optimizer
+from optimizer import evaluate, grid, optimize, random_space
+from vectorized import simulate_signals
+
+
+def _synth(n, seed):
+    rng = random.Random(seed)
+    price, candles = 100.0, []
+    for i in range(n):
+        open_ = price
+        price *= 1 + rng.gauss(0, 0.004)
+        candles.append([i * 300_000, open_, max(open_, price) * 1.001, min(open_, price) * 0.999, price, 1.0])
+    return candles
+
+
+def test_grid_and_random_space():
+    assert len(grid({"short": [3, 5], "long": [20, 30, 40]})) == 6
+    sampled = random_space({"lookback": (10, 60), "k": (1.0, 4.0)}, 20, seed=3)
+    assert len(sampled) == 20
+    assert all(10 <= p["lookback"] <= 60 and 1.0 <= p["k"] <= 4.0 for p in sampled)
+    assert sampled == random_space({"lookback": (10, 60), "k": (1.0, 4.0)}, 20, seed=3)
+
+
+def test_cli_ranges_expand_ints_and_stepped_floats():
+    space = optimizer._parse_space(["period=10:12", "k=1.5:2.5:0.25", "short=3,5"])
+    assert space == {"period": (10, 12), "k": (1.5, 2.5, 0.25), "short": [3, 5]}
+    assert optimizer._grid_values("period", space["period"]) == [10, 11, 12]
+    assert optimizer._grid_values("k", space["k"]) == [1.5, 1.75, 2.0, 2.25, 2.5]
+    assert optimizer._grid_values("short", space["short"]) == [3, 5]
+    with pytest.raises(ValueError, match="needs a step"):
+        optimizer._grid_values("k", (1.5, 3.0))
+
+
+def test_simulate_signals_stop_first_and_one_position():
+    high = np.array([101.0, 101.0, 101.0, 104.0, 101.0])
+    low = np.array([99.0, 99.0, 96.0, 99.0, 99.0])
+    close = np.full(5, 100.0)
+    signal = np.array([1, 1, 0, 1, 0], dtype=np.int8)
+    stop = np.array([97.0, 97.0, 100.0, 97.0, 100.0])
+    take = np.array([103.0, 103.0, 100.0, 103.0, 100.0])
+    pnl, trades = simulate_signals(high, low, close, signal, stop, take, notional=100, fee_rate=0)
+    # bar 0 entry stops out on bar 2 (the bar 1 signal is ignored while in a
+    # position), bar 3 entry is still open at the end and closes flat
+    assert trades == 2
+    assert pnl[2] == pytest.approx(-3.0)
+    assert pnl[4] == pytest.approx(0.0)
+
+
+def test_optimize_ranks_and_matches_parallel():
+    history = {"BTCUSDT": _synth(3000, 1), "ETHUSDT": _synth(2500, 2)}
+    candidates = grid({"lookback": [10, 20, 40], "k": [1.5, 3.0]})
+    serial = optimize(history, "breakout", candidates, rank_by="pnl", max_workers=1)
+    parallel = optimize(history, "breakout", candidates, rank_by="pnl", max_workers=2)
+    assert [r["params"] for r in serial] == [r["params"] for r in parallel]
+    assert [r["pnl"] for r in serial] == sorted((r["pnl"] for r in serial), reverse=True)
+    assert serial[0]["pnl"] == parallel[0]["pnl"]
+    assert all(r["trades"] > 0 for r in serial)
+    columns = {
+        s: tuple(np.array([c[i] for c in candles]) for i in (0, 2, 3, 4)) for s, candles in history.items()
+    }
+    assert evaluate("breakout", serial[0]["params"], columns)["pnl"] == serial[0]["pnl"]
+    # the in-process run releases its handle on the shared block
+    assert optimizer._SHM is None and not optimizer._COLUMNS
+
+
+def _columns(candles):
+    return tuple(np.array([c[i] for c in candles]) for i in (0, 2, 3, 4))
+
+
+def test_symbols_are_summed_on_their_timestamps():
+    btc = _synth(600, 1)
+    # ETH starts 100 bars later, misses bars 300-349 and ends before BTC
+    eth = [c for c in _synth(600, 2)[100:500] if not 300 <= c[0] // 300_000 < 350]
+    params = {"lookback": 10, "k": 2.0}
+    both = evaluate("breakout", params, {"BTCUSDT": _columns(btc), "ETHUSDT": _columns(eth)})
+    alone = [evaluate("breakout", params, {s: _columns(c)}) for s, c in (("BTCUSDT", btc), ("ETHUSDT", eth))]
+    assert both["pnl"] == pytest.approx(alone[0]["pnl"] + alone[1]["pnl"])
+    assert both["trades"] == alone[0]["trades"] + alone[1]["trades"]
+    pnls = {}
+    for symbol, candles in (("BTCUSDT", btc), ("ETHUSDT", eth)):
+        ts, high, low, close = _columns(candles)
+        signal, stop, take = optimizer.BATCH_STRATEGIES["breakout"](high, low, close, window=50, **params)
+        pnls[symbol] = dict(zip(ts, simulate_signals(high, low, close, signal, stop, take, 1000.0, 0.00055)[0]))
+    expected = [pnls["BTCUSDT"].get(t, 0.0) + pnls["ETHUSDT"].get(t, 0.0) for t in sorted(pnls["BTCUSDT"])]
+    total = optimizer._add_aligned(
+        [_columns(btc)[0], _columns(eth)[0]],
+        [np.array(list(pnls["BTCUSDT"].values())), np.array(list(pnls["ETHUSDT"].values()))],
+    )
+    assert total.tolist() == pytest.approx(expected)
+
+
+def test_each_strategy_runs_on_its_own_window():
+    history = {"BTCUSDT": _synth(600, 3)}
+    result = optimize(history, "half_year", [{"k": 2.0}], max_workers=1)
+    assert "error" not in result[0]
+    assert optimizer._min_window(optimizer.BATCH_STRATEGIES["half_year"], {"k": 2.0}) == 200
+    assert optimizer._min_window(optimizer.BATCH_STRATEGIES["breakout"], {"lookback": 60}) == 61
+    assert optimizer._min_window(optimizer.BATCH_STRATEGIES["rsi"], {"period": 14}) == 50
@@ -0,0 +1,147 @@
+from unittest.mock import MagicMock
+
+from bot import BybitTradingBot
+from position_manager import PositionManager
+from state import AccountState
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _setup(positions, **kwargs):
+    session = MagicMock()
+    session.get_instruments_info.return_value = {
+        "result": {"list": [{"lotSizeFilter": {"qtyStep": "0.001", "minOrderQty": "0.001"}, "priceFilter": {"tickSize": "0.5"}}]}
+    }
+    session.place_batch_order.return_value = {"retCode": 0, "result": {"list": []}}
+    bot = BybitTradingBot(session)
+    state = AccountState()
+    state.handle_position({"data": positions})
+    clock = Clock()
+    manager = PositionManager(bot, state, trail_pct=1.0, clock=clock, **kwargs)
+    return manager, session, clock
+
+
+def _long(symbol="BTCUSDT", entry="100", size="1"):
+    return {"symbol": symbol, "side": "Buy", "size": size, "avgPrice": entry, "leverage": "10"}
+
+
+def test_stop_moves_only_by_whole_ticks():
+    manager, session, clock = _setup([_long()], min_interval=0)
+    manager.run_once({"BTCUSDT": 110})
+    kwargs = session.set_trading_stop.call_args.kwargs
+    assert kwargs["stopLoss"] == "109.0" and kwargs["tpslMode"] == "Full"
+    # 110.2 -> 109.098, rounds to the same tick: no request
+    manager.run_once({"BTCUSDT": 110.2})
+    # price falling never loosens the stop
+    manager.run_once({"BTCUSDT": 105})
+    assert session.set_trading_stop.call_count == 1
+    manager.run_once({"BTCUSDT": 111})
+    assert session.set_trading_stop.call_args.kwargs["stopLoss"] == "110.0"
+    assert manager.amends == 2
+
+
+def test_short_positions_trail_downwards():
+    short = {"symbol": "ETHUSDT", "side": "Sell", "size": "1", "avgPrice": "100", "leverage": "10"}
+    manager, session, _ = _setup([short])
+    manager.run_once({"ETHUSDT": 90})
+    assert session.set_trading_stop.call_args.kwargs["stopLoss"] == "91.0"
+
+
+def test_amends_are_bounded_per_cycle_and_symbol():
+    symbols = [f"S{i}USDT" for i in range(25)]
+    manager, session, clock = _setup([_long(s) for s in symbols], max_calls=10, min_interval=5)
+    prices = {s: 110 + i for i, s in enumerate(symbols)}
+    manager.run_once(prices)
+    assert session.set_trading_stop.call_count == 10
+    # the biggest winners were protected first
+    sent = {c.kwargs["symbol"] for c in session.set_trading_stop.call_args_list}
+    assert sent == set(symbols[-10:])
+    manager.run_once(prices)
+    manager.run_once(prices)
+    assert session.set_trading_stop.call_count == 25
+    # new highs within min_interval wait
+    manager.run_once({s: p + 5 for s, p in prices.items()})
+    assert session.set_trading_stop.call_count == 25
+    clock.now = 5
+    manager.run_once({s: p + 5 for s, p in prices.items()})
+    assert session.set_trading_stop.call_count == 35
+
+
+def test_ladder_is_placed_once_as_reduce_only_limits():
+    manager, session, _ = _setup([_long(size="1")], ladder=((1.0, 30.0), (2.0, 30.0)))
+    manager.run_once({"BTCUSDT": 100})
+    manager.run_once({"BTCUSDT": 100.2})
+    assert session.place_batch_order.call_count == 1
+    legs = session.place_batch_order.call_args.kwargs["request"]
+    assert [(leg["side"], leg["price"], leg["qty"]) for leg in legs] == [("Sell", "101.0", "0.3"), ("Sell", "102.0", "0.3")]
+    assert all(leg["reduceOnly"] and leg["orderType"] == "Limit" for leg in legs)
+
+
+def test_ladders_keep_symbol_legs_together_in_batches():
+    symbols = [f"S{i}USDT" for i in range(7)]
+    manager, session, _ = _setup([_long(s) for s in symbols], ladder=((1.0, 30.0), (2.0, 30.0), (3.0, 40.0)))
+    manager.run_once({})
+    sizes = [len(c.kwargs["request"]) for c in session.place_batch_order.call_args_list]
+    assert sizes == [9, 9, 3]
+
+
+def test_ladder_legs_respect_min_qty_and_position_size():
+    manager, session, _ = _setup([_long(size="0.001")], ladder=((1.0, 30.0), (2.0, 30.0)))
+    manager.run_once({"BTCUSDT": 100})
+    # both 30 % legs are below 0.001: no ladder rather than closing it all at +1 %
+    session.place_batch_order.assert_not_called()
+    manager, session, _ = _setup([_long(size="0.005")], ladder=((1.0, 30.0), (2.0, 30.0), (3.0, 80.0)))
+    manager.run_once({"BTCUSDT": 100})
+    legs = session.place_batch_order.call_args.kwargs["request"]
+    # 0.0015 -> 0.001, the remainder is merged into the next leg; the last is capped
+    assert [leg["qty"] for leg in legs] == ["0.001", "0.002", "0.002"]
+
+
+def test_rejected_ladder_legs_are_retried_alone():
+    manager, session, _ = _setup([_long(size="1")], ladder=((1.0, 30.0), (2.0, 30.0)))
+    session.place_batch_order.return_value = {
+        "retCode": 0,
+        "result": {"list": [{"orderId": "a"}, {"orderId": ""}]},
+        "retExtInfo": {"list": [{"code": 0, "msg": "OK"}, {"code": 110017, "msg": "reduce-only rejected"}]},
+    }
+    manager.run_once({"BTCUSDT": 100})
+    session.place_batch_order.return_value = {"retCode": 0, "result": {"list": [{"orderId": "b"}]}}
+    manager.run_once({"BTCUSDT": 100})
+    retry = session.place_batch_order.call_args.kwargs["request"]
+    assert [leg["price"] for leg in retry] == ["102.0"]
+    manager.run_once({"BTCUSDT": 100})
+    assert session.place_batch_order.call_count == 2
+
+
+def test_failed_ladder_requests_are_bounded_and_reuse_link_ids():
+    manager, session, _ = _setup([_long(size="1")], ladder=((1.0, 30.0), (2.0, 30.0)))
+    session.place_batch_order.side_effect = TimeoutError("read timed out")
+    for _ in range(20):
+        manager.run_once({"BTCUSDT": 100})
+    assert session.place_batch_order.call_count == PositionManager.MAX_LADDER_ATTEMPTS
+    link_ids = {
+        tuple(leg["orderLinkId"] for leg in c.kwargs["request"])
+        for c in session.place_batch_order.call_args_list
+    }
+    assert len(link_ids) == 1
+
+
+def test_duplicate_link_id_counts_as_placed():
+    manager, session, _ = _setup([_long(size="1")], ladder=((1.0, 30.0), (2.0, 30.0)))
+    session.place_batch_order.side_effect = [
+        TimeoutError("read timed out"),
+        {
+            "retCode": 0,
+            "result": {"list": [{"orderId": ""}, {"orderId": ""}]},
+            "retExtInfo": {"list": [{"code": 110072, "msg": "duplicate"}, {"code": 110072, "msg": "duplicate"}]},
+        },
+    ]
+    for _ in range(5):
+        manager.run_once({"BTCUSDT": 100})
+    assert session.place_batch_order.call_count == 2
@@ -0,0 +1,179 @@
+import threading
+
+import pytest
+from pybit.exceptions import FailedRequestError, InvalidRequestError
+
+from resilience import CallTimeout, CircuitOpen, ResilientSession
+from scheduler import RequestShed
+
+
+def _failed():
+    return FailedRequestError("GET /v5/market/kline", "HTTP status code is not 200.", 502, "00:00:00", None)
+
+
+def _invalid(code):
+    return InvalidRequestError("POST /v5/order/create", "error", code, "00:00:00", None)
+
+
+class FakeSession:
+    def __init__(self):
+        self.kline = []  # queued results or exceptions
+        self.orders = []
+        self.order_calls = []
+        self.open_orders = []
+        self.history = []
+        self.batches = []
+        self.batch_calls = []
+        self.release = threading.Event()
+
+    def get_kline(self, **kwargs):
+        item = self.kline.pop(0)
+        if isinstance(item, BaseException):
+            raise item
+        if item == "hang":
+            self.release.wait(5)
+        return item
+
+    def place_order(self, **kwargs):
+        self.order_calls.append(kwargs)
+        item = self.orders.pop(0)
+        if isinstance(item, BaseException):
+            raise item
+        return item
+
+    def get_open_orders(self, **kwargs):
+        return {"result": {"list": self.open_orders}}
+
+    def get_order_history(self, **kwargs):
+        return {"result": {"list": [o for o in self.history if o["orderLinkId"] == kwargs["orderLinkId"]]}}
+
+    def place_batch_order(self, **kwargs):
+        self.batch_calls.append(kwargs)
+        item = self.batches.pop(0)
+        if isinstance(item, BaseException):
+            raise item
+        return item
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def _session(fake, clock=None, **kwargs):
+    clock = clock or Clock()
+    kwargs.setdefault("timeout", None)
+    return ResilientSession(fake, clock=clock, sleep=clock.sleep, **kwargs)
+
+
+def test_reads_are_retried_on_transient_errors():
+    fake = FakeSession()
+    fake.kline = [_failed(), _invalid(10016), {"retCode": 0}]
+    session = _session(fake)
+    assert session.get_kline(symbol="BTCUSDT") == {"retCode": 0}
+    assert session.stats["retries"] == 2
+
+
+def test_business_errors_are_not_retried():
+    fake = FakeSession()
+    fake.kline = [_invalid(10001), {"retCode": 0}]
+    session = _session(fake)
+    with pytest.raises(InvalidRequestError):
+        session.get_kline(symbol="BTCUSDT")
+    assert session.stats["retries"] == 0
+    assert session.breaker("get_kline").state == "closed"
+
+
+def test_open_breaker_serves_stale_reads_then_recovers():
+    fake = FakeSession()
+    clock = Clock()
+    session = _session(fake, clock, retries=0, failure_threshold=2, cooldown=30)
+    fake.kline = [{"list": [1]}, _failed(), _failed()]
+    assert session.get_kline(symbol="BTCUSDT") == {"list": [1]}
+    # both failures fall back to the cached answer and open the breaker
+    assert session.get_kline(symbol="BTCUSDT") == {"list": [1]}
+    assert session.get_kline(symbol="BTCUSDT") == {"list": [1]}
+    assert session.breaker("get_kline").state == "open"
+    # fail fast without touching the endpoint
+    assert session.get_kline(symbol="BTCUSDT") == {"list": [1]}
+    with pytest.raises(CircuitOpen):
+        session.get_kline(symbol="ETHUSDT")
+    assert session.stats["rejected"] == 2
+    clock.now += 30
+    fake.kline = [{"list": [2]}]
+    assert session.get_kline(symbol="BTCUSDT") == {"list": [2]}
+    assert session.breaker("get_kline").state == "closed"
+
+
+def test_shed_reads_fall_back_to_cache():
+    fake = FakeSession()
+    session = _session(fake)
+    fake.kline = [{"list": [1]}, RequestShed("busy")]
+    session.get_kline(symbol="BTCUSDT")
+    assert session.get_kline(symbol="BTCUSDT") == {"list": [1]}
+    assert session.breaker("get_kline").failures == 0
+
+
+def test_deadline_bounds_a_hung_call():
+    fake = FakeSession()
+    fake.kline = ["hang"]
+    session = ResilientSession(fake, timeout=0.05, retries=0)
+    with pytest.raises(CallTimeout):
+        session.get_kline(symbol="BTCUSDT")
+    fake.release.set()
+    assert session.stats["timeouts"] == 1
+
+
+def test_orders_without_link_id_are_never_retried():
+    fake = FakeSession()
+    fake.orders = [_failed(), {"retCode": 0}]
+    session = _session(fake)
+    with pytest.raises(FailedRequestError):
+        session.place_order(symbol="BTCUSDT", side="Buy")
+    assert len(fake.order_calls) == 1
+
+
+def test_order_retry_with_link_id_detects_duplicate():
+    fake = FakeSession()
+    # the first attempt timed out on our side but reached the exchange
+    fake.orders = [_failed(), _invalid(110072)]
+    # the IOC order is already filled: only the history knows it
+    fake.history = [{"orderId": "42", "orderLinkId": "abc"}]
+    session = _session(fake)
+    response = session.place_order(symbol="BTCUSDT", side="Buy", orderLinkId="abc")
+    assert response["result"] == {"orderId": "42", "orderLinkId": "abc"}
+    assert [c["orderLinkId"] for c in fake.order_calls] == ["abc", "abc"]
+
+
+def test_batch_retry_resolves_duplicate_legs():
+    fake = FakeSession()
+    fake.history = [{"orderId": "7", "orderLinkId": "a"}]
+    fake.batches = [
+        CallTimeout("no response"),
+        {
+            "retCode": 0,
+            "result": {"list": [{"orderId": "", "orderLinkId": "a"}, {"orderId": "8", "orderLinkId": "b"}]},
+            "retExtInfo": {"list": [{"code": 110072, "msg": "duplicate"}, {"code": 0, "msg": "OK"}]},
+        },
+    ]
+    session = _session(fake)
+    legs = [{"symbol": "BTCUSDT", "orderLinkId": "a"}, {"symbol": "ETHUSDT", "orderLinkId": "b"}]
+    response = session.place_batch_order(category="linear", request=legs)
+    assert len(fake.batch_calls) == 2
+    assert [o["orderId"] for o in response["result"]["list"]] == ["7", "8"]
+    assert [s["code"] for s in response["retExtInfo"]["list"]] == [0, 0]
+
+
+def test_batch_without_link_ids_is_not_retried():
+    fake = FakeSession()
+    fake.batches = [_failed(), {"retCode": 0}]
+    session = _session(fake)
+    with pytest.raises(FailedRequestError):
+        session.place_batch_order(category="linear", request=[{"symbol": "BTCUSDT"}])
+    assert len(fake.batch_calls) == 1
@@ -0,0 +1,63 @@
+import random
+
+import numpy as np
+
+from robustness import (
+    bootstrap_scenarios,
+    crash_scenarios,
+    run_robustness,
+    walk_forward_scenarios,
+)
+
+STEP = 300_000
+
+
+def _synth(n, seed):
+    rng = random.Random(seed)
+    price, candles = 100.0, []
+    for i in range(n):
+        open_ = price
+        price *= 1 + rng.gauss(0, 0.004)
+        candles.append([i * STEP, open_, max(open_, price) * 1.001, min(open_, price) * 0.999, price, 1.0])
+    return candles
+
+
+def _setup():
+    history = {"BTCUSDT": _synth(2000, 1), "ETHUSDT": _synth(2000, 2)}
+    timestamps = {s: np.array([c[0] for c in rows]) for s, rows in history.items()}
+    return history, timestamps
+
+
+def test_scenario_builders_cover_requested_ranges():
+    _, timestamps = _setup()
+    strategies = {"breakout": {}, "rsi": {}}
+    crash = crash_scenarios(timestamps, [(100 * STEP, 400 * STEP)], strategies)
+    assert len(crash) == 2 and crash[0][4]["BTCUSDT"] == (100, 400)
+    wf = walk_forward_scenarios(timestamps, 4, strategies, train_fraction=0.5)
+    assert len(wf) == 8
+    tests = [s[4]["BTCUSDT"] for s in wf if s[2] == "breakout"]
+    assert tests[0][0] == 1000 and all(a[1] == b[0] for a, b in zip(tests, tests[1:]))
+    assert len(bootstrap_scenarios(5, strategies)) == 10
+
+
+def test_run_robustness_aggregates_distributions():
+    history, timestamps = _setup()
+    strategies = {"breakout": {}, "mean_reversion": {"period": 20}}
+    scenarios = (
+        crash_scenarios(timestamps, [(0, 600 * STEP), (600 * STEP, 1200 * STEP)], strategies)
+        + walk_forward_scenarios(
+            timestamps, 2, strategies,
+            candidates={"breakout": [{"lookback": 10}, {"lookback": 30}]},
+        )
+        + bootstrap_scenarios(6, strategies, block=50)
+    )
+    seen = []
+    report = run_robustness(history, scenarios, max_workers=1, on_result=lambda *r: seen.append(r[0]))
+    assert len(seen) == len(scenarios)
+    assert set(report) == {"breakout", "mean_reversion"}
+    boot = report["breakout"]["bootstrap"]
+    assert boot["count"] == 6 and boot["errors"] == 0
+    assert boot["pnl"]["p5"] <= boot["pnl"]["p50"] <= boot["pnl"]["p95"]
+    assert report["mean_reversion"]["crash"]["count"] == 2
+    parallel = run_robustness(history, scenarios, max_workers=2)
+    assert parallel == report
@@ -0,0 +1,100 @@
+import threading
+import time
+
+import pytest
+
+from scheduler import ScheduledSession, RequestShed
+
+
+class FakeSession:
+    def __init__(self, delay=0.0, headers=None):
+        self.delay = delay
+        self.headers = headers
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def _answer(self, name, kwargs):
+        with self.lock:
+            self.calls.append((name, kwargs))
+        time.sleep(self.delay)
+        response = {"retCode": 0, "result": {"name": name}}
+        return (response, 0.0, self.headers) if self.headers is not None else response
+
+    def get_kline(self, **kwargs):
+        return self._answer("get_kline", kwargs)
+
+    def place_order(self, **kwargs):
+        return self._answer("place_order", kwargs)
+
+
+def _run(*targets):
+    threads = [threading.Thread(target=t) for t in targets]
+    for t in threads:
+        t.start()
+        time.sleep(0.01)
+    for t in threads:
+        t.join()
+
+
+def test_orders_jump_ahead_of_queued_reads():
+    fake = FakeSession()
+    session = ScheduledSession(fake, limits={}, shared=(10, 1), reserve=0)
+    session.place_order(symbol="BTCUSDT")  # drain the only shared token
+    _run(
+        lambda: session.get_kline(symbol="ETHUSDT"),
+        lambda: session.place_order(symbol="SOLUSDT"),
+    )
+    assert [name for name, _ in fake.calls] == ["place_order", "place_order", "get_kline"]
+    assert session.stats["waited"] == 2
+
+
+def test_identical_reads_in_flight_are_coalesced():
+    fake = FakeSession(delay=0.1)
+    session = ScheduledSession(fake)
+    results = []
+    read = lambda: results.append(session.get_kline(symbol="BTCUSDT", interval=5))  # noqa: E731
+    _run(read, read, read)
+    assert len(fake.calls) == 1
+    assert len(results) == 3 and all(r is results[0] for r in results)
+    assert session.stats["coalesced"] == 2
+
+
+def test_headers_sync_quota_and_low_priority_reads_are_shed():
+    reset_ms = int((time.time() + 5) * 1000)
+    fake = FakeSession(headers={"X-Bapi-Limit-Status": "0", "X-Bapi-Limit-Reset-Timestamp": str(reset_ms)})
+    session = ScheduledSession(fake, max_wait=0.05)
+    # the response is returned without the header tuple
+    assert session.get_kline(symbol="BTCUSDT") == {"retCode": 0, "result": {"name": "get_kline"}}
+    assert session.stats["header_syncs"] == 1
+    with pytest.raises(RequestShed):
+        session.get_kline(symbol="ETHUSDT")
+    assert session.stats["shed"] == 1
+    # other groups keep their own quota
+    session.place_order(symbol="BTCUSDT")
+
+
+def test_low_priority_reads_keep_shared_reserve_for_orders():
+    fake = FakeSession()
+    session = ScheduledSession(fake, limits={}, shared=(1, 10), reserve=0.5, max_wait=0.05)
+    for _ in range(5):
+        session.get_kline(symbol="BTCUSDT")
+    with pytest.raises(RequestShed):
+        session.get_kline(symbol="BTCUSDT")
+    for _ in range(5):
+        session.place_order(symbol="BTCUSDT")
+
+
+def test_header_quota_avoids_exchange_throttling():
+    from pybit.unified_trading import HTTP
+
+    from exchange_sim import ExchangeSimulator
+
+    candles = [[1_700_000_100_000 + i * 300_000, 100, 101, 99, 100, 1] for i in range(20)]
+    with ExchangeSimulator({("BTCUSDT", 5): candles}, rate_limits={"/v5/market/kline": (20, 3)}) as sim:
+        http = HTTP(api_key="x", api_secret="y", return_response_headers=True)
+        http.endpoint = sim.url
+        session = ScheduledSession(http)
+        for limit in range(1, 7):
+            session.get_kline(category="linear", symbol="BTCUSDT", interval=5, limit=limit)
+    assert sim.throttled == {}
+    assert session.stats["header_syncs"] == 6
@@ -0,0 +1,159 @@
+from unittest.mock import MagicMock
+
+import pytest
+from pybit.exceptions import InvalidRequestError
+
+from bot import BybitTradingBot
+from resilience import CallTimeout
+from state import AccountState
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _seeded_session():
+    session = MagicMock()
+    session.get_positions.side_effect = [
+        {"result": {"list": [{"symbol": "BTCUSDT", "side": "Buy", "size": "0.01", "avgPrice": "60000", "leverage": "10"}], "nextPageCursor": "p2"}},
+        {"result": {"list": [{"symbol": "ETHUSDT", "side": "Sell", "size": "0", "leverage": "5"}], "nextPageCursor": ""}},
+    ]
+    session.get_open_orders.return_value = {
+        "result": {"list": [{"symbol": "SOLUSDT", "orderId": "o1", "orderStatus": "New"}], "nextPageCursor": ""}
+    }
+    session.get_wallet_balance.return_value = {"result": {"list": [{"accountType": "UNIFIED", "totalEquity": "1234.5"}]}}
+    return session
+
+
+def test_seed_loads_positions_orders_and_wallet():
+    session = _seeded_session()
+    state = AccountState()
+    state.seed(session)
+    assert session.get_positions.call_args_list[1].kwargs["cursor"] == "p2"
+    assert [p["symbol"] for p in state.positions()] == ["BTCUSDT"]
+    assert state.leverages() == {"BTCUSDT": 10}
+    assert [o["orderId"] for o in state.open_orders()] == ["o1"]
+    assert state.equity() == 1234.5
+
+
+def test_streams_keep_state_current():
+    state = AccountState()
+    state.handle_position({"data": [{"category": "linear", "symbol": "XRPUSDT", "side": "Buy", "size": "10", "entryPrice": "0.5", "leverage": "10"}]})
+    state.handle_position({"data": [{"category": "option", "symbol": "BTC-OPT", "size": "1"}]})
+    assert state.open_symbols() == ["XRPUSDT"]
+    assert state.position("XRPUSDT")["price"] == 0.5
+    state.handle_order({"data": [{"category": "linear", "symbol": "XRPUSDT", "orderId": "a", "orderStatus": "New"}]})
+    state.handle_order({"data": [{"category": "linear", "symbol": "XRPUSDT", "orderId": "a", "orderStatus": "Filled", "cumExecQty": "10"}]})
+    assert state.open_orders() == []
+    state.handle_execution({"data": [{"category": "linear", "symbol": "XRPUSDT", "execId": "e1"}, {"category": "linear", "symbol": "XRPUSDT", "execId": "e2"}]})
+    assert [e["execId"] for e in state.executions("XRPUSDT")] == ["e2", "e1"]
+    state.handle_wallet({"data": [{"accountType": "UNIFIED", "totalEquity": "99"}]})
+    assert state.equity() == 99.0
+    state.handle_position({"data": [{"category": "linear", "symbol": "XRPUSDT", "side": "", "size": "0"}]})
+    assert state.open_symbols() == []
+
+
+def test_admit_blocks_duplicates_and_enforces_limit():
+    clock = Clock()
+    state = AccountState(pending_ttl=30, clock=clock)
+    assert state.admit("BTCUSDT", 2) is None
+    assert state.admit("BTCUSDT", 2) == "entry already pending"
+    state.handle_position({"data": [{"symbol": "BTCUSDT", "side": "Buy", "size": "1"}]})
+    assert state.admit("BTCUSDT", 2) == "position already open"
+    assert state.admit("ETHUSDT", 2) is None
+    assert state.admit("SOLUSDT", 2) == "2 of 2 positions open"
+    # an IOC entry cancelled without a fill frees its slot
+    state.handle_order({"data": [{"symbol": "ETHUSDT", "orderId": "x", "orderStatus": "Cancelled", "cumExecQty": "0"}]})
+    assert state.admit("SOLUSDT", 2) is None
+    # unconfirmed entries expire
+    clock.now = 31
+    assert state.open_symbols() == ["BTCUSDT"]
+
+
+def _bot(state):
+    session = MagicMock()
+    session.get_tickers.return_value = {"result": {"list": [{"lastPrice": "100"}]}}
+    session.get_instruments_info.return_value = {
+        "result": {"list": [{"lotSizeFilter": {"qtyStep": "0.001", "minOrderQty": "0.001"}, "priceFilter": {"tickSize": "0.5"}}]}
+    }
+    candles = [[str(i), "100", "101", "99", "100", "1"] for i in range(50)]
+    session.get_kline.return_value = {"result": {"list": candles}}
+    session.place_order.return_value = {"retCode": 0, "result": {"orderId": "1"}}
+    bot = BybitTradingBot(session, state=state)
+    bot.MAX_OPEN_POSITIONS = 2
+    return bot, session
+
+
+def test_bot_skips_duplicate_and_excess_entries_without_requests():
+    state = AccountState()
+    bot, session = _bot(state)
+    buy = lambda c: ("Buy", 95.0, 105.0)  # noqa: E731
+    assert bot.trade_strategy("BTCUSDT", 100, 10, buy) is not None
+    assert bot.trade_strategy("BTCUSDT", 100, 10, buy) is None
+    assert bot.trade_strategy("ETHUSDT", 100, 10, buy) is not None
+    assert bot.trade_strategy("SOLUSDT", 100, 10, buy) is None
+    assert session.place_order.call_count == 2
+    assert session.get_positions.call_count == 0
+    results = bot.place_orders(
+        [{"symbol": "BTCUSDT", "side": "Buy", "amount": 100, "leverage": 10, "stop_loss": 95, "take_profit": 105, "price": 100}]
+    )
+    assert results[0]["ok"] is False and "pending" in results[0]["error"]
+
+
+def test_rejected_order_releases_reservation():
+    state = AccountState()
+    bot, session = _bot(state)
+    session.place_order.side_effect = InvalidRequestError("POST /v5/order/create", "insufficient balance", 110007, "", None)
+    buy = lambda c: ("Buy", 95.0, 105.0)  # noqa: E731
+    with pytest.raises(InvalidRequestError):
+        bot.trade_strategy("BTCUSDT", 100, 10, buy)
+    assert state.open_symbols() == []
+
+
+def test_ambiguous_failure_keeps_reservation_until_ttl():
+    clock = Clock()
+    state = AccountState(pending_ttl=30, clock=clock)
+    bot, session = _bot(state)
+    session.place_order.side_effect = CallTimeout("no response")
+    buy = lambda c: ("Buy", 95.0, 105.0)  # noqa: E731
+    with pytest.raises(CallTimeout):
+        bot.trade_strategy("BTCUSDT", 100, 10, buy)
+    # the order may have been executed: no second entry meanwhile
+    assert state.open_symbols() == ["BTCUSDT"]
+    assert bot.trade_strategy("BTCUSDT", 100, 10, buy) is None
+    clock.now = 31
+    assert state.open_symbols() == []
+
+
+def test_timed_out_batch_is_looked_up_before_releasing():
+    state = AccountState()
+    bot, session = _bot(state)
+    session.place_batch_order.side_effect = CallTimeout("no response")
+
+    def history(**kwargs):
+        # the BTC leg filled, the XRP leg was cancelled unfilled, ETH never arrived
+        found = {
+            "BTCUSDT": {"orderStatus": "Filled", "cumExecQty": "1"},
+            "XRPUSDT": {"orderStatus": "Cancelled", "cumExecQty": "0"},
+        }.get(kwargs["symbol"])
+        if found is None:
+            return {"result": {"list": []}}
+        return {"result": {"list": [{"orderId": "9", "orderLinkId": kwargs["orderLinkId"], **found}]}}
+
+    session.get_order_history.side_effect = history
+    bot.MAX_OPEN_POSITIONS = 3
+    intent = {"side": "Buy", "amount": 100, "leverage": 10, "stop_loss": 95, "take_profit": 105, "price": 100}
+    results = bot.place_orders([{**intent, "symbol": s} for s in ("BTCUSDT", "ETHUSDT", "XRPUSDT")])
+    assert results[0]["ok"] and results[0]["orderId"] == "9"
+    assert not results[1]["ok"] and "unknown" in results[1]["error"]
+    assert not results[2]["ok"] and "Cancelled" in results[2]["error"]
+    # ETH may still show up on the private stream; the dead XRP order frees its slot
+    assert state.open_symbols() == ["BTCUSDT", "ETHUSDT"]
+    bot.MAX_OPEN_POSITIONS = 4
+    session.place_batch_order.side_effect = InvalidRequestError("POST /v5/order/create-batch", "bad", 10001, "", None)
+    assert "bad" in bot.place_orders([{**intent, "symbol": "SOLUSDT"}])[0]["error"]
+    assert "SOLUSDT" not in state.open_symbols()
@@ -0,0 +1,106 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+import strategies
+from bot import BybitTradingBot
+from functions import _atr_from_candles, breakout, half_year_strategy, sma_crossover
+from strategies import REGISTRY, StrategyRegistry, StrategyRunner, StrategySpec, requirements
+
+
+def _candles(n, start=100.0):
+    rows = []
+    for i in range(n):
+        close = start + (i % 7) - 3 + i * 0.05
+        rows.append([str(i), str(close), str(close + 1.5), str(close - 1.2), str(close), "1"])
+    return rows
+
+
+def _bot():
+    session = MagicMock()
+    session.get_instruments_info.return_value = {
+        "result": {"list": [{"lotSizeFilter": {"qtyStep": "0.001", "minOrderQty": "0.001"}, "priceFilter": {"tickSize": "0.5"}}]}
+    }
+    session.get_kline.side_effect = lambda **kw: {"result": {"list": _candles(kw["limit"])[::-1]}}
+    return BybitTradingBot(session), session
+
+
+def test_requirements_union_per_interval():
+    specs = [
+        StrategySpec("a", sma_crossover, 5, 30, ("atr",)),
+        StrategySpec("b", breakout, 5, 50),
+        StrategySpec("c", half_year_strategy, 240, 200, ("atr",)),
+    ]
+    assert requirements(specs) == {5: (50, ("atr",)), 240: (200, ("atr",))}
+
+
+def test_runner_fetches_each_interval_once_and_shares_atr(monkeypatch):
+    bot, session = _bot()
+    calls = []
+    monkeypatch.setitem(strategies.INDICATORS, "atr", lambda c: calls.append(len(c)) or _atr_from_candles(c))
+    seen = {}
+
+    def spy(name, func):
+        def wrapped(candles, **kwargs):
+            seen[name] = (len(candles), kwargs)
+            return func(candles, **kwargs)
+
+        return wrapped
+
+    runner = StrategyRunner(
+        bot,
+        [
+            StrategySpec("sma", spy("sma", sma_crossover), 5, 50, ("atr",)),
+            StrategySpec("brk", spy("brk", breakout), 5, 40, ("atr",)),
+            StrategySpec("half", spy("half", half_year_strategy), 240, 200, ("atr",)),
+        ],
+    )
+    bot._execute = MagicMock(return_value=None)
+    runner("BTCUSDT")
+    assert sorted(c.kwargs["interval"] for c in session.get_kline.call_args_list) == [5, 240]
+    assert calls == [50, 200]
+    assert seen["brk"][0] == 40
+    # the shared value is what each strategy would compute on its own
+    five = _candles(50)
+    assert seen["sma"][1]["atr"] == _atr_from_candles(five)
+    assert sma_crossover(five, **seen["sma"][1]) == sma_crossover(five)
+    assert breakout(five[-40:], **seen["brk"][1]) == breakout(five[-40:])
+    assert half_year_strategy(_candles(200), **seen["half"][1]) == half_year_strategy(_candles(200))
+
+
+def test_registry_rejects_duplicates_unknown_names_and_indicators():
+    registry = StrategyRegistry([StrategySpec("sma", sma_crossover)])
+    with pytest.raises(ValueError):
+        registry.register(StrategySpec("sma", breakout))
+    registry.register(StrategySpec("sma", breakout), replace=True)
+    assert registry.get("sma").func is breakout
+    with pytest.raises(ValueError):
+        registry.get("missing")
+    with pytest.raises(ValueError):
+        registry.register(StrategySpec("x", breakout, indicators=("vwap",)))
+
+    @registry.strategy(interval=15, lookback=30)
+    def flat(candles):
+        return "Hold", 0.0, 0.0
+
+    assert registry.get("flat").interval == 15 and len(registry) == 2
+    assert {spec.name for spec in REGISTRY} >= {"sma_crossover", "half_year_strategy"}
+
+
+def test_entry_point_plugins_are_registered(monkeypatch):
+    def flat(candles):
+        return "Hold", 0.0, 0.0
+
+    def broken():
+        raise ImportError("missing dependency")
+
+    eps = [
+        SimpleNamespace(name="flat", load=lambda: flat),
+        SimpleNamespace(name="spec", load=lambda: StrategySpec("hourly", flat, 60, 24)),
+        SimpleNamespace(name="broken", load=broken),
+    ]
+    monkeypatch.setattr(strategies, "entry_points", lambda group: eps)
+    registry = StrategyRegistry()
+    assert registry.load_entry_points() == ["flat", "hourly"]
+    assert registry.get("hourly").interval == 60
@@ -0,0 +1,89 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from functions import (
+    apply_sl_tp_bounds,
+    breakout,
+    half_year_strategy,
+    mean_reversion,
+    rsi_strategy,
+    select_strategy,
+    sma_crossover,
+)
+from vectorized import (
+    BATCH_STRATEGIES,
+    SIGNAL_NAMES,
+    apply_sl_tp_bounds_batch,
+    half_year_batch,
+)
+
+
+def _random_candles(n, seed=11, rounded=False):
+    rng = random.Random(seed)
+    price = 100.0
+    candles = []
+    for i in range(n):
+        open_ = price
+        price *= 1 + rng.gauss(0, 0.01)
+        if rounded:
+            price = round(price, 1)
+        high = max(open_, price) + abs(rng.gauss(0, 0.3))
+        low = min(open_, price) - abs(rng.gauss(0, 0.3))
+        candles.append([float(i), open_, high, low, price, 1.0])
+    return candles
+
+
+def _columns(candles):
+    arr = np.array(candles)
+    return arr[:, 2].copy(), arr[:, 3].copy(), arr[:, 4].copy()
+
+
+@pytest.mark.parametrize("rounded", [False, True])
+@pytest.mark.parametrize(
+    "name, func, window",
+    [
+        ("sma_crossover", sma_crossover, 50),
+        ("breakout", breakout, 50),
+        ("mean_reversion", mean_reversion, 50),
+        ("rsi", rsi_strategy, 50),
+    ],
+)
+def test_batch_matches_scalar_bit_for_bit(name, func, window, rounded):
+    candles = _random_candles(400, rounded=rounded)
+    batch = select_strategy({"strategy": name}, BATCH_STRATEGIES)
+    signals, stops, takes = batch(*_columns(candles), window=window)
+    for t in range(len(candles)):
+        if t < window - 1:
+            assert signals[t] == 0 and math.isnan(stops[t])
+            continue
+        expected = func(candles[t - window + 1 : t + 1])
+        assert (SIGNAL_NAMES[int(signals[t])], float(stops[t]), float(takes[t])) == expected
+
+
+def test_half_year_batch_matches_scalar():
+    candles = _random_candles(260, seed=5)
+    signals, stops, takes = half_year_batch(*_columns(candles))
+    for t in range(199, len(candles)):
+        expected = half_year_strategy(candles[t - 199 : t + 1])
+        assert (SIGNAL_NAMES[int(signals[t])], float(stops[t]), float(takes[t])) == expected
+
+
+def test_apply_sl_tp_bounds_batch():
+    price = np.array([100.0, 100.0, 100.0])
+    side = np.array([1, 1, -1])
+    stops, takes = apply_sl_tp_bounds_batch(
+        price, side, np.array([99.9, 50, 101]), np.array([100.2, 200, 97])
+    )
+    for i in range(3):
+        expected = apply_sl_tp_bounds(
+            price[i], SIGNAL_NAMES[side[i]], [99.9, 50, 101][i], [100.2, 200, 97][i]
+        )
+        assert (stops[i], takes[i]) == expected
+
+
+def test_batch_requires_enough_window():
+    with pytest.raises(ValueError):
+        BATCH_STRATEGIES["sma_crossover"](*_columns(_random_candles(30)), window=10)
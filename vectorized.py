@@ -0,0 +1,352 @@
+"""NumPy batch versions of the ``functions.py`` strategies.
+
+Every ``*_batch`` function takes ``high``, ``low`` and ``close`` columns and
+evaluates the strategy for all bars at once. The value at bar ``t`` equals the
+scalar strategy called on the ``window`` candles ending at ``t``, bit for bit:
+window sums are accumulated in the same left-to-right order as Python's
+``sum`` and comparisons that depend on ``statistics.pstdev`` are re-checked
+with the exact scalar formula when they fall within rounding distance.
+
+Signals are encoded as ``1`` (Buy), ``-1`` (Sell) and ``0`` (Hold). Bars
+before the first full window are ``0`` with ``NaN`` stop and take.
+"""
+
+from __future__ import annotations
+
+import statistics
+import sys
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+
+from functions import _mean_reversion_levels
+
+__all__ = [
+    "SIGNAL_NAMES",
+    "BATCH_STRATEGIES",
+    "apply_sl_tp_bounds_batch",
+    "sma_crossover_batch",
+    "breakout_batch",
+    "mean_reversion_batch",
+    "rsi_strategy_batch",
+    "half_year_batch",
+    "simulate_signals",
+]
+
+SIGNAL_NAMES = {1: "Buy", -1: "Sell", 0: "Hold"}
+
+BatchResult = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+# Python 3.12 switched ``sum`` over floats to Neumaier compensated summation
+_COMPENSATED_SUM = sys.version_info >= (3, 12)
+
+
+def _window_sum(x: np.ndarray, length: int) -> np.ndarray:
+    """Return ``sum(x[t - length + 1 : t + 1])`` for every ``t >= length - 1``.
+
+    The additions happen in the same order and with the same compensation
+    as the builtin ``sum`` so results are identical to the scalar code.
+    """
+
+    n = len(x) - length + 1
+    if n <= 0:
+        return np.empty(0)
+    total = np.zeros(n)
+    if not _COMPENSATED_SUM:
+        for j in range(length):
+            total = total + x[j : j + n]
+        return total
+    comp = np.zeros(n)
+    for j in range(length):
+        v = x[j : j + n]
+        t = total + v
+        comp += np.where(np.abs(total) >= np.abs(v), (total - t) + v, (v - t) + total)
+        total = t
+    return np.where((comp != 0) & np.isfinite(comp), total + comp, total)
+
+
+def _pad(values: np.ndarray, n: int, fill: float = np.nan) -> np.ndarray:
+    """Left-pad ``values`` to length ``n`` so index ``t`` refers to bar ``t``."""
+
+    out = np.full(n, fill)
+    out[n - len(values) :] = values
+    return out
+
+
+def _true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """True range of bars ``1..n-1`` aligned so index ``i`` is bar ``i + 1``."""
+
+    prev = close[:-1]
+    h = high[1:]
+    lo = low[1:]
+    return np.maximum(np.maximum(h - lo, np.abs(h - prev)), np.abs(lo - prev))
+
+
+def _atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, window: int, period: int = 14) -> np.ndarray:
+    """Vector of ``_atr_from_candles`` over each ``window`` ending at bar ``t``."""
+
+    length = min(period, window - 1)
+    trs = _true_range(high, low, close)
+    return _pad(_window_sum(trs, length) / period, len(close)) if length > 0 else np.zeros(len(close))
+
+
+def _rolling_mean(x: np.ndarray, period: int) -> np.ndarray:
+    return _pad(_window_sum(x, period) / period, len(x))
+
+
+def apply_sl_tp_bounds_batch(
+    price: np.ndarray,
+    side: np.ndarray,
+    stop: np.ndarray,
+    take: np.ndarray,
+    min_pct: float = 1.5,
+    max_pct: float = 5.0,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorised ``apply_sl_tp_bounds``; ``side`` holds ``1`` for Buy and ``-1`` for Sell."""
+
+    min_dist = price * (min_pct / 100)
+    max_dist = price * (max_pct / 100)
+    stop_dist = np.abs(price - stop)
+    take_dist = np.abs(take - price)
+    stop_dist = np.maximum(min_dist, np.minimum(stop_dist, max_dist))
+    take_dist = np.maximum(min_dist, np.minimum(take_dist, max_dist))
+    buy = side == 1
+    stop = np.where(buy, price - stop_dist, price + stop_dist)
+    take = np.where(buy, price + take_dist, price - take_dist)
+    return stop, take
+
+
+def _atr_levels(signal: np.ndarray, price: np.ndarray, atr: np.ndarray, k: float, valid: np.ndarray) -> BatchResult:
+    buy = signal == 1
+    stop = np.where(buy, price - atr, price + atr)
+    take = np.where(buy, price + k * atr, price - k * atr)
+    return _finish(signal, price, stop, take, valid)
+
+
+def _finish(signal: np.ndarray, price: np.ndarray, stop: np.ndarray, take: np.ndarray, valid: np.ndarray) -> BatchResult:
+    signal = np.where(valid, signal, 0).astype(np.int8)
+    with np.errstate(invalid="ignore"):
+        stop, take = apply_sl_tp_bounds_batch(price, signal, stop, take)
+    hold = signal == 0
+    stop = np.where(hold, price, stop)
+    take = np.where(hold, price, take)
+    stop[~valid] = np.nan
+    take[~valid] = np.nan
+    return signal, stop, take
+
+
+def _prepare(high, low, close, window: int, required: int):
+    if window < required:
+        raise ValueError("not enough data")
+    high = np.ascontiguousarray(high, dtype=np.float64)
+    low = np.ascontiguousarray(low, dtype=np.float64)
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    valid = np.arange(len(close)) >= window - 1
+    return high, low, close, valid
+
+
+def _sign(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """``1`` where ``a > b``, ``-1`` where ``a < b`` and ``0`` otherwise (NaN safe)."""
+
+    return np.where(a > b, 1, np.where(a < b, -1, 0))
+
+
+def sma_crossover_batch(
+    high, low, close, short: int = 5, long: int = 20, k: float = 2.0, window: int = 50
+) -> BatchResult:
+    """Batch ``sma_crossover`` over ``window`` sized candle lists."""
+
+    high, low, close, valid = _prepare(high, low, close, window, long)
+    short_sma = _rolling_mean(close, short)
+    long_sma = _rolling_mean(close, long)
+    atr = _atr(high, low, close, window)
+    return _atr_levels(_sign(short_sma, long_sma), close, atr, k, valid)
+
+
+def breakout_batch(
+    high, low, close, lookback: int = 20, k: float = 2.0, window: int = 50
+) -> BatchResult:
+    """Batch ``breakout`` over ``window`` sized candle lists."""
+
+    high, low, close, valid = _prepare(high, low, close, window, lookback + 1)
+    n = len(close)
+    prev_high = np.full(n, np.nan)
+    prev_low = np.full(n, np.nan)
+    if n > lookback:
+        views = np.lib.stride_tricks.sliding_window_view
+        prev_high[lookback:] = views(high[:-1], lookback).max(axis=1)
+        prev_low[lookback:] = views(low[:-1], lookback).min(axis=1)
+    signal = np.where(close > prev_high, 1, np.where(close < prev_low, -1, 0))
+    atr = _atr(high, low, close, window)
+    return _atr_levels(signal, close, atr, k, valid)
+
+
+def mean_reversion_batch(
+    high, low, close, period: int = 20, k: float = 2.0, window: int = 50
+) -> BatchResult:
+    """Batch ``mean_reversion`` over ``window`` sized candle lists."""
+
+    high, low, close, valid = _prepare(high, low, close, window, period)
+    n = len(close)
+    sma = _rolling_mean(close, period)
+    std = np.full(n, np.nan)
+    if n >= period:
+        std[period - 1 :] = np.lib.stride_tricks.sliding_window_view(close, period).std(axis=1)
+    atr = _atr(high, low, close, window)
+    upper = sma + k * std
+    lower = sma - k * std
+    signal = np.where(close < lower, 1, np.where(close > upper, -1, 0))
+    buy = signal == 1
+    stop = np.where(buy, close - atr, close + atr)
+    signal, stop, take = _finish(signal, close, stop, sma, valid)
+    # ``statistics.pstdev`` is correctly rounded while NumPy's is not; bars
+    # whose close sits within rounding distance of a band are recomputed.
+    with np.errstate(invalid="ignore"):
+        tol = 1e-9 * np.abs(close) + 1e-12
+        near = valid & (
+            (np.abs(close - lower) <= tol) | (np.abs(close - upper) <= tol)
+        )
+    for t in np.flatnonzero(near):
+        exact = statistics.pstdev(close[t - period + 1 : t + 1].tolist())
+        name, s, tk = _mean_reversion_levels(
+            float(close[t]), float(sma[t]), exact, float(atr[t]), k
+        )
+        signal[t] = {"Buy": 1, "Sell": -1, "Hold": 0}[name]
+        stop[t], take[t] = s, tk
+    return signal, stop, take
+
+
+def _rsi(close: np.ndarray, period: int) -> np.ndarray:
+    change = close[1:] - close[:-1]
+    gains = np.maximum(change, 0)
+    losses = np.maximum(close[:-1] - close[1:], 0)
+    avg_gain = _window_sum(gains, period) / period
+    avg_loss = _window_sum(losses, period) / period
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = np.where(avg_loss == 0, 100.0, 100 - 100 / (1 + avg_gain / avg_loss))
+    return _pad(rsi, len(close))
+
+
+def rsi_strategy_batch(
+    high, low, close, period: int = 14, k: float = 2.0, window: int = 50
+) -> BatchResult:
+    """Batch ``rsi_strategy`` over ``window`` sized candle lists."""
+
+    high, low, close, valid = _prepare(high, low, close, window, period + 1)
+    rsi = _rsi(close, period)
+    signal = np.where(rsi < 30, 1, np.where(rsi > 70, -1, 0))
+    atr = _atr(high, low, close, window)
+    return _atr_levels(signal, close, atr, k, valid)
+
+
+def _window_ema(close: np.ndarray, period: int, window: int) -> np.ndarray:
+    """EMA restarted at the first bar of every ``window``, as in ``half_year_strategy``."""
+
+    n = len(close) - window + 1
+    if n <= 0:
+        return np.full(len(close), np.nan)
+    factor = 2 / (period + 1)
+    ema = close[:n].copy()
+    for j in range(1, window):
+        ema = close[j : j + n] * factor + ema * (1 - factor)
+    return _pad(ema, len(close))
+
+
+def half_year_batch(high, low, close, k: float = 2.0, window: int = 200) -> BatchResult:
+    """Batch ``half_year_strategy`` over ``window`` sized lists of 4h candles."""
+
+    high, low, close, valid = _prepare(high, low, close, window, 200)
+    ema50 = _window_ema(close, 50, window)
+    ema200 = _window_ema(close, 200, window)
+    rsi = _rsi(close, 14)
+    with np.errstate(invalid="ignore"):
+        signal = np.where(
+            (ema50 > ema200) & (rsi > 50), 1, np.where((ema50 < ema200) & (rsi < 50), -1, 0)
+        )
+    atr_5m = _atr(high, low, close, window) / 48
+    return _atr_levels(signal, close, atr_5m, k, valid)
+
+
+def _first_exit(hit_stop: Callable, hit_take: Callable, start: int, n: int) -> Tuple[int, bool]:
+    """Return ``(bar, stopped)`` of the first SL/TP hit at or after ``start``.
+
+    The search grows geometrically so short trades only touch a few bars.
+    """
+
+    size = 64
+    while start < n:
+        end = min(n, start + size)
+        stops = hit_stop(start, end)
+        hits = stops | hit_take(start, end)
+        if hits.any():
+            j = int(np.argmax(hits))
+            return start + j, bool(stops[j])
+        start, size = end, size * 2
+    return n - 1, False
+
+
+def simulate_signals(
+    high,
+    low,
+    close,
+    signal: np.ndarray,
+    stop: np.ndarray,
+    take: np.ndarray,
+    notional: float = 1000.0,
+    fee_rate: float = 0.00055,
+) -> Tuple[np.ndarray, int]:
+    """Trade batch strategy output one position at a time.
+
+    A position of ``notional`` USDT opens at the close of a signal bar while
+    flat and closes on the first later bar touching its stop or take, with
+    the stop checked first as in ``backtest.SimulatedSession``. Fees are paid
+    on both fills; a position still open at the end is closed at the last
+    close. Returns realized P&L booked per bar and the number of trades.
+    """
+
+    high = np.ascontiguousarray(high, dtype=np.float64)
+    low = np.ascontiguousarray(low, dtype=np.float64)
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    n = len(close)
+    pnl = np.zeros(n)
+    entries = np.flatnonzero(signal != 0)
+    trades = 0
+    t = 0
+    while True:
+        idx = int(np.searchsorted(entries, t))
+        if idx >= len(entries):
+            break
+        e = int(entries[idx])
+        side, price, s, tk = int(signal[e]), close[e], stop[e], take[e]
+        if not (s < price < tk if side == 1 else tk < price < s):
+            t = e + 1
+            continue
+        qty = notional / price
+        pnl[e] -= price * qty * fee_rate
+        if side == 1:
+            exit_bar, stopped = _first_exit(
+                lambda a, b: low[a:b] <= s, lambda a, b: high[a:b] >= tk, e + 1, n
+            )
+        else:
+            exit_bar, stopped = _first_exit(
+                lambda a, b: high[a:b] >= s, lambda a, b: low[a:b] <= tk, e + 1, n
+            )
+        if stopped:
+            exit_price = s
+        elif exit_bar > e and (high[exit_bar] >= tk if side == 1 else low[exit_bar] <= tk):
+            exit_price = tk
+        else:
+            exit_price = close[exit_bar]
+        pnl[exit_bar] += side * (exit_price - price) * qty - exit_price * qty * fee_rate
+        trades += 1
+        t = exit_bar + 1
+    return pnl, trades
+
+
+BATCH_STRATEGIES: Dict[str, Callable[..., BatchResult]] = {
+    "sma_crossover": sma_crossover_batch,
+    "breakout": breakout_batch,
+    "mean_reversion": mean_reversion_batch,
+    "rsi": rsi_strategy_batch,
+    "half_year": half_year_batch,
+}